@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the JSON decoding paths used by the MCP servers.
+
+Compares stdlib ``json``, ``orjson``, full ``msgspec`` decoding and the
+projected msgspec decoder on representative 100-entry FHIR searchset bundles,
+reporting mean decode time and peak traced memory per decode.
+
+Usage:
+    python benchmarks/json_decode.py [--entries 100] [--repeat 200]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.common import json_codec  # noqa: E402
+
+NARRATIVE = (
+    '<div xmlns="http://www.w3.org/1999/xhtml">' + "Generated narrative. " * 40 + "</div>"
+)
+
+
+def _extensions(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "url": f"http://open.epic.com/FHIR/StructureDefinition/extension/{index}",
+            "valueCodeableConcept": {
+                "coding": [{"system": "urn:oid:1.2.840.114350", "code": str(index)}],
+                "text": f"Extension value {index}",
+            },
+        }
+        for index in range(count)
+    ]
+
+
+def patient_bundle(entries: int) -> bytes:
+    resources = []
+    for index in range(entries):
+        resources.append(
+            {
+                "resource": {
+                    "resourceType": "Patient",
+                    "id": f"e{index:06d}",
+                    "text": {"status": "generated", "div": NARRATIVE},
+                    "extension": _extensions(6),
+                    "identifier": [
+                        {
+                            "use": "usual",
+                            "type": {"text": "EPI"},
+                            "system": "urn:oid:1.2.840.114350.1.13.0.1.7.5.737384.0",
+                            "value": f"E{index:07d}",
+                        },
+                        {
+                            "use": "usual",
+                            "system": "urn:oid:2.16.840.1.113883.4.1",
+                            "value": "000-00-0000",
+                        },
+                    ],
+                    "active": True,
+                    "name": [
+                        {
+                            "use": "official",
+                            "text": f"Test Patient{index}",
+                            "family": f"Patient{index}",
+                            "given": ["Test"],
+                        }
+                    ],
+                    "telecom": [{"system": "phone", "value": "555-555-5555", "use": "home"}],
+                    "gender": "female",
+                    "birthDate": "1980-01-01",
+                    "address": [
+                        {
+                            "use": "home",
+                            "line": ["123 Main St"],
+                            "city": "Madison",
+                            "state": "WI",
+                            "postalCode": "53703",
+                        }
+                    ],
+                    "communication": [
+                        {
+                            "language": {"coding": [{"system": "urn:ietf:bcp:47", "code": "en"}]},
+                            "preferred": True,
+                        }
+                    ],
+                    "generalPractitioner": [
+                        {"reference": "Practitioner/abc", "display": "Physician Family Medicine"}
+                    ],
+                },
+                "search": {"mode": "match"},
+            }
+        )
+    bundle = {"resourceType": "Bundle", "type": "searchset", "total": entries, "entry": resources}
+    return json.dumps(bundle).encode()
+
+
+def medication_bundle(entries: int) -> bytes:
+    resources = []
+    for index in range(entries):
+        resources.append(
+            {
+                "resource": {
+                    "resourceType": "MedicationRequest",
+                    "id": f"m{index:06d}",
+                    "text": {"status": "generated", "div": NARRATIVE},
+                    "extension": _extensions(4),
+                    "status": "active",
+                    "intent": "order",
+                    "category": [
+                        {
+                            "coding": [
+                                {
+                                    "system": "http://terminology.hl7.org/CodeSystem/"
+                                    "medicationrequest-category",
+                                    "code": "community",
+                                }
+                            ]
+                        }
+                    ],
+                    "medicationReference": {
+                        "reference": f"Medication/{index}",
+                        "display": "lisinopril 10 MG tablet",
+                    },
+                    "subject": {"reference": "Patient/e000001", "display": "Test Patient"},
+                    "authoredOn": "2024-01-01",
+                    "requester": {
+                        "reference": "Practitioner/abc",
+                        "display": "Physician Family Medicine",
+                    },
+                    "dosageInstruction": [
+                        {
+                            "text": "Take 1 tablet by mouth daily",
+                            "timing": {"repeat": {"frequency": 1, "period": 1, "periodUnit": "d"}},
+                        }
+                    ],
+                    "dispenseRequest": {
+                        "quantity": {"value": 90, "unit": "tablet"},
+                        "numberOfRepeatsAllowed": 3,
+                    },
+                },
+                "search": {"mode": "match"},
+            }
+        )
+    bundle = {"resourceType": "Bundle", "type": "searchset", "total": entries, "entry": resources}
+    return json.dumps(bundle).encode()
+
+
+def _decoders(keys: set[str]) -> List[Tuple[str, Callable[[bytes], Any]]]:
+    decoders: List[Tuple[str, Callable[[bytes], Any]]] = [("json", json.loads)]
+    if json_codec.orjson is not None:
+        decoders.append(("orjson", json_codec.orjson.loads))
+    if json_codec.msgspec is not None:
+        decoders.append(("msgspec", json_codec.msgspec.json.decode))
+        decoders.append(("msgspec-projected", lambda data: json_codec.loads_projected(data, keys)))
+    return decoders
+
+
+def _measure(decode: Callable[[bytes], Any], payload: bytes, repeat: int) -> Tuple[float, int]:
+    decode(payload)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        decode(payload)
+    elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+
+    tracemalloc.start()
+    result = decode(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed_ms, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    cases = [
+        ("Patient", patient_bundle(args.entries), {"name", "birthDate", "identifier"}),
+        (
+            "MedicationRequest",
+            medication_bundle(args.entries),
+            {"medicationCodeableConcept", "medicationReference", "status", "dosageInstruction"},
+        ),
+    ]
+    print(f"{'bundle':<18} {'decoder':<18} {'size KiB':>9} {'ms/decode':>10} {'peak KiB':>9}")
+    for label, payload, keys in cases:
+        for name, decode in _decoders(keys):
+            elapsed_ms, peak = _measure(decode, payload, args.repeat)
+            print(
+                f"{label:<18} {name:<18} {len(payload) / 1024:>9.1f} "
+                f"{elapsed_ms:>10.3f} {peak / 1024:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,31 @@
 #!/usr/bin/env python3
 """Main entry point for the Fuse Home Backend MCP Server."""
 
+from src.common.profiling import (
+    LoopLagMonitor,
+    ProfilerBusy,
+    allocation_diff,
+    check_admin_token,
+    cprofile_profile,
+    sample_profile,
+)
+from src.common.readiness import ReadinessMonitor
 from src.servers import epic_server, pubmed_server
+from src.servers.epic_server import close_sessions, probe_access_token, receive_notification
+from src.servers.pubmed_server import probe_eutils
+from src.servers.result_pager import ResultGovernor
+from src.servers.upstream import UPSTREAM_METRICS
+from starlette.requests import Request
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 from fastmcp.client.sampling import SamplingMessage, SamplingParams, RequestContext
 from fastmcp.server.elicitation import AcceptedElicitation
 from dataclasses import dataclass
 from dotenv import load_dotenv
 from fastmcp.server.context import Context
 from fastmcp import FastMCP
+from fastmcp.tools.tool import ToolResult
 import google.generativeai as genai
 from typing import Dict, Any, Literal, List
 import logging
@@ -31,6 +49,48 @@ logger = logging.getLogger(__name__)
 # Main Composition Server - Combines all servers
 main_server = FastMCP("FuseHomeBackend")
 
+# Upstream probes behind /ready, refreshed every READY_PROBE_INTERVAL_SECONDS.
+# The Epic probe also renews the OAuth token ahead of expiry.
+READINESS = ReadinessMonitor(
+    {"epic": probe_access_token, "ncbi": probe_eutils},
+    interval=float(os.getenv("READY_PROBE_INTERVAL_SECONDS", "30")),
+    timeout=float(os.getenv("READY_PROBE_TIMEOUT_SECONDS", "5")),
+)
+
+# Results over TOOL_RESULT_TOKEN_BUDGET (estimated tokens; 0 disables) are paged:
+# the model gets the first part and a handle for fetch_more, so one large search
+# cannot flood its context. Unread parts expire after TOOL_RESULT_TTL_SECONDS.
+RESULT_GOVERNOR = ResultGovernor(
+    int(os.getenv("TOOL_RESULT_TOKEN_BUDGET", "4000")),
+    ttl=float(os.getenv("TOOL_RESULT_TTL_SECONDS", "600")),
+    max_handles=int(os.getenv("TOOL_RESULT_MAX_HANDLES", "256")),
+)
+main_server.add_middleware(RESULT_GOVERNOR)
+
+# Admin-only profiling routes require X-Admin-Token to match ADMIN_TOKEN.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+LOOP_MONITOR = LoopLagMonitor(threshold=float(os.getenv("LOOP_LAG_THRESHOLD_MS", "250")) / 1000)
+
+
+class StartBackgroundMonitors:
+    """Starts the readiness and loop-lag monitors on the server's event loop at startup."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            READINESS.start()
+            LOOP_MONITOR.start()
+        await self.app(scope, receive, send)
+
+
+# (tool prefix, name, description) of each imported component server.
+COMPONENT_SERVERS = (
+    ("pubmed", "PubMedServer", "Access to PubMed articles and data"),
+    ("epic", "EpicServer", "Epic FHIR access for clinical workflows"),
+)
+
 
 async def setup_server():
     """Setup the main server by importing all component servers."""
@@ -43,53 +103,180 @@ async def setup_server():
     logger.info(
         "Server composition complete with medical research and clinical capabilities")
 
+    # Acquire the Epic token and check NCBI before the first request arrives.
+    await READINESS.warm_up({})
+    logger.info("Readiness after warm-up: %s",
+                "ready" if READINESS.snapshot()["ready"] else "not ready")
+    # Tenant connection pools are bound to this loop; the server reopens them on its own.
+    await close_sessions()
+
 
 @main_server.tool
 async def server_overview(context: Context) -> Dict[str, Any]:
     """Get an overview of all available servers and their capabilities."""
     await context.info("Generating server overview")
 
+    tools = sorted(await main_server.get_tools())
+    prompts = sorted(await main_server.get_prompts())
+    resources = sorted(await main_server.get_resources())
+    component_servers = {}
+    for prefix, name, description in COMPONENT_SERVERS:
+        component_servers[prefix] = {
+            "name": name,
+            "description": description,
+            **{
+                kind: [item for item in items if item.startswith(f"{prefix}_")]
+                for kind, items in (
+                    ("tools", tools),
+                    ("prompts", prompts),
+                    ("resources", resources),
+                )
+            },
+        }
+    prefixes = tuple(f"{prefix}_" for prefix, _, _ in COMPONENT_SERVERS)
+
     return {
         "main_server": "FuseHomeBackend",
         "description": "Multi-MCP server with Google Gen AI integration",
-        "component_servers": {
-            "pubmed": {
-                "name": "PubMedServer",
-                "description": "Access to PubMed articles and data",
-                "tools": [
-                    "pubmed_search_abstracts",
-                    "pubmed_get_article_details",
-                    "pubmed_search_by_author",
-                    "pubmed_search_recent_articles",
-                    "pubmed_get_pubmed_capabilities",
-                ],
-                "prompts": ["pubmed_pubmed_research_prompt"],
-                "resources": [],
-            },
-            "epic": {
-                "name": "EpicServer",
-                "description": "Epic FHIR access for clinical workflows",
-                "tools": [
-                    "epic_get_patient_summary",
-                    "epic_search_patients",
-                    "epic_get_patient_appointments",
-                    "epic_get_patient_medications",
-                    "epic_get_epic_capabilities",
-                ],
-                "prompts": ["epic_epic_clinical_assistant_prompt"],
-                "resources": [],
-            },
-        },
+        "component_servers": component_servers,
+        "main_tools": [tool for tool in tools if not tool.startswith(prefixes)],
         "integration": {
             "gemini_ready": bool(os.getenv("GEMINI_API_KEY") and
                                  os.getenv("GEMINI_API_KEY") != "your-gemini-api-key-here"),
-            "total_tools": 10,
-            "total_resources": 0,
-            "total_prompts": 2
+            "total_tools": len(tools),
+            "total_resources": len(resources),
+            "total_prompts": len(prompts)
         }
     }
 
 
+@main_server.tool
+async def fetch_more(handle: str) -> ToolResult | str:
+    """Return the next part of a tool result that was truncated for size.
+
+    Pass the handle quoted in the "[Result truncated ...]" notice; each call
+    returns the following part until the result is exhausted.
+    """
+    return RESULT_GOVERNOR.fetch_more(handle)
+
+
+@main_server.custom_route("/analytics/upstream", methods=["GET"])
+async def upstream_analytics(request: Request) -> JSONResponse:
+    """Upstream request metrics for the chat API's /analytics endpoints.
+
+    ``?series=<kind or metric>&resolution=minute&points=60`` returns one series;
+    otherwise a summary over ``?window_minutes=60``.
+    """
+    query = request.query_params
+    try:
+        if "series" in query:
+            return JSONResponse({
+                "metric": query["series"],
+                "resolution": query.get("resolution", "minute"),
+                "points": UPSTREAM_METRICS.series(
+                    query["series"],
+                    query.get("resolution", "minute"),
+                    int(query.get("points", 60)),
+                ),
+            })
+        return JSONResponse(UPSTREAM_METRICS.summary(int(query.get("window_minutes", 60))))
+    except (KeyError, ValueError) as exc:
+        return JSONResponse({"error": f"Invalid analytics query: {exc}"}, status_code=400)
+
+
+@main_server.custom_route("/ready", methods=["GET"])
+async def ready(request: Request) -> JSONResponse:
+    """Cached Epic token and NCBI probe results; 503 until all of them pass."""
+    snapshot = READINESS.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
+@main_server.custom_route("/analytics/tool-results", methods=["GET"])
+async def tool_result_analytics(request: Request) -> JSONResponse:
+    """Result governor counters: truncations, deferred tokens and fetch_more calls."""
+    return JSONResponse(RESULT_GOVERNOR.snapshot())
+
+
+@main_server.custom_route("/fhir/notify/{tenant}", methods=["POST"])
+@main_server.custom_route(
+    "/fhir/notify/{tenant}/{resource_type}/{resource_id}", methods=["PUT", "POST", "DELETE"]
+)
+async def fhir_notification(request: Request) -> JSONResponse:
+    """Receiver for the Epic FHIR Subscriptions registered per tenant (rest-hook)."""
+    status, payload = await receive_notification(
+        request.path_params["tenant"],
+        request.method,
+        request.path_params.get("resource_type"),
+        request.path_params.get("resource_id"),
+        await request.body(),
+        request.headers.get("authorization"),
+    )
+    return JSONResponse(payload, status_code=status)
+
+
+def _admin_denied(request: Request) -> JSONResponse | None:
+    if not ADMIN_TOKEN:
+        return JSONResponse({"error": "Admin endpoints are disabled."}, status_code=404)
+    if not check_admin_token(request.headers.get("x-admin-token"), ADMIN_TOKEN):
+        return JSONResponse({"error": "Invalid admin token."}, status_code=403)
+    return None
+
+
+def _seconds(request: Request) -> float:
+    seconds = float(request.query_params.get("seconds", 10))
+    if not 0 < seconds <= 60:
+        raise ValueError("seconds must be between 0 and 60")
+    return seconds
+
+
+@main_server.custom_route("/admin/profile", methods=["GET"])
+async def admin_profile(request: Request) -> JSONResponse | PlainTextResponse:
+    """Profile the server's event loop: ``?mode=sample|cprofile&seconds=10``.
+
+    ``sample`` returns flame-graph collapsed stacks (``&output=collapsed`` for
+    plain text); ``cprofile`` returns the top functions by self time.
+    """
+    if denied := _admin_denied(request):
+        return denied
+    query = request.query_params
+    try:
+        seconds = _seconds(request)
+        if query.get("mode", "sample") == "cprofile":
+            return JSONResponse(await cprofile_profile(seconds))
+        result = await sample_profile(seconds)
+    except ValueError as exc:
+        return JSONResponse({"error": f"Invalid profile query: {exc}"}, status_code=400)
+    except ProfilerBusy as exc:
+        return JSONResponse({"error": str(exc)}, status_code=409)
+    if query.get("output") == "collapsed":
+        return PlainTextResponse(result["collapsed"] + "\n")
+    return JSONResponse(result)
+
+
+@main_server.custom_route("/admin/memory", methods=["GET"])
+async def admin_memory(request: Request) -> JSONResponse:
+    """Allocation sites with the largest net growth: ``?seconds=10&top=25``."""
+    if denied := _admin_denied(request):
+        return denied
+    try:
+        seconds = _seconds(request)
+        top = int(request.query_params.get("top", 25))
+    except ValueError as exc:
+        return JSONResponse({"error": f"Invalid memory query: {exc}"}, status_code=400)
+    try:
+        return JSONResponse(await allocation_diff(seconds, max(1, min(top, 200))))
+    except ProfilerBusy as exc:
+        return JSONResponse({"error": str(exc)}, status_code=409)
+
+
+@main_server.custom_route("/admin/loop", methods=["GET"])
+async def admin_loop(request: Request) -> JSONResponse:
+    """Event-loop lag statistics and the stacks of recent stalls."""
+    if denied := _admin_denied(request):
+        return denied
+    return JSONResponse(LOOP_MONITOR.snapshot())
+
+
 def start_server():
     async def setup_and_serve():
         await setup_server()
@@ -101,7 +288,8 @@ def start_server():
         logger.info(f"Starting Fuse Home Backend server on {host}:{port}")
         logger.info("Available endpoints:")
         logger.info(f"  - MCP: http://{host}:{port}/mcp")
-        logger.info(f"  - Health: http://{host}:{port}/health")
+        logger.info(f"  - Ready: http://{host}:{port}/ready")
+        logger.info(f"  - FHIR notifications: http://{host}:{port}/fhir/notify/<tenant>")
 
     # Run the setup
     asyncio.run(setup_and_serve())
@@ -111,7 +299,12 @@ def start_server():
     host = os.getenv("DEFAULT_HOST", "localhost")
 
     # Run with HTTP transport for remote access
-    main_server.run(transport="http", port=port, host=host)
+    main_server.run(
+        transport="http",
+        port=port,
+        host=host,
+        middleware=[Middleware(StartBackgroundMonitors)],
+    )
 
 
 
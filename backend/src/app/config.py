@@ -6,10 +6,11 @@ import os
 import sys
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
 from fastmcp import Client
+from fastmcp.client.transports import infer_transport
 from google import genai
 
 load_dotenv()
@@ -27,9 +28,101 @@ if SRC_DIR.exists():
 
 GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
 MCP_SERVER_URL: str = os.getenv("MCP_SERVER_URL", "http://localhost:8000/mcp")
+# Selects the Epic organization (see EPIC_TENANTS on the MCP server) for tool calls.
+MCP_TENANT_HEADER = "X-Fuse-Tenant"
 DEFAULT_HOST: str = os.getenv("DEFAULT_HOST", "0.0.0.0")
 DEFAULT_PORT: int = int(os.getenv("DEFAULT_PORT", "8001"))
 
+# Per-route request budgets in seconds; clients may ask for less (or more, up to
+# the maximum) with the X-Request-Timeout header.
+CHAT_DEADLINE_SECONDS: float = float(os.getenv("CHAT_DEADLINE_SECONDS", "30"))
+EXECUTE_DEADLINE_SECONDS: float = float(os.getenv("EXECUTE_DEADLINE_SECONDS", "120"))
+MAX_REQUEST_DEADLINE_SECONDS: float = float(os.getenv("MAX_REQUEST_DEADLINE_SECONDS", "300"))
+
+# Admission control for /chat, /execute (including job submission) and /batch.
+MAX_IN_FLIGHT_REQUESTS: int = int(os.getenv("MAX_IN_FLIGHT_REQUESTS", "32"))
+PER_CLIENT_IN_FLIGHT: int = int(os.getenv("PER_CLIENT_IN_FLIGHT", "4"))
+MAX_CLIENT_QUEUE: int = int(os.getenv("MAX_CLIENT_QUEUE", "8"))
+MAX_QUEUE_WAIT_SECONDS: float = float(os.getenv("MAX_QUEUE_WAIT_SECONDS", "5"))
+# Client identity for admission control: X-API-Key values that name a client (other
+# keys are ignored), and proxies (IPs or CIDRs) whose X-Forwarded-For is believed.
+# Everyone else is keyed by the connecting address.
+API_KEYS: List[str] = [key.strip() for key in os.getenv("API_KEYS", "").split(",") if key.strip()]
+TRUSTED_PROXIES: List[str] = [
+    proxy.strip() for proxy in os.getenv("TRUSTED_PROXIES", "").split(",") if proxy.strip()
+]
+# WebSocket chat (/ws/chat): conversations kept per connection, turns running at
+# once per connection, server frames buffered before turns wait on the client,
+# and messages of history kept per conversation (oldest dropped first).
+WS_MAX_CONVERSATIONS: int = int(os.getenv("WS_MAX_CONVERSATIONS", "16"))
+WS_MAX_CONCURRENT_TURNS: int = int(os.getenv("WS_MAX_CONCURRENT_TURNS", "4"))
+WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+WS_MAX_HISTORY_MESSAGES: int = int(os.getenv("WS_MAX_HISTORY_MESSAGES", "40"))
+# Background execution of /execute plans (?mode=async or Prefer: respond-async).
+JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE: int = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_STORE_MAX: int = int(os.getenv("JOB_STORE_MAX", "1000"))
+JOB_RESULT_TTL_SECONDS: float = float(os.getenv("JOB_RESULT_TTL_SECONDS", "900"))
+JOB_DEADLINE_SECONDS: float = float(os.getenv("JOB_DEADLINE_SECONDS", "600"))
+# Bulk /batch runs: items processed at once across all batches (bounds Gemini
+# quota and MCP pool use), items per batch, and each item's deadline. Gemini
+# batch-prediction jobs are polled every BATCH_POLL_SECONDS for at most
+# BATCH_MAX_WAIT_SECONDS.
+BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_ITEM_DEADLINE_SECONDS: float = float(os.getenv("BATCH_ITEM_DEADLINE_SECONDS", "300"))
+BATCH_POLL_SECONDS: float = float(os.getenv("BATCH_POLL_SECONDS", "30"))
+BATCH_MAX_WAIT_SECONDS: float = float(os.getenv("BATCH_MAX_WAIT_SECONDS", "86400"))
+# Opt-in cache for /chat planning responses; requests that look like they carry
+# PHI are never cached.
+PLAN_CACHE_ENABLED: bool = os.getenv("PLAN_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+PLAN_CACHE_MAX_ENTRIES: int = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "512"))
+PLAN_CACHE_TTL_SECONDS: float = float(os.getenv("PLAN_CACHE_TTL_SECONDS", "600"))
+PLAN_CACHE_TOOLS_TTL_SECONDS: float = float(os.getenv("PLAN_CACHE_TOOLS_TTL_SECONDS", "60"))
+# Opt-in speculative tool calls issued while /chat waits on Gemini, so the approved
+# plan finds the Epic/PubMed responses already cached by the MCP servers.
+PREFETCH_ENABLED: bool = os.getenv("PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes")
+PREFETCH_MAX_CALLS: int = int(os.getenv("PREFETCH_MAX_CALLS", "6"))
+PREFETCH_TIMEOUT_SECONDS: float = float(os.getenv("PREFETCH_TIMEOUT_SECONDS", "15"))
+PREFETCH_TTL_SECONDS: float = float(os.getenv("PREFETCH_TTL_SECONDS", "600"))
+# In-process tool/Gemini metrics: minute and hour rollups kept per metric.
+ANALYTICS_MINUTE_BUCKETS: int = int(os.getenv("ANALYTICS_MINUTE_BUCKETS", "180"))
+ANALYTICS_HOUR_BUCKETS: int = int(os.getenv("ANALYTICS_HOUR_BUCKETS", "168"))
+ANALYTICS_MAX_SERIES: int = int(os.getenv("ANALYTICS_MAX_SERIES", "500"))
+# Upstream request metrics recorded by the MCP server process.
+MCP_ANALYTICS_URL: str = os.getenv(
+    "MCP_ANALYTICS_URL", MCP_SERVER_URL.rstrip("/").removesuffix("/mcp") + "/analytics/upstream"
+)
+# Gemini declarations built from the MCP tool list and reused by /execute.
+TOOL_DECLARATIONS_TTL_SECONDS: float = float(os.getenv("TOOL_DECLARATIONS_TTL_SECONDS", "300"))
+# Background readiness probes behind /ready. READY_REQUIRED_CHECKS lists the
+# probes (mcp, gemini, epic, ncbi) that must pass; the rest are informational.
+READY_PROBE_INTERVAL_SECONDS: float = float(os.getenv("READY_PROBE_INTERVAL_SECONDS", "15"))
+READY_PROBE_TIMEOUT_SECONDS: float = float(os.getenv("READY_PROBE_TIMEOUT_SECONDS", "5"))
+READY_REQUIRED_CHECKS: List[str] = [
+    name.strip()
+    for name in os.getenv("READY_REQUIRED_CHECKS", "mcp,gemini,epic,ncbi").split(",")
+    if name.strip()
+]
+# Epic token and NCBI probe results served by the MCP server process.
+MCP_READY_URL: str = os.getenv(
+    "MCP_READY_URL", MCP_SERVER_URL.rstrip("/").removesuffix("/mcp") + "/ready"
+)
+# Record/replay of Gemini turns (this process) and Epic/NCBI exchanges (MCP server)
+# as scrubbed cassettes in CASSETTE_DIR: off, record or replay. Replay sleeps the
+# recorded latency times CASSETTE_LATENCY_SCALE (0 replays without delays).
+CASSETTE_MODE: str = os.getenv("CASSETTE_MODE", "off").lower()
+CASSETTE_DIR: str = os.getenv("CASSETTE_DIR", "data/cassettes")
+CASSETTE_LATENCY_SCALE: float = float(os.getenv("CASSETTE_LATENCY_SCALE", "1.0"))
+# Shared secret for the /admin profiling endpoints (X-Admin-Token header); they are
+# disabled when unset. Event-loop stalls longer than LOOP_LAG_THRESHOLD_MS are logged
+# with the blocking stack.
+ADMIN_TOKEN: Optional[str] = os.getenv("ADMIN_TOKEN")
+LOOP_LAG_THRESHOLD_MS: float = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "250"))
+CORS_ALLOW_ORIGINS: List[str] = [
+    origin.strip() for origin in os.getenv("CORS_ALLOW_ORIGINS", "*").split(",") if origin.strip()
+]
+
 
 @lru_cache(maxsize=1)
 def get_gemini_client() -> genai.Client:
@@ -38,5 +131,15 @@ def get_gemini_client() -> genai.Client:
     return genai.Client(api_key=GEMINI_API_KEY)
 
 
-def new_mcp_client() -> Client:
-    return Client(MCP_SERVER_URL)
+def new_mcp_client(
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    tenant: Optional[str] = None,
+) -> Client:
+    if tenant:
+        headers = {**(headers or {}), MCP_TENANT_HEADER: tenant}
+    if not headers:
+        return Client(MCP_SERVER_URL, timeout=timeout)
+    transport = infer_transport(MCP_SERVER_URL)
+    transport.headers = {**transport.headers, **headers}
+    return Client(transport, timeout=timeout)
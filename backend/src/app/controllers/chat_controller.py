@@ -1,38 +1,114 @@
 """Controller logic for chat interactions."""
 from __future__ import annotations
 
-from typing import Any, List
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 from fastapi import HTTPException
 from google import genai
 
 from ..config import get_gemini_client, new_mcp_client
 from ..models.chat import ChatRequest, ChatResponse, Message
+from ..services.analytics import get_analytics
+from ..services.deadline import Deadline
 from ..services.error_handling import translate_gemini_error
+from ..services.mcp_service import get_tool_declarations
+from ..services.plan_cache import get_plan_cache
+from ..services.prefetch import get_prefetcher
+from ..services.recorder import TokenCallback, send_recorded
+
+GEMINI_MODEL = "gemini-2.5-flash"
+SYSTEM_INSTRUCTION = "I say high, you say low"
+TEMPERATURE = 0.3
+
+# Same bound as the SDK's automatic function calling default.
+MAX_TOOL_CALLS = 10
+STEP_PREVIEW_CHARS = 2000
+
+StepCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+async def _send_message(
+    chat: Any, message: Any, phase: str, on_token: Optional[TokenCallback] = None
+) -> Any:
+    """Send one chat turn to Gemini, recording it as ``gemini:<phase>``."""
+    started = time.perf_counter()
+    try:
+        response = await send_recorded(chat, message, phase, on_token)
+    except Exception:
+        get_analytics().record(f"gemini:{phase}", time.perf_counter() - started, ok=False)
+        raise
+    get_analytics().record(f"gemini:{phase}", time.perf_counter() - started)
+    return response
 
 
 async def _send_history(chat: Any, history: List[Message]) -> None:
     for entry in history:
-        await chat.send_message(entry.content)
+        await _send_message(chat, entry.content, "history")
+
+
+def _mcp_client_for(deadline: Optional[Deadline], tenant: Optional[str] = None) -> Any:
+    if deadline is None:
+        return new_mcp_client(tenant=tenant)
+    return new_mcp_client(
+        headers=deadline.mcp_headers(), timeout=deadline.remaining(), tenant=tenant
+    )
 
 
-async def get_plan(request: ChatRequest) -> ChatResponse:
-    """Generate a plan for the incoming chat message."""
+def _http_options(deadline: Optional[Deadline]) -> Optional[genai.types.HttpOptions]:
+    if deadline is None:
+        return None
+    return genai.types.HttpOptions(timeout=deadline.gemini_timeout_ms())
+
+
+async def get_plan(request: ChatRequest, deadline: Optional[Deadline] = None) -> ChatResponse:
+    """Generate a plan for the incoming chat message, reusing a cached plan when allowed."""
+    # Warm likely tool results in the background while the plan is produced.
+    get_prefetcher().start(request.message, request.tenant)
+    cache = get_plan_cache()
+    key = None
+    if cache.enabled:
+        try:
+            key = await cache.key_for(
+                request,
+                {
+                    "model": GEMINI_MODEL,
+                    "system_instruction": SYSTEM_INSTRUCTION,
+                    "temperature": TEMPERATURE,
+                },
+            )
+        except Exception:  # noqa: BLE001 - the cache must never fail a request
+            key = None
+        if key:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+    response = await _generate_plan(request, deadline)
+    if key:
+        cache.put(key, response)
+    return response
+
+
+async def _generate_plan(request: ChatRequest, deadline: Optional[Deadline]) -> ChatResponse:
     gemini_client = get_gemini_client()
 
     try:
-        async with new_mcp_client() as mcp_client:
+        async with _mcp_client_for(deadline, request.tenant) as mcp_client:
             chat = gemini_client.aio.chats.create(
-                model="gemini-2.5-flash",
+                model=GEMINI_MODEL,
                 config=genai.types.GenerateContentConfig(
-                    system_instruction="I say high, you say low",
-                    temperature=0.3,
+                    system_instruction=SYSTEM_INSTRUCTION,
+                    temperature=TEMPERATURE,
                     tools=[mcp_client.session],
+                    http_options=_http_options(deadline),
                 ),
             )
 
             await _send_history(chat, request.history or [])
-            response = await chat.send_message(request.message)
+            response = await _send_message(chat, request.message, "plan")
 
             if response.candidates and response.candidates[0].content.parts:
                 plan_lines: List[str] = ["Here's my plan:"]
@@ -63,26 +139,175 @@ async def get_plan(request: ChatRequest) -> ChatResponse:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-async def execute_plan(request: ChatRequest) -> ChatResponse:
-    """Execute an approved plan by allowing automatic function calling."""
+def _result_text(result: Any) -> str:
+    return "\n".join(
+        getattr(block, "text", "") for block in result.content if getattr(block, "text", None)
+    )
+
+
+class SharedToolCalls:
+    """Tool results shared by the requests of one batch.
+
+    Identical calls (same tool, same arguments, same Epic organization) made
+    by different requests run once; later callers await the first call's
+    result. Failed calls are not kept, so the next caller retries. Paged
+    results are not shared either: their continuation handle belongs to the
+    caller that got it, so ``fetch_more`` is never shared and every other
+    caller repeats the call to get a handle of its own.
+    """
+
+    UNSHARED = frozenset({"fetch_more"})
+    # Notice the MCP server's result governor appends to the first page of a result.
+    PAGED_NOTICE = "[Result truncated:"
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, asyncio.Future[Any]] = {}
+        self.calls = 0
+        self.hits = 0
+
+    async def call(
+        self,
+        mcp_client: Any,
+        name: str,
+        arguments: Dict[str, Any],
+        tenant: Optional[str] = None,
+    ) -> Any:
+        if name in self.UNSHARED:
+            return await mcp_client.call_tool_mcp(name, arguments)
+        key = json.dumps([tenant, name, arguments], sort_keys=True, default=str)
+        call = self._calls.get(key)
+        owner = call is None
+        if call is None:
+            self.calls += 1
+            call = asyncio.ensure_future(mcp_client.call_tool_mcp(name, arguments))
+            self._calls[key] = call
+        else:
+            self.hits += 1
+        try:
+            # Shielded so one request's deadline does not cancel the call for the others.
+            result = await asyncio.shield(call)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._forget(key, call)
+            if owner:
+                raise
+            # The call ran on another request's MCP client, which may have closed.
+            return await mcp_client.call_tool_mcp(name, arguments)
+        if result.isError or self._paged(result):
+            self._forget(key, call)
+            if not owner and not result.isError:
+                return await mcp_client.call_tool_mcp(name, arguments)
+        return result
+
+    @classmethod
+    def _paged(cls, result: Any) -> bool:
+        return any(
+            getattr(block, "text", "").startswith(cls.PAGED_NOTICE) for block in result.content
+        )
+
+    def _forget(self, key: str, call: asyncio.Future[Any]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+async def _run_tool_loop(
+    chat: Any,
+    mcp_client: Any,
+    message: str,
+    on_step: Optional[StepCallback],
+    on_token: Optional[TokenCallback] = None,
+    shared_calls: Optional[SharedToolCalls] = None,
+    tenant: Optional[str] = None,
+) -> Any:
+    """Drive Gemini's function calls against MCP, reporting each tool step.
+
+    Equivalent to the SDK's automatic function calling, but every call passes
+    through here so callers can observe progress step by step (and, with
+    ``on_token``, the model's text as it is generated). With ``shared_calls``,
+    identical tool calls already made by another request are reused.
+    """
+    response = await _send_message(chat, message, "execute", on_token)
+    for index in range(MAX_TOOL_CALLS):
+        function_calls = response.function_calls
+        if not function_calls:
+            break
+
+        parts = []
+        for function_call in function_calls:
+            arguments = dict(function_call.args or {})
+            get_prefetcher().record_execution(function_call.name, arguments, tenant)
+            started = time.perf_counter()
+            try:
+                if shared_calls is None:
+                    result = await mcp_client.call_tool_mcp(function_call.name, arguments)
+                else:
+                    result = await shared_calls.call(
+                        mcp_client, function_call.name, arguments, tenant
+                    )
+            except Exception as exc:  # noqa: BLE001 - surfaced to the model like AFC does
+                payload: Dict[str, Any] = {"error": str(exc)}
+                status, preview = "error", str(exc)
+            else:
+                dumped = result.model_dump(mode="json", exclude_none=True)
+                payload = {"error": dumped} if result.isError else {"result": dumped}
+                status = "error" if result.isError else "ok"
+                preview = _result_text(result)
+            elapsed = time.perf_counter() - started
+            get_analytics().record(f"tool:{function_call.name}", elapsed, ok=status == "ok")
+            if on_step:
+                await on_step(
+                    {
+                        "index": index,
+                        "tool": function_call.name,
+                        "arguments": arguments,
+                        "status": status,
+                        "duration_ms": round(elapsed * 1000, 1),
+                        "result": preview[:STEP_PREVIEW_CHARS],
+                    }
+                )
+            parts.append(
+                genai.types.Part.from_function_response(name=function_call.name, response=payload)
+            )
+        response = await _send_message(chat, parts, "execute", on_token)
+    return response
+
+
+async def execute_plan(
+    request: ChatRequest,
+    deadline: Optional[Deadline] = None,
+    on_step: Optional[StepCallback] = None,
+    on_token: Optional[TokenCallback] = None,
+    shared_calls: Optional[SharedToolCalls] = None,
+) -> ChatResponse:
+    """Execute an approved plan, running the model's tool calls against MCP."""
     gemini_client = get_gemini_client()
 
     try:
-        async with new_mcp_client() as mcp_client:
+        async with _mcp_client_for(deadline, request.tenant) as mcp_client:
             chat = gemini_client.aio.chats.create(
-                model="gemini-2.5-flash",
+                model=GEMINI_MODEL,
                 config=genai.types.GenerateContentConfig(
-                    system_instruction="I say high, you say low",
-                    temperature=0.3,
-                    tools=[mcp_client.session],
+                    system_instruction=SYSTEM_INSTRUCTION,
+                    temperature=TEMPERATURE,
+                    tools=await get_tool_declarations().get(mcp_client),
+                    http_options=_http_options(deadline),
                     automatic_function_calling=genai.types.AutomaticFunctionCallingConfig(
-                        disable=False
+                        disable=True
                     ),
                 ),
             )
 
             await _send_history(chat, request.history or [])
-            response = await chat.send_message(request.message)
+            response = await _run_tool_loop(
+                chat,
+                mcp_client,
+                request.message,
+                on_step,
+                on_token,
+                shared_calls,
+                request.tenant,
+            )
 
             return ChatResponse(
                 response=response.text if response.text else "No response generated",
@@ -1,22 +1,84 @@
 """FastAPI application wiring the MVC components together."""
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from .config import (
+    CORS_ALLOW_ORIGINS,
+    MAX_CLIENT_QUEUE,
+    MAX_IN_FLIGHT_REQUESTS,
+    MAX_QUEUE_WAIT_SECONDS,
+    PER_CLIENT_IN_FLIGHT,
+)
+from .middleware.load_shedding import FairLimiter, LoadSheddingMiddleware
+from .services.diagnostics import get_loop_monitor
+from .services.jobs import get_job_runner
+from .services.readiness import get_readiness, warm_up
+from .views import (
+    admin_routes,
+    analytics_routes,
+    batch_routes,
+    chat_routes,
+    health_routes,
+    job_routes,
+    socket_routes,
+)
+
+try:
+    import orjson  # noqa: F401
+
+    DefaultResponse: type[JSONResponse] = ORJSONResponse
+except ImportError:  # pragma: no cover - optional dependency
+    DefaultResponse = JSONResponse
 
-from .views import chat_routes, health_routes
 
-app = FastAPI(title="Gemini Agent API")
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    get_loop_monitor().start()
+    await warm_up()
+    yield
+    await get_loop_monitor().stop()
+    await get_readiness().stop()
+    await get_job_runner().shutdown()
 
+
+app = FastAPI(
+    title="Gemini Agent API", default_response_class=DefaultResponse, lifespan=lifespan
+)
+
+app.state.load_limiter = FairLimiter(
+    max_in_flight=MAX_IN_FLIGHT_REQUESTS,
+    per_client_limit=PER_CLIENT_IN_FLIGHT,
+    max_queue_wait=MAX_QUEUE_WAIT_SECONDS,
+    max_client_queue=MAX_CLIENT_QUEUE,
+)
+app.add_middleware(
+    LoadSheddingMiddleware,
+    limiter=app.state.load_limiter,
+    # Jobs are submitted through /execute; polling /jobs/{id} and its event
+    # stream stay outside the limiter so watching a job never costs a slot.
+    paths=("/chat", "/execute", "/batch"),
+)
+# Added last so it wraps the shedder and 503 responses still carry CORS headers.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ALLOW_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+app.include_router(admin_routes.router)
+app.include_router(analytics_routes.router)
+app.include_router(batch_routes.router)
 app.include_router(chat_routes.router)
 app.include_router(health_routes.router)
+app.include_router(job_routes.router)
+app.include_router(socket_routes.router)
 
 __all__ = ["app"]
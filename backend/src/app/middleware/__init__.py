@@ -0,0 +1 @@
+"""ASGI middleware protecting the Fuse Home backend under load."""
@@ -0,0 +1,220 @@
+"""Global in-flight cap with per-client fair queueing and load shedding."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import time
+from collections import OrderedDict, deque
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
+from math import ceil
+from typing import Any, Deque, Dict, Iterable, Sequence
+
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..config import API_KEYS, TRUSTED_PROXIES
+
+TRUSTED_PROXY_NETWORKS = [ip_network(proxy, strict=False) for proxy in TRUSTED_PROXIES]
+
+
+class Shed(Exception):
+    """Raised when a request is rejected instead of queued."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class FairLimiter:
+    """Caps concurrent requests globally and per client, serving waiters round-robin.
+
+    Each client has its own FIFO queue; when a slot frees up the next client in
+    rotation that is below its own limit is admitted, so one busy client cannot
+    starve the others. Waiters that exceed ``max_queue_wait`` are shed.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        per_client_limit: int,
+        max_queue_wait: float,
+        max_client_queue: int,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.per_client_limit = per_client_limit
+        self.max_queue_wait = max_queue_wait
+        self.max_client_queue = max_client_queue
+        self.in_flight = 0
+        self._client_in_flight: Dict[str, int] = {}
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future[None]]]" = OrderedDict()
+        self.admitted = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0}
+
+    def _has_capacity(self, client: str) -> bool:
+        return (
+            self.in_flight < self.max_in_flight
+            and self._client_in_flight.get(client, 0) < self.per_client_limit
+        )
+
+    def _grant(self, client: str) -> None:
+        self.in_flight += 1
+        self._client_in_flight[client] = self._client_in_flight.get(client, 0) + 1
+        self.admitted += 1
+
+    async def acquire(self, client: str) -> None:
+        if not self._waiters.get(client) and self._has_capacity(client):
+            self._grant(client)
+            return
+
+        queue = self._waiters.setdefault(client, deque())
+        if len(queue) >= self.max_client_queue:
+            self.shed["queue_full"] += 1
+            raise Shed("queue_full")
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_queue_wait)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the wait expired; keep the slot.
+                return
+            waiter.cancel()
+            self._discard(client, waiter)
+            self.shed["queue_timeout"] += 1
+            raise Shed("queue_timeout") from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(client)
+            else:
+                waiter.cancel()
+                self._discard(client, waiter)
+            raise
+
+    def _discard(self, client: str, waiter: "asyncio.Future[None]") -> None:
+        queue = self._waiters.get(client)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+        if not queue:
+            del self._waiters[client]
+
+    def release(self, client: str) -> None:
+        self.in_flight -= 1
+        remaining = self._client_in_flight.get(client, 1) - 1
+        if remaining:
+            self._client_in_flight[client] = remaining
+        else:
+            self._client_in_flight.pop(client, None)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self.in_flight < self.max_in_flight and self._waiters:
+            for client in list(self._waiters):
+                if self._client_in_flight.get(client, 0) < self.per_client_limit:
+                    break
+            else:
+                return
+            queue = self._waiters.pop(client)
+            waiter = queue.popleft()
+            if queue:
+                # Rotate the client to the back so others are served first.
+                self._waiters[client] = queue
+            if waiter.done():
+                continue
+            self._grant(client)
+            waiter.set_result(None)
+
+    def retry_after(self) -> int:
+        return max(1, ceil(self.max_queue_wait))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "per_client_limit": self.per_client_limit,
+            "queue_depth": sum(len(queue) for queue in self._waiters.values()),
+            "queued_clients": len(self._waiters),
+            "active_clients": len(self._client_in_flight),
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+        }
+
+
+def client_key(
+    scope: Scope,
+    *,
+    api_keys: Sequence[str] = API_KEYS,
+    trusted_proxies: Sequence[IPv4Network | IPv6Network] = TRUSTED_PROXY_NETWORKS,
+) -> str:
+    """Identify the caller by a configured API key, else by network address.
+
+    Callers cannot pick their own bucket: ``X-API-Key`` counts only when it is
+    one of ``api_keys``, and ``X-Forwarded-For`` only when the connection comes
+    from a trusted proxy, in which case the nearest untrusted hop is used.
+    """
+
+    request = HTTPConnection(scope)
+    api_key = request.headers.get("x-api-key", "").encode()
+    if api_key and any(hmac.compare_digest(api_key, key.encode()) for key in api_keys):
+        return "key:" + hashlib.sha256(api_key).hexdigest()[:16]
+    address = request.client.host if request.client else "unknown"
+    if not _trusted(address, trusted_proxies):
+        return "ip:" + address
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",")]
+    for hop in reversed([hop for hop in hops if hop]):
+        address = hop
+        if not _trusted(hop, trusted_proxies):
+            break
+    return "ip:" + address
+
+
+def _trusted(address: str, networks: Sequence[IPv4Network | IPv6Network]) -> bool:
+    try:
+        parsed = ip_address(address)
+    except ValueError:
+        return False
+    return any(parsed in network for network in networks)
+
+
+class LoadSheddingMiddleware:
+    """Admit requests to ``paths`` through a :class:`FairLimiter`, shedding with 503."""
+
+    def __init__(self, app: ASGIApp, limiter: FairLimiter, paths: Iterable[str]) -> None:
+        self.app = app
+        self.limiter = limiter
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        client = client_key(scope)
+        started = time.monotonic()
+        try:
+            await self.limiter.acquire(client)
+        except Shed as exc:
+            response = JSONResponse(
+                {"detail": "Server is busy; please retry shortly.", "reason": exc.reason},
+                status_code=503,
+                headers={"Retry-After": str(self.limiter.retry_after())},
+            )
+            await response(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})["queue_wait_seconds"] = time.monotonic() - started
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(client)
+
@@ -0,0 +1,34 @@
+"""Pydantic models for bulk chat processing."""
+from __future__ import annotations
+
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from .chat import ChatRequest
+
+BatchMode = Literal["execute", "plan", "gemini_batch"]
+
+
+class BatchItem(ChatRequest):
+    id: Optional[str] = Field(
+        default=None,
+        max_length=128,
+        description="Caller's key for the item, echoed on its result line.",
+    )
+
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem] = Field(min_length=1)
+    mode: BatchMode = Field(
+        default="execute",
+        description=(
+            "execute: run each item with MCP tools; plan: plan only; gemini_batch: "
+            "submit all items as one Gemini batch prediction job (no tools)."
+        ),
+    )
+    concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Items run at once for this batch; capped by the server's limit.",
+    )
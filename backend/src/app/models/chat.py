@@ -14,6 +14,11 @@ class Message(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     history: Optional[List[Message]] = Field(default_factory=list)
+    tenant: Optional[str] = Field(
+        default=None,
+        pattern=r"^[A-Za-z0-9_-]{1,64}$",
+        description="Epic organization to query; the MCP server's default when omitted.",
+    )
 
 
 class ChatResponse(BaseModel):
@@ -0,0 +1,37 @@
+"""Pydantic models for asynchronous plan execution jobs."""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from .chat import ChatResponse
+
+JobState = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+
+class JobStep(BaseModel):
+    index: int
+    tool: str
+    arguments: Dict[str, Any] = Field(default_factory=dict)
+    status: Literal["ok", "error"]
+    duration_ms: float
+    result: str = ""
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: JobState
+    status_url: str
+    events_url: str
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: JobState
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    steps: List[JobStep] = Field(default_factory=list)
+    result: Optional[ChatResponse] = None
+    error: Optional[str] = None
@@ -0,0 +1,32 @@
+"""Pydantic models for frames sent by WebSocket chat clients."""
+from __future__ import annotations
+
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from .chat import Message
+
+
+class ClientFrame(BaseModel):
+    """One client frame on ``/ws/chat``.
+
+    ``chat`` sends a new user message (the server keeps the conversation's
+    history), ``execute`` runs the plan the last ``chat`` turn proposed,
+    ``cancel`` stops the conversation's in-flight turn and ``end`` forgets the
+    conversation.
+    """
+
+    type: Literal["chat", "execute", "cancel", "end", "ping"]
+    conversation_id: str = Field(default="default", min_length=1, max_length=128)
+    turn_id: Optional[str] = Field(default=None, max_length=128)
+    message: Optional[str] = None
+    history: Optional[List[Message]] = Field(
+        default=None,
+        description="Seeds the history of a new conversation (e.g. after reconnecting).",
+    )
+    tenant: Optional[str] = Field(
+        default=None,
+        pattern=r"^[A-Za-z0-9_-]{1,64}$",
+        description="Epic organization; fixed by the frame that opens the conversation.",
+    )
@@ -0,0 +1,42 @@
+"""Tool-usage analytics: in-process time series plus upstream metrics from MCP."""
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import httpx
+
+from ...common.timeseries import TimeSeriesStore
+from ..config import (
+    ANALYTICS_HOUR_BUCKETS,
+    ANALYTICS_MAX_SERIES,
+    ANALYTICS_MINUTE_BUCKETS,
+    MCP_ANALYTICS_URL,
+)
+
+logger = logging.getLogger("fuse_home.app.analytics")
+
+UPSTREAM_TIMEOUT_SECONDS = 2.0
+
+
+@lru_cache(maxsize=1)
+def get_analytics() -> TimeSeriesStore:
+    """Metrics for tool calls (``tool:<name>``) and Gemini calls (``gemini:<phase>``)."""
+    return TimeSeriesStore(
+        minute_buckets=ANALYTICS_MINUTE_BUCKETS,
+        hour_buckets=ANALYTICS_HOUR_BUCKETS,
+        max_series=ANALYTICS_MAX_SERIES,
+    )
+
+
+async def fetch_upstream_analytics(params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Query the MCP server's upstream metrics; None when it cannot be reached."""
+    try:
+        async with httpx.AsyncClient(timeout=UPSTREAM_TIMEOUT_SECONDS) as client:
+            response = await client.get(MCP_ANALYTICS_URL, params=params)
+            response.raise_for_status()
+            return response.json()
+    except (httpx.HTTPError, ValueError):
+        logger.debug("Upstream analytics unavailable", exc_info=True)
+        return None
@@ -0,0 +1,283 @@
+"""Bulk chat processing: many requests per call, streamed back as NDJSON lines."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException
+from google import genai
+
+from ..config import (
+    BATCH_CONCURRENCY,
+    BATCH_ITEM_DEADLINE_SECONDS,
+    BATCH_MAX_WAIT_SECONDS,
+    BATCH_POLL_SECONDS,
+    get_gemini_client,
+)
+from ..controllers import chat_controller
+from ..models.batch import BatchItem, BatchRequest
+from .analytics import get_analytics
+from .deadline import Deadline
+from .error_handling import translate_gemini_error
+
+logger = logging.getLogger("fuse_home.app.batch")
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+class BatchRunner:
+    """Runs batches of chat requests with bounded concurrency.
+
+    At most ``concurrency`` items run at once across every batch in the
+    process, so bulk work stays within Gemini quota and the MCP connection pool
+    however many batches are submitted; a batch may ask for fewer. Items of one
+    batch share their tool results (see ``SharedToolCalls``), so a hundred
+    digests that search the same literature call PubMed once.
+
+    Results are yielded as they finish, one dict per item, followed by a
+    ``summary``. In ``gemini_batch`` mode all items go to Gemini as a single
+    batch prediction job instead: cheaper and quota-friendly, but without MCP
+    tools, and results arrive only when the whole job ends.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        item_deadline: float,
+        poll_interval: float = 30.0,
+        max_wait: float = 86400.0,
+    ) -> None:
+        self.concurrency = concurrency
+        self.item_deadline = item_deadline
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self._slots = asyncio.Semaphore(concurrency)
+        self._running = 0
+        self.stats: Dict[str, int] = {
+            "batches": 0,
+            "active_batches": 0,
+            "items": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "tool_calls": 0,
+            "shared_tool_hits": 0,
+            "gemini_batch_jobs": 0,
+        }
+
+    async def run(self, request: BatchRequest) -> AsyncIterator[Dict[str, Any]]:
+        started = time.perf_counter()
+        self.stats["batches"] += 1
+        self.stats["active_batches"] += 1
+        counts = {"succeeded": 0, "failed": 0}
+        shared = chat_controller.SharedToolCalls()
+        summary: Dict[str, Any] = {"event": "summary", "mode": request.mode}
+        try:
+            if request.mode == "gemini_batch":
+                lines = self._run_gemini_batch(request.items, summary)
+            else:
+                lines = self._run_items(request, shared)
+            async for line in lines:
+                if line["event"] == "item":
+                    outcome = "succeeded" if line["ok"] else "failed"
+                    counts[outcome] += 1
+                    self.stats["items"] += 1
+                    self.stats[outcome] += 1
+                yield line
+        finally:
+            self.stats["active_batches"] -= 1
+            self.stats["tool_calls"] += shared.calls
+            self.stats["shared_tool_hits"] += shared.hits
+        summary.update(
+            items=len(request.items),
+            **counts,
+            tool_calls=shared.calls,
+            shared_tool_hits=shared.hits,
+            duration_ms=_elapsed_ms(started),
+        )
+        yield summary
+
+    async def _run_items(
+        self, request: BatchRequest, shared: chat_controller.SharedToolCalls
+    ) -> AsyncIterator[Dict[str, Any]]:
+        limit = asyncio.Semaphore(min(request.concurrency or self.concurrency, self.concurrency))
+        finished: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+
+        async def run_one(index: int, item: BatchItem) -> None:
+            async with limit, self._slots:
+                self._running += 1
+                try:
+                    line = await self._run_item(index, item, request.mode, shared)
+                finally:
+                    self._running -= 1
+                finished.put_nowait(line)
+
+        tasks = [
+            asyncio.create_task(run_one(index, item)) for index, item in enumerate(request.items)
+        ]
+        try:
+            for _ in tasks:
+                yield await finished.get()
+        finally:
+            # The client went away mid-stream: stop the items still queued or running.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_item(
+        self,
+        index: int,
+        item: BatchItem,
+        mode: str,
+        shared: chat_controller.SharedToolCalls,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        line: Dict[str, Any] = {"event": "item", "index": index, "id": item.id}
+        deadline = Deadline.after(self.item_deadline)
+        try:
+            async with asyncio.timeout(deadline.remaining()):
+                if mode == "plan":
+                    response = await chat_controller.get_plan(item, deadline)
+                else:
+                    response = await chat_controller.execute_plan(
+                        item, deadline, shared_calls=shared
+                    )
+        except TimeoutError:
+            line.update(ok=False, status=504, error="Item deadline exceeded.")
+        except HTTPException as exc:
+            line.update(ok=False, status=exc.status_code, error=str(exc.detail))
+        except Exception as exc:  # noqa: BLE001 - one item never fails the batch
+            logger.exception("Batch item %d failed", index)
+            line.update(ok=False, status=500, error=str(exc))
+        else:
+            line.update(ok=True, response=response.response, is_plan=response.is_plan)
+        line["duration_ms"] = _elapsed_ms(started)
+        return line
+
+    async def _run_gemini_batch(
+        self, items: List[BatchItem], summary: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        client = get_gemini_client()
+        config = genai.types.GenerateContentConfig(
+            system_instruction=chat_controller.SYSTEM_INSTRUCTION,
+            temperature=chat_controller.TEMPERATURE,
+        )
+        requests = [
+            genai.types.InlinedRequest(contents=_contents(item), config=config) for item in items
+        ]
+        started = time.perf_counter()
+        job: Optional[genai.types.BatchJob] = None
+        try:
+            job = await client.aio.batches.create(
+                model=chat_controller.GEMINI_MODEL,
+                src=requests,
+                config=genai.types.CreateBatchJobConfig(
+                    display_name=f"fuse-batch-{uuid.uuid4().hex[:12]}"
+                ),
+            )
+            self.stats["gemini_batch_jobs"] += 1
+            summary["gemini_batch_job"] = job.name
+            yield _progress(job)
+            while not job.done:
+                if time.perf_counter() - started > self.max_wait:
+                    raise TimeoutError
+                await asyncio.sleep(self.poll_interval)
+                job = await client.aio.batches.get(name=job.name)
+                # Also keeps the stream alive through proxies while the job runs.
+                yield _progress(job)
+        except Exception as exc:  # noqa: BLE001 - reported on every item line
+            if isinstance(exc, TimeoutError):
+                status, detail = 504, "Gemini batch job did not finish in time."
+            else:
+                translated = translate_gemini_error(exc)
+                status = translated.status_code if translated else 500
+                detail = str(translated.detail) if translated else str(exc)
+            get_analytics().record("gemini:batch", time.perf_counter() - started, ok=False)
+            for index, item in enumerate(items):
+                yield _failed(index, item, status, detail)
+            return
+        finally:
+            if job is not None and not job.done:
+                await _cancel(client, job.name)
+
+        get_analytics().record("gemini:batch", time.perf_counter() - started)
+        summary["gemini_batch_state"] = _state(job)
+        responses = job.dest.inlined_responses if job.dest else None
+        for index, item in enumerate(items):
+            result = responses[index] if responses and index < len(responses) else None
+            if result is None or result.error is not None or result.response is None:
+                detail = getattr(result and result.error, "message", None) or (
+                    job.error.message if job.error else f"Gemini batch job {_state(job)}."
+                )
+                yield _failed(index, item, 502, str(detail))
+            else:
+                text = result.response.text
+                yield {
+                    "event": "item",
+                    "index": index,
+                    "id": item.id,
+                    "ok": True,
+                    "response": text if text else "No response generated",
+                    "is_plan": False,
+                }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "item_deadline_seconds": self.item_deadline,
+            "running_items": self._running,
+            **self.stats,
+        }
+
+
+def _contents(item: BatchItem) -> List[genai.types.Content]:
+    contents = [
+        genai.types.Content(
+            role="model" if entry.role in ("assistant", "model") else "user",
+            parts=[genai.types.Part(text=entry.content)],
+        )
+        for entry in item.history or []
+    ]
+    contents.append(genai.types.Content(role="user", parts=[genai.types.Part(text=item.message)]))
+    return contents
+
+
+def _state(job: genai.types.BatchJob) -> Optional[str]:
+    return job.state.name if job.state else None
+
+
+def _progress(job: genai.types.BatchJob) -> Dict[str, Any]:
+    return {"event": "progress", "gemini_batch_job": job.name, "state": _state(job)}
+
+
+def _failed(index: int, item: BatchItem, status: int, detail: str) -> Dict[str, Any]:
+    return {
+        "event": "item",
+        "index": index,
+        "id": item.id,
+        "ok": False,
+        "status": status,
+        "error": detail,
+    }
+
+
+async def _cancel(client: Any, name: Optional[str]) -> None:
+    try:
+        await asyncio.shield(client.aio.batches.cancel(name=name))
+    except Exception:  # noqa: BLE001 - the job simply runs to completion unread
+        logger.warning("Could not cancel Gemini batch job %s", name)
+
+
+@lru_cache(maxsize=1)
+def get_batch_runner() -> BatchRunner:
+    return BatchRunner(
+        concurrency=BATCH_CONCURRENCY,
+        item_deadline=BATCH_ITEM_DEADLINE_SECONDS,
+        poll_interval=BATCH_POLL_SECONDS,
+        max_wait=BATCH_MAX_WAIT_SECONDS,
+    )
@@ -0,0 +1,265 @@
+"""Multiplexed chat conversations over one WebSocket connection."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from ..config import (
+    CHAT_DEADLINE_SECONDS,
+    EXECUTE_DEADLINE_SECONDS,
+    WS_MAX_CONCURRENT_TURNS,
+    WS_MAX_CONVERSATIONS,
+    WS_MAX_HISTORY_MESSAGES,
+    WS_SEND_QUEUE_SIZE,
+)
+from ..controllers import chat_controller
+from ..middleware.load_shedding import FairLimiter, Shed, client_key
+from ..models.chat import ChatRequest, ChatResponse, Message
+from ..models.socket import ClientFrame
+from .deadline import Deadline
+
+logger = logging.getLogger("fuse_home.app.conversations")
+
+
+@dataclass
+class Conversation:
+    conversation_id: str
+    # Fixed when the conversation is created; its history belongs to this tenant.
+    tenant: Optional[str] = None
+    history: List[Message] = field(default_factory=list)
+    max_history: int = WS_MAX_HISTORY_MESSAGES
+    # Request behind the plan the last chat turn proposed, run by "execute".
+    pending: Optional[ChatRequest] = None
+    task: Optional[asyncio.Task[None]] = None
+
+    def __post_init__(self) -> None:
+        self._trim()
+
+    @property
+    def busy(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def record(self, question: str, answer: str) -> None:
+        """Append a completed exchange; failed or cancelled turns leave no trace."""
+        self.history += [
+            Message(role="user", content=question),
+            Message(role="assistant", content=answer),
+        ]
+        self._trim()
+
+    def _trim(self) -> None:
+        if len(self.history) > self.max_history:
+            del self.history[: len(self.history) - self.max_history]
+
+
+class ChatConnection:
+    """Runs chat and execute turns for several conversations over one WebSocket.
+
+    Client frames are handled as they arrive, so a slow turn in one
+    conversation never holds up another and ``cancel`` reaches a turn while it
+    runs. Each conversation keeps its own history server-side (the last
+    ``WS_MAX_HISTORY_MESSAGES`` messages), so clients send only the new
+    message; a question and its answer are recorded together once the answer
+    arrives. A conversation stays with the tenant it was opened for. Turns are
+    admitted through the same fair limiter as ``/chat`` and ``/execute``.
+
+    Server frames go through a bounded queue drained by a single sender: when
+    the client reads slowly the queue fills and turns pause at their next token
+    or tool event instead of buffering without limit.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        limiter: FairLimiter,
+        *,
+        max_conversations: int = WS_MAX_CONVERSATIONS,
+        max_turns: int = WS_MAX_CONCURRENT_TURNS,
+        send_queue: int = WS_SEND_QUEUE_SIZE,
+    ) -> None:
+        self.websocket = websocket
+        self.limiter = limiter
+        self.client = client_key(websocket.scope)
+        self.max_conversations = max_conversations
+        self.max_turns = max_turns
+        self.conversations: Dict[str, Conversation] = {}
+        self._outbox: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=send_queue)
+
+    async def run(self) -> None:
+        sender = asyncio.create_task(self._send_loop())
+        try:
+            while True:
+                await self._handle(await self.websocket.receive_text())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            tasks = [conv.task for conv in self.conversations.values() if conv.busy]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            sender.cancel()
+
+    async def _send_loop(self) -> None:
+        while True:
+            frame = await self._outbox.get()
+            try:
+                await self.websocket.send_json(frame)
+            except (RuntimeError, WebSocketDisconnect):
+                # The receive loop sees the disconnect and cleans up.
+                return
+
+    async def emit(self, frame: Dict[str, Any]) -> None:
+        await self._outbox.put(frame)
+
+    async def _error(self, detail: str, status: int, frame: Optional[ClientFrame] = None) -> None:
+        error: Dict[str, Any] = {"type": "error", "status": status, "detail": detail}
+        if frame is not None:
+            error.update(conversation_id=frame.conversation_id, turn_id=frame.turn_id)
+        await self.emit(error)
+
+    async def _handle(self, raw: str) -> None:
+        try:
+            frame = ClientFrame.model_validate_json(raw)
+        except ValidationError as exc:
+            await self._error(f"Invalid frame: {exc.errors(include_url=False)}", 422)
+            return
+
+        if frame.type == "ping":
+            await self.emit({"type": "pong"})
+            return
+
+        conversation = self.conversations.get(frame.conversation_id)
+        if frame.type in ("cancel", "end"):
+            if conversation is not None and conversation.busy:
+                conversation.task.cancel()
+            elif frame.type == "cancel":
+                await self._error("No turn is running in this conversation.", 409, frame)
+            if frame.type == "end":
+                self.conversations.pop(frame.conversation_id, None)
+            return
+
+        if conversation is None:
+            if len(self.conversations) >= self.max_conversations:
+                await self._error("Too many open conversations on this connection.", 429, frame)
+                return
+            conversation = Conversation(
+                frame.conversation_id, tenant=frame.tenant, history=list(frame.history or [])
+            )
+            self.conversations[frame.conversation_id] = conversation
+        elif frame.tenant and frame.tenant != conversation.tenant:
+            await self._error(
+                "A conversation cannot change tenant; open a new conversation.", 409, frame
+            )
+            return
+        if conversation.busy:
+            await self._error("A turn is already running in this conversation.", 409, frame)
+            return
+        if sum(conv.busy for conv in self.conversations.values()) >= self.max_turns:
+            await self._error("Too many turns in flight on this connection.", 429, frame)
+            return
+
+        if frame.type == "chat":
+            if not frame.message:
+                await self._error("A chat frame needs a message.", 422, frame)
+                return
+            request = ChatRequest(
+                message=frame.message,
+                history=list(conversation.history),
+                tenant=conversation.tenant,
+            )
+            conversation.pending = None
+        else:
+            if conversation.pending is None:
+                await self._error("There is no plan to execute.", 409, frame)
+                return
+            request = conversation.pending
+        conversation.task = asyncio.create_task(
+            self._turn(conversation, frame.type, frame.turn_id, request)
+        )
+
+    async def _turn(
+        self,
+        conversation: Conversation,
+        kind: str,
+        turn_id: Optional[str],
+        request: ChatRequest,
+    ) -> None:
+        ids = {"conversation_id": conversation.conversation_id, "turn_id": turn_id}
+
+        async def on_step(step: Dict[str, Any]) -> None:
+            await self.emit({"type": "tool", **ids, "step": step})
+
+        async def on_token(text: str) -> None:
+            await self.emit({"type": "token", **ids, "text": text})
+
+        try:
+            await self.limiter.acquire(self.client)
+        except asyncio.CancelledError:
+            self._notify({"type": "cancelled", **ids})
+            raise
+        except Shed as exc:
+            await self.emit(
+                {
+                    "type": "error",
+                    **ids,
+                    "status": 503,
+                    "detail": "Server is busy; please retry shortly.",
+                    "reason": exc.reason,
+                }
+            )
+            return
+        try:
+            await self.emit({"type": "started", **ids, "kind": kind})
+            response = await self._run(kind, request, on_step, on_token)
+        except asyncio.CancelledError:
+            self._notify({"type": "cancelled", **ids})
+            raise
+        except TimeoutError:
+            await self.emit(
+                {"type": "error", **ids, "status": 504, "detail": "Request deadline exceeded."}
+            )
+            return
+        except HTTPException as exc:
+            await self.emit(
+                {"type": "error", **ids, "status": exc.status_code, "detail": exc.detail}
+            )
+            return
+        except Exception as exc:  # noqa: BLE001 - reported to the client like a 500
+            logger.exception("WebSocket %s turn failed", kind)
+            await self.emit({"type": "error", **ids, "status": 500, "detail": str(exc)})
+            return
+        finally:
+            self.limiter.release(self.client)
+
+        if kind == "chat" and response.is_plan:
+            conversation.pending = request
+        else:
+            conversation.pending = None
+            conversation.record(request.message, response.response)
+        await self.emit({"type": "result", **ids, **response.model_dump()})
+
+    @staticmethod
+    async def _run(
+        kind: str, request: ChatRequest, on_step: Any, on_token: Any
+    ) -> ChatResponse:
+        if kind == "chat":
+            deadline = Deadline.after(CHAT_DEADLINE_SECONDS)
+            async with asyncio.timeout(deadline.remaining()):
+                return await chat_controller.get_plan(request, deadline)
+        deadline = Deadline.after(EXECUTE_DEADLINE_SECONDS)
+        async with asyncio.timeout(deadline.remaining()):
+            return await chat_controller.execute_plan(
+                request, deadline, on_step=on_step, on_token=on_token
+            )
+
+    def _notify(self, frame: Dict[str, Any]) -> None:
+        # Cancelled turns must not wait on a full queue; the frame is best effort.
+        try:
+            self._outbox.put_nowait(frame)
+        except asyncio.QueueFull:
+            pass
@@ -0,0 +1,94 @@
+"""Request deadlines carried from the HTTP client down to MCP tools and upstreams."""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Dict, Optional, TypeVar
+
+from fastapi import HTTPException, Request
+
+from ..config import MAX_REQUEST_DEADLINE_SECONDS
+
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+# Absolute deadline (Unix epoch seconds) forwarded to the MCP servers.
+MCP_DEADLINE_HEADER = "X-Fuse-Deadline"
+DISCONNECT_POLL_SECONDS = 0.5
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Deadline:
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.time() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.time())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def mcp_headers(self) -> Dict[str, str]:
+        return {MCP_DEADLINE_HEADER: f"{self.expires_at:.3f}"}
+
+    def gemini_timeout_ms(self) -> int:
+        return max(1, int(self.remaining() * 1000))
+
+
+def request_deadline(request: Request, default_seconds: float) -> Deadline:
+    """Build the deadline for ``request`` from its X-Request-Timeout header or the route default."""
+    seconds = default_seconds
+    header = request.headers.get(REQUEST_TIMEOUT_HEADER)
+    if header:
+        try:
+            seconds = float(header)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{REQUEST_TIMEOUT_HEADER} must be a number of seconds.",
+            ) from exc
+        if seconds <= 0:
+            raise HTTPException(
+                status_code=400, detail=f"{REQUEST_TIMEOUT_HEADER} must be positive."
+            )
+    return Deadline.after(min(seconds, MAX_REQUEST_DEADLINE_SECONDS))
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+async def run_with_deadline(
+    request: Request, deadline: Deadline, work: Awaitable[T]
+) -> T:
+    """Await ``work`` until it finishes, the deadline passes or the client disconnects.
+
+    Either of the latter cancels the work so Gemini, MCP and upstream calls
+    stop consuming capacity for an answer nobody will read.
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        done, _ = await asyncio.wait(
+            {task, watcher},
+            timeout=deadline.remaining(),
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    if task in done:
+        return task.result()
+    if watcher in done:
+        raise HTTPException(status_code=499, detail="Client closed request.")
+    raise HTTPException(status_code=504, detail="Request deadline exceeded.")
+
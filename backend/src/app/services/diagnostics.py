@@ -0,0 +1,12 @@
+"""Process diagnostics shared by the admin endpoints and the app lifespan."""
+from __future__ import annotations
+
+from functools import lru_cache
+
+from ...common.profiling import LoopLagMonitor
+from ..config import LOOP_LAG_THRESHOLD_MS
+
+
+@lru_cache(maxsize=1)
+def get_loop_monitor() -> LoopLagMonitor:
+    return LoopLagMonitor(threshold=LOOP_LAG_THRESHOLD_MS / 1000)
@@ -0,0 +1,225 @@
+"""Background execution of approved plans with polling and SSE progress."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from ..config import (
+    JOB_DEADLINE_SECONDS,
+    JOB_QUEUE_SIZE,
+    JOB_RESULT_TTL_SECONDS,
+    JOB_STORE_MAX,
+    JOB_WORKERS,
+)
+from ..controllers import chat_controller
+from ..models.chat import ChatRequest
+from ..models.job import JobStatus
+from .deadline import Deadline
+
+logger = logging.getLogger("fuse_home.app.jobs")
+
+TERMINAL_STATES = frozenset({"succeeded", "failed", "cancelled"})
+
+
+@dataclass
+class Job:
+    job_id: str
+    request: ChatRequest
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    steps: List[Dict[str, Any]] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    events: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+    task: Optional[asyncio.Task[Any]] = None
+    _changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+    async def publish(
+        self, event: str, data: Dict[str, Any], status: Optional[str] = None
+    ) -> None:
+        async with self._changed:
+            if status is not None:
+                # Changed under the lock so followers never see "done" before the event.
+                self.status = status
+            self.events.append((event, data))
+            self._changed.notify_all()
+
+    async def set_status(self, status: str) -> None:
+        await self.publish("status", {"status": status}, status=status)
+
+    async def add_step(self, step: Dict[str, Any]) -> None:
+        self.steps.append(step)
+        await self.publish("step", step)
+
+    async def stream(self) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Replay past events, then follow new ones until the job finishes."""
+        index = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.events) > index or self.done)
+                pending = self.events[index:]
+            for event in pending:
+                yield event
+            index += len(pending)
+            if self.done and index >= len(self.events):
+                return
+
+    def snapshot(self) -> JobStatus:
+        return JobStatus(
+            job_id=self.job_id,
+            status=self.status,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            steps=self.steps,
+            result=self.result,
+            error=self.error,
+        )
+
+
+class JobRunner:
+    """Bounded worker pool plus a TTL/size-bounded job store.
+
+    Finished jobs are kept for ``result_ttl`` seconds; when the store is full
+    the oldest finished jobs are evicted first, and submissions are refused
+    while every slot belongs to a queued or running job.
+    """
+
+    def __init__(self, workers: int, queue_size: int, store_max: int, result_ttl: float) -> None:
+        self.workers = workers
+        self.store_max = store_max
+        self.result_ttl = result_ttl
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=queue_size)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._workers: List[asyncio.Task[None]] = []
+
+    def _start(self) -> None:
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.workers:
+            self._workers.append(asyncio.create_task(self._work()))
+
+    def _purge(self) -> None:
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.done and job.finished_at and now - job.finished_at > self.result_ttl:
+                del self._jobs[job_id]
+        if len(self._jobs) < self.store_max:
+            return
+        for job_id, job in list(self._jobs.items()):
+            if job.done:
+                del self._jobs[job_id]
+                if len(self._jobs) < self.store_max:
+                    return
+
+    def submit(self, request: ChatRequest) -> Job:
+        self._purge()
+        if len(self._jobs) >= self.store_max or self._queue.full():
+            raise HTTPException(
+                status_code=503,
+                detail="Job queue is full; please retry shortly.",
+                headers={"Retry-After": "5"},
+            )
+        job = Job(job_id=uuid.uuid4().hex, request=request)
+        self._jobs[job.job_id] = job
+        self._queue.put_nowait(job)
+        self._start()
+        return job
+
+    def get(self, job_id: str) -> Job:
+        self._purge()
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown or expired job {job_id}.")
+        return job
+
+    async def cancel(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        if job.done:
+            return job
+        if job.task is not None:
+            job.task.cancel()
+            await asyncio.gather(job.task, return_exceptions=True)
+        else:
+            job.finished_at = time.time()
+            await job.set_status("cancelled")
+        return job
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if not job.done:
+                    job.task = asyncio.create_task(self._run(job))
+                    await asyncio.gather(job.task, return_exceptions=True)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.started_at = time.time()
+        await job.set_status("running")
+        deadline = Deadline.after(JOB_DEADLINE_SECONDS)
+        try:
+            async with asyncio.timeout(deadline.remaining()):
+                response = await chat_controller.execute_plan(
+                    job.request, deadline, on_step=job.add_step
+                )
+        except asyncio.CancelledError:
+            job.finished_at = time.time()
+            await job.set_status("cancelled")
+            raise
+        except TimeoutError:
+            job.error = "Job deadline exceeded."
+        except HTTPException as exc:
+            job.error = str(exc.detail)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Job %s failed", job.job_id)
+            job.error = str(exc)
+        else:
+            job.result = response.model_dump()
+
+        job.finished_at = time.time()
+        if job.error is None:
+            await job.publish("result", job.result or {})
+            await job.set_status("succeeded")
+        else:
+            await job.publish("error", {"detail": job.error})
+            await job.set_status("failed")
+
+    async def shutdown(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        for job in self._jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def metrics(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self.workers, "queued": self._queue.qsize(), "jobs": counts}
+
+
+@lru_cache(maxsize=1)
+def get_job_runner() -> JobRunner:
+    return JobRunner(
+        workers=JOB_WORKERS,
+        queue_size=JOB_QUEUE_SIZE,
+        store_max=JOB_STORE_MAX,
+        result_ttl=JOB_RESULT_TTL_SECONDS,
+    )
@@ -1,9 +1,15 @@
 """Helpers for interacting with the FastMCP client."""
 from __future__ import annotations
 
-from typing import Any, Optional
+import asyncio
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
-from ..config import new_mcp_client
+from fastmcp import Client
+from google import genai
+
+from ..config import TOOL_DECLARATIONS_TTL_SECONDS, new_mcp_client
 
 
 async def call_tool(tool_name: str, arguments: Optional[dict[str, Any]] = None) -> Any:
@@ -16,3 +22,68 @@ async def call_tool(tool_name: str, arguments: Optional[dict[str, Any]] = None)
     if getattr(result, "structured_content", None) is not None:
         return result.structured_content
     return result
+
+
+class ToolDeclarations:
+    """Gemini function declarations built from the MCP tool list, cached for ``ttl_seconds``.
+
+    Passing an MCP session as a Gemini tool makes the SDK list and convert the
+    tools on every model call; the execute loop sends these prebuilt
+    declarations instead and dispatches the calls itself.
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._built: Optional[Tuple[float, List[genai.types.Tool]]] = None
+        self._lock = asyncio.Lock()
+        self.stats: Dict[str, int] = {"builds": 0, "hits": 0}
+
+    def _fresh(self) -> Optional[List[genai.types.Tool]]:
+        if self._built and time.monotonic() - self._built[0] < self.ttl_seconds:
+            return self._built[1]
+        return None
+
+    async def get(self, client: Optional[Client] = None) -> List[genai.types.Tool]:
+        """Cached declarations, listing tools over ``client`` (or a new client) when stale."""
+        tools = self._fresh()
+        if tools is not None:
+            self.stats["hits"] += 1
+            return tools
+        async with self._lock:
+            tools = self._fresh()
+            if tools is not None:
+                self.stats["hits"] += 1
+                return tools
+            if client is not None:
+                listed = await client.list_tools()
+            else:
+                async with new_mcp_client() as fresh_client:
+                    listed = await fresh_client.list_tools()
+            tools = [
+                genai.types.Tool(
+                    function_declarations=[
+                        genai.types.FunctionDeclaration(
+                            name=tool.name,
+                            description=tool.description,
+                            parameters_json_schema=tool.inputSchema,
+                        )
+                        for tool in listed
+                    ]
+                )
+            ]
+            self._built = (time.monotonic(), tools)
+            self.stats["builds"] += 1
+            return tools
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "tools": len(self._built[1][0].function_declarations or []) if self._built else 0,
+            "age_seconds": round(time.monotonic() - self._built[0], 1) if self._built else None,
+            **self.stats,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_tool_declarations() -> ToolDeclarations:
+    return ToolDeclarations(ttl_seconds=TOOL_DECLARATIONS_TTL_SECONDS)
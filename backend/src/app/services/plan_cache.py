@@ -0,0 +1,168 @@
+"""Opt-in cache for plan generation responses."""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from ..config import (
+    PLAN_CACHE_ENABLED,
+    PLAN_CACHE_MAX_ENTRIES,
+    PLAN_CACHE_TOOLS_TTL_SECONDS,
+    PLAN_CACHE_TTL_SECONDS,
+    new_mcp_client,
+)
+from ..models.chat import ChatRequest, ChatResponse
+
+# Anything that looks like it could identify a patient keeps the request out of
+# the cache entirely. The rules are deliberately broad: a false positive only
+# costs a Gemini call.
+_PHI_PATTERNS = {
+    "email": re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"),
+    "ssn": re.compile(r"\b\d{3}-?\d{2}-?\d{4}\b"),
+    "phone": re.compile(r"(?:\+?\d[\s().-]*){7,}"),
+    "date": re.compile(
+        r"\b\d{1,4}[/-]\d{1,2}[/-]\d{1,4}\b"
+        r"|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2}\b",
+        re.IGNORECASE,
+    ),
+    "number": re.compile(r"\d{5,}"),
+    # Mixed letter/digit tokens such as Epic FHIR ids and MRNs.
+    "identifier": re.compile(
+        r"\b(?=[A-Za-z0-9.\-]*\d)(?=[A-Za-z0-9.\-]*[A-Za-z])[A-Za-z0-9.\-]{8,}\b"
+    ),
+    "keyword": re.compile(
+        r"\b(?:mrn|ssn|dob|date of birth|born on|medical record)\b", re.IGNORECASE
+    ),
+    "name": re.compile(r"\b(?:patient|mr|mrs|ms|dr)\.?\s+[A-Z][a-z]+", re.IGNORECASE),
+}
+_WHITESPACE = re.compile(r"\s+")
+
+
+def canonicalize(text: str) -> str:
+    """Normalise unicode, case, whitespace and trailing punctuation."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _WHITESPACE.sub(" ", text).strip().rstrip("?.! ")
+
+
+def phi_reason(texts: Iterable[str]) -> Optional[str]:
+    """Return the first PHI rule matched by any of ``texts``, if one does."""
+    for text in texts:
+        for reason, pattern in _PHI_PATTERNS.items():
+            if pattern.search(text):
+                return reason
+    return None
+
+
+class PlanCache:
+    """LRU + TTL map from a planning-request digest to its ChatResponse."""
+
+    def __init__(
+        self, enabled: bool, max_entries: int, ttl_seconds: float, tools_ttl_seconds: float
+    ) -> None:
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.tools_ttl_seconds = tools_ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, ChatResponse]]" = OrderedDict()
+        self._tool_version: Optional[Tuple[float, str]] = None
+        self.stats: Dict[str, Any] = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "bypassed": {},
+        }
+
+    async def tool_version(self) -> str:
+        """Digest of the MCP tool declarations, refreshed every ``tools_ttl_seconds``."""
+        now = time.monotonic()
+        if self._tool_version and now - self._tool_version[0] < self.tools_ttl_seconds:
+            return self._tool_version[1]
+        async with new_mcp_client() as client:
+            tools = await client.list_tools()
+        declarations = sorted(
+            (tool.name, json.dumps(tool.inputSchema, sort_keys=True), tool.description or "")
+            for tool in tools
+        )
+        version = hashlib.sha256(json.dumps(declarations).encode()).hexdigest()[:16]
+        self._tool_version = (now, version)
+        return version
+
+    def _bypass(self, reason: str) -> None:
+        self.stats["bypassed"][reason] = self.stats["bypassed"].get(reason, 0) + 1
+
+    async def key_for(self, request: ChatRequest, model_config: Dict[str, Any]) -> Optional[str]:
+        """Cache key for ``request``, or None when it must not be cached."""
+        if not self.enabled:
+            return None
+        history = request.history or []
+        reason = phi_reason([request.message, *(entry.content for entry in history)])
+        if reason:
+            self._bypass(f"phi:{reason}")
+            return None
+
+        history_digest = hashlib.sha256(
+            json.dumps([[entry.role, canonicalize(entry.content)] for entry in history]).encode()
+        ).hexdigest()
+        material = json.dumps(
+            {
+                "message": canonicalize(request.message),
+                "history": history_digest,
+                "tenant": request.tenant,
+                "tools": await self.tool_version(),
+                "model": model_config,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[ChatResponse]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+            if entry is not None:
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[1].model_copy()
+
+    def put(self, key: str, response: ChatResponse) -> None:
+        self._entries[key] = (time.monotonic(), response.model_copy())
+        self._entries.move_to_end(key)
+        self.stats["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tool_version = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+            **self.stats,
+            "bypassed": dict(self.stats["bypassed"]),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_plan_cache() -> PlanCache:
+    return PlanCache(
+        enabled=PLAN_CACHE_ENABLED,
+        max_entries=PLAN_CACHE_MAX_ENTRIES,
+        ttl_seconds=PLAN_CACHE_TTL_SECONDS,
+        tools_ttl_seconds=PLAN_CACHE_TOOLS_TTL_SECONDS,
+    )
@@ -0,0 +1,196 @@
+"""Speculative prefetch of likely tool results while Gemini is planning."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..config import (
+    PREFETCH_ENABLED,
+    PREFETCH_MAX_CALLS,
+    PREFETCH_TIMEOUT_SECONDS,
+    PREFETCH_TTL_SECONDS,
+    new_mcp_client,
+)
+
+logger = logging.getLogger("fuse_home.app.prefetch")
+
+# Header understood by the MCP servers' upstream cache (see servers/upstream.py).
+PREFETCH_HEADER = "X-Fuse-Prefetch"
+
+# Only explicit references count: "Patient/<id>", or "patient ID <id>" where the
+# ID looks like an Epic FHIR ID (6+ characters including a digit). Phrases such
+# as "patient 2" must not trigger speculative Epic reads.
+_PATIENT_ID = re.compile(
+    r"\bPatient/([A-Za-z0-9.\-]{1,64})\b"
+    r"|\bpatient\s+id\b[\s:#=]*((?=[A-Za-z0-9.\-]*\d)[A-Za-z0-9.\-]{6,64})\b",
+    re.IGNORECASE,
+)
+_PMID = re.compile(
+    r"\bPMID[\s:#]*(\d{1,9})\b|pubmed\.ncbi\.nlm\.nih\.gov/(\d{1,9})", re.IGNORECASE
+)
+_AUTHOR = re.compile(
+    r"\b(?:by|authors?:?|authored by)\s+"
+    r"([A-Z][a-zA-Z'\-]+(?:\s+[A-Z][a-zA-Z'\-]*\.?){0,2})"
+)
+
+# Tool name -> argument holding the entity, used to match executed calls.
+_KEY_ARGUMENTS = {
+    "epic_get_patient_summary": "patient_id",
+    "epic_get_patient_medications": "patient_id",
+    "epic_get_patient_appointments": "patient_id",
+    "pubmed_get_article_details": "pmid",
+    "pubmed_search_by_author": "author_name",
+}
+
+
+def extract_hints(message: str) -> Dict[str, List[str]]:
+    """Pull patient IDs, PMIDs and author names out of a chat message."""
+    patients = [first or second for first, second in _PATIENT_ID.findall(message)]
+    pmids = [first or second for first, second in _PMID.findall(message)]
+    authors = [name.strip() for name in _AUTHOR.findall(message)]
+    return {
+        "patient_ids": list(dict.fromkeys(patients)),
+        "pmids": list(dict.fromkeys(pmids)),
+        "authors": list(dict.fromkeys(authors)),
+    }
+
+
+def planned_calls(hints: Dict[str, List[str]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Tool calls (with default arguments) a plan for these hints is likely to make."""
+    calls: List[Tuple[str, Dict[str, Any]]] = []
+    for patient_id in hints["patient_ids"]:
+        calls.append(("epic_get_patient_summary", {"patient_id": patient_id}))
+        calls.append(("epic_get_patient_medications", {"patient_id": patient_id}))
+        calls.append(
+            ("epic_get_patient_appointments", {"request": {"patient_id": patient_id}})
+        )
+    for pmid in hints["pmids"]:
+        calls.append(("pubmed_get_article_details", {"pmid": pmid}))
+    for author in hints["authors"]:
+        calls.append(("pubmed_search_by_author", {"author_name": author}))
+    return calls
+
+
+def _call_key(
+    tool: str, arguments: Dict[str, Any], tenant: Optional[str]
+) -> Optional[Tuple[str, str, str]]:
+    name = _KEY_ARGUMENTS.get(tool)
+    if name is None:
+        return None
+    value = arguments.get(name)
+    if value is None and isinstance(arguments.get("request"), dict):
+        value = arguments["request"].get(name)
+    # The same patient ID names different people in different organizations.
+    return (tenant or "", tool, str(value).strip().casefold()) if value else None
+
+
+class Prefetcher:
+    """Fires likely tool calls in the background and tracks whether plans used them.
+
+    The MCP servers cache the upstream responses these calls produce; when the
+    approved plan later runs the same tools, they are served from that cache
+    (or join the still-running prefetch).
+    """
+
+    def __init__(
+        self, enabled: bool, max_calls: int, timeout_seconds: float, ttl_seconds: float
+    ) -> None:
+        self.enabled = enabled
+        self.max_calls = max_calls
+        self.timeout_seconds = timeout_seconds
+        self.ttl_seconds = ttl_seconds
+        self._issued: Dict[Tuple[str, str, str], float] = {}
+        self._tasks: Set[asyncio.Task[None]] = set()
+        self.stats: Dict[str, int] = {
+            "messages": 0,
+            "messages_with_hints": 0,
+            "calls": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "executed_calls": 0,
+            "used": 0,
+        }
+
+    def start(self, message: str, tenant: Optional[str] = None) -> Optional[asyncio.Task[None]]:
+        """Begin prefetching for ``message`` against ``tenant`` without blocking the caller."""
+        if not self.enabled:
+            return None
+        self.stats["messages"] += 1
+        calls = planned_calls(extract_hints(message))[: self.max_calls]
+        if not calls:
+            return None
+        self.stats["messages_with_hints"] += 1
+        task = asyncio.create_task(self._run(calls, tenant))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(
+        self, calls: List[Tuple[str, Dict[str, Any]]], tenant: Optional[str] = None
+    ) -> None:
+        now = time.monotonic()
+        self._expire(now)
+        for tool, arguments in calls:
+            key = _call_key(tool, arguments, tenant)
+            if key:
+                self._issued[key] = now
+        self.stats["calls"] += len(calls)
+        try:
+            async with asyncio.timeout(self.timeout_seconds):
+                async with new_mcp_client(
+                    headers={PREFETCH_HEADER: "1"}, timeout=self.timeout_seconds, tenant=tenant
+                ) as client:
+                    results = await asyncio.gather(
+                        *(client.call_tool_mcp(tool, arguments) for tool, arguments in calls),
+                        return_exceptions=True,
+                    )
+        except TimeoutError:
+            self.stats["timeouts"] += 1
+            return
+        except Exception:  # noqa: BLE001 - speculation must never surface errors
+            logger.debug("Prefetch failed", exc_info=True)
+            self.stats["errors"] += len(calls)
+            return
+        for result in results:
+            if isinstance(result, BaseException) or getattr(result, "isError", False):
+                self.stats["errors"] += 1
+
+    def _expire(self, now: float) -> None:
+        for key, issued_at in list(self._issued.items()):
+            if now - issued_at > self.ttl_seconds:
+                del self._issued[key]
+
+    def record_execution(
+        self, tool: str, arguments: Dict[str, Any], tenant: Optional[str] = None
+    ) -> None:
+        """Note a tool call made by an executed plan; counts it if it was prefetched."""
+        if not self.enabled:
+            return
+        self.stats["executed_calls"] += 1
+        key = _call_key(tool, arguments, tenant)
+        if key and key in self._issued:
+            if time.monotonic() - self._issued.pop(key) <= self.ttl_seconds:
+                self.stats["used"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls = self.stats["calls"]
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._tasks),
+            "use_rate": round(self.stats["used"] / calls, 4) if calls else None,
+            **self.stats,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_prefetcher() -> Prefetcher:
+    return Prefetcher(
+        enabled=PREFETCH_ENABLED,
+        max_calls=PREFETCH_MAX_CALLS,
+        timeout_seconds=PREFETCH_TIMEOUT_SECONDS,
+        ttl_seconds=PREFETCH_TTL_SECONDS,
+    )
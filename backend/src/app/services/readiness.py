@@ -0,0 +1,89 @@
+"""Readiness probes for /ready and the start-up warm-up that precedes them."""
+from __future__ import annotations
+
+from functools import lru_cache
+
+import httpx
+
+from ...common.readiness import ProbeFailed, ReadinessMonitor
+from ..config import (
+    GEMINI_API_KEY,
+    MCP_READY_URL,
+    READY_PROBE_INTERVAL_SECONDS,
+    READY_PROBE_TIMEOUT_SECONDS,
+    READY_REQUIRED_CHECKS,
+    get_gemini_client,
+    new_mcp_client,
+)
+from .mcp_service import get_tool_declarations
+from .plan_cache import get_plan_cache
+
+
+async def _probe_mcp() -> str:
+    async with new_mcp_client(timeout=READY_PROBE_TIMEOUT_SECONDS) as client:
+        await client.ping()
+    return "MCP server answered ping"
+
+
+async def _probe_gemini() -> str:
+    if not GEMINI_API_KEY:
+        raise ProbeFailed("GEMINI_API_KEY is not set")
+    # Listing one model validates the key and keeps the client's connection pool open.
+    await get_gemini_client().aio.models.list(config={"page_size": 1})
+    return "API key accepted"
+
+
+async def _mcp_upstream_check(name: str) -> str:
+    """Read one probe result from the MCP server's /ready (it answers 503 with details)."""
+    async with httpx.AsyncClient(timeout=READY_PROBE_TIMEOUT_SECONDS) as client:
+        response = await client.get(MCP_READY_URL)
+    try:
+        check = response.json().get("checks", {}).get(name)
+    except ValueError as exc:
+        raise ProbeFailed(f"MCP /ready returned HTTP {response.status_code}") from exc
+    if not check:
+        raise ProbeFailed(f"MCP server did not report a {name} check")
+    if not check.get("ok"):
+        raise ProbeFailed(check.get("detail") or f"{name} check failing on the MCP server")
+    return check.get("detail") or "ok"
+
+
+async def _probe_epic() -> str:
+    return await _mcp_upstream_check("epic")
+
+
+async def _probe_ncbi() -> str:
+    return await _mcp_upstream_check("ncbi")
+
+
+async def _warm_tool_declarations() -> None:
+    await get_tool_declarations().get()
+
+
+async def _warm_plan_cache() -> None:
+    cache = get_plan_cache()
+    if cache.enabled:
+        await cache.tool_version()
+
+
+@lru_cache(maxsize=1)
+def get_readiness() -> ReadinessMonitor:
+    return ReadinessMonitor(
+        {"mcp": _probe_mcp, "gemini": _probe_gemini, "epic": _probe_epic, "ncbi": _probe_ncbi},
+        interval=READY_PROBE_INTERVAL_SECONDS,
+        timeout=READY_PROBE_TIMEOUT_SECONDS,
+        required=READY_REQUIRED_CHECKS,
+    )
+
+
+async def warm_up() -> None:
+    """Build tool declarations, run the first probe round, then refresh in the background.
+
+    The Epic token is acquired by the MCP server's own warm-up; the Gemini
+    probe opens the Gemini client's pooled connections.
+    """
+    readiness = get_readiness()
+    await readiness.warm_up(
+        {"tool_declarations": _warm_tool_declarations, "plan_cache_tools": _warm_plan_cache}
+    )
+    readiness.start()
@@ -0,0 +1,126 @@
+"""Gemini turn capture and replay on top of the shared cassette format."""
+from __future__ import annotations
+
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from google import genai
+
+from ...common import json_codec
+from ...common.cassette import REDACTED, Cassette, digest, scrub_json
+from ..config import CASSETTE_DIR, CASSETTE_LATENCY_SCALE, CASSETTE_MODE
+
+TokenCallback = Callable[[str], Awaitable[None]]
+
+
+@lru_cache(maxsize=1)
+def get_gemini_cassette() -> Cassette:
+    return Cassette(Path(CASSETTE_DIR) / "gemini.jsonl", CASSETTE_MODE, CASSETTE_LATENCY_SCALE)
+
+
+def _message_payload(message: Any) -> Any:
+    if isinstance(message, str):
+        return message
+    return [part.model_dump(mode="json", exclude_none=True) for part in message]
+
+
+def _scrubbed_response(response: Any) -> Dict[str, Any]:
+    """Dump a response without its text and with function-call arguments scrubbed.
+
+    Model text (answers, summaries, thoughts) routinely names patients, so
+    only its length and a digest are kept; replayed turns carry that stand-in.
+    """
+    dumped = response.model_dump(mode="json", exclude_none=True)
+    for candidate in dumped.get("candidates") or []:
+        for part in (candidate.get("content") or {}).get("parts") or []:
+            if part.get("text"):
+                text = part["text"]
+                part["text"] = f"{REDACTED} ({len(text)} chars, {digest(text)[:12]})"
+            call = part.get("function_call")
+            if call and call.get("args"):
+                call["args"] = scrub_json(call["args"])
+    return dumped
+
+
+def _is_text(part: genai.types.Part) -> bool:
+    return part.text is not None and not part.thought and part.function_call is None
+
+
+def _response_text(response: Any) -> str:
+    if not response.candidates or not response.candidates[0].content:
+        return ""
+    return "".join(
+        part.text for part in response.candidates[0].content.parts or [] if _is_text(part)
+    )
+
+
+async def _stream_message(
+    chat: Any, message: Any, on_token: TokenCallback
+) -> genai.types.GenerateContentResponse:
+    """Stream one turn, passing text deltas to ``on_token``, and return the whole response."""
+    parts: List[genai.types.Part] = []
+    last = None
+    async for chunk in await chat.send_message_stream(message):
+        last = chunk
+        if not chunk.candidates or not chunk.candidates[0].content:
+            continue
+        for part in chunk.candidates[0].content.parts or []:
+            if _is_text(part):
+                await on_token(part.text)
+                if parts and _is_text(parts[-1]):
+                    parts[-1] = genai.types.Part(text=parts[-1].text + part.text)
+                    continue
+            parts.append(part)
+    finish_reason = None
+    if last is not None and last.candidates:
+        finish_reason = last.candidates[0].finish_reason
+    return genai.types.GenerateContentResponse(
+        candidates=[
+            genai.types.Candidate(
+                content=genai.types.Content(role="model", parts=parts),
+                finish_reason=finish_reason,
+            )
+        ],
+        usage_metadata=last.usage_metadata if last is not None else None,
+    )
+
+
+async def send_recorded(
+    chat: Any, message: Any, phase: str, on_token: Optional[TokenCallback] = None
+) -> Any:
+    """``chat.send_message`` that records the turn, or replays it under CASSETTE_MODE.
+
+    Turns are matched by phase and message digest, falling back to the next
+    recorded turn of the same phase (tool results replayed from scrubbed
+    upstream data no longer hash the same). Neither message nor response text
+    is stored, only their sizes and digests. With
+    ``on_token`` the turn is streamed; recorded and replayed turns deliver
+    their text as a single delta.
+    """
+    cassette = get_gemini_cassette()
+    if cassette.mode == "off":
+        if on_token is not None:
+            return await _stream_message(chat, message, on_token)
+        return await chat.send_message(message)
+
+    payload = json_codec.dumps(_message_payload(message))
+    key = digest(phase, payload)
+    if cassette.replaying:
+        recorded = await cassette.replay("gemini", key, group=phase)
+        response = genai.types.GenerateContentResponse.model_validate(recorded)
+    else:
+        started = time.perf_counter()
+        response = await chat.send_message(message)
+        await cassette.record(
+            "gemini",
+            key,
+            {"phase": phase, "message_chars": len(payload)},
+            _scrubbed_response(response),
+            time.perf_counter() - started,
+            group=phase,
+        )
+    if on_token is not None and (text := _response_text(response)):
+        await on_token(text)
+    return response
@@ -0,0 +1,67 @@
+"""Admin-only profiling endpoints for the live API process."""
+from __future__ import annotations
+
+from typing import Any, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from ...common.profiling import (
+    ProfilerBusy,
+    allocation_diff,
+    check_admin_token,
+    cprofile_profile,
+    sample_profile,
+)
+from ..config import ADMIN_TOKEN
+from ..services.diagnostics import get_loop_monitor
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled.")
+    if not check_admin_token(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+@router.get("/profile", response_model=None)
+async def profile(
+    mode: Literal["sample", "cprofile"] = "sample",
+    seconds: float = Query(10.0, gt=0, le=60),
+    output: Literal["json", "collapsed"] = "json",
+) -> Any:
+    """Profile the event loop for ``seconds``.
+
+    ``sample`` returns collapsed stacks for flame graphs (``output=collapsed``
+    returns them as plain text); ``cprofile`` returns the top functions by
+    self time.
+    """
+    try:
+        if mode == "cprofile":
+            return await cprofile_profile(seconds)
+        result = await sample_profile(seconds)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    if output == "collapsed":
+        return PlainTextResponse(result["collapsed"] + "\n")
+    return result
+
+
+@router.get("/memory")
+async def memory(
+    seconds: float = Query(10.0, gt=0, le=60), top: int = Query(25, ge=1, le=200)
+) -> dict[str, Any]:
+    """Allocation sites with the largest net growth over ``seconds``."""
+    try:
+        return await allocation_diff(seconds, top)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+@router.get("/loop")
+async def loop_lag() -> dict[str, Any]:
+    """Event-loop lag statistics and the stacks of recent stalls."""
+    return get_loop_monitor().snapshot()
@@ -0,0 +1,64 @@
+"""Tool-usage analytics endpoints backing the dashboard."""
+from __future__ import annotations
+
+from typing import Any, Literal
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..services.analytics import fetch_upstream_analytics, get_analytics
+
+router = APIRouter(prefix="/analytics")
+
+Resolution = Literal["minute", "hour"]
+
+
+@router.get("/summary")
+async def analytics_summary(
+    window_minutes: int = Query(60, ge=1, le=7 * 24 * 60),
+) -> dict[str, Any]:
+    """Throughput, error rate and latency percentiles per kind and per metric."""
+    summary = get_analytics().summary(window_minutes)
+    upstream = await fetch_upstream_analytics({"window_minutes": window_minutes})
+    if upstream is not None:
+        summary["kinds"].update(upstream.get("kinds", {}))
+        summary["metrics"] = sorted(
+            summary["metrics"] + upstream.get("metrics", []),
+            key=lambda item: item["count"],
+            reverse=True,
+        )
+    summary["upstream_available"] = upstream is not None
+    return summary
+
+
+@router.get("/series")
+async def analytics_series(
+    metric: str = Query(..., description="A metric such as tool:epic_search_patients, or a kind"),
+    resolution: Resolution = "minute",
+    points: int = Query(60, ge=1, le=1000),
+) -> dict[str, Any]:
+    """Per-minute or per-hour buckets for one metric, or all metrics of a kind."""
+    store = get_analytics()
+    limit = store.minute_buckets if resolution == "minute" else store.hour_buckets
+    points = min(points, limit)
+    if metric.partition(":")[0] == "upstream":
+        upstream = await fetch_upstream_analytics(
+            {"series": metric, "resolution": resolution, "points": points}
+        )
+        if upstream is None:
+            raise HTTPException(status_code=502, detail="Upstream metrics are unavailable.")
+        return upstream
+    return {
+        "metric": metric,
+        "resolution": resolution,
+        "points": store.series(metric, resolution, points),
+    }
+
+
+@router.get("/metrics")
+async def analytics_metrics() -> dict[str, Any]:
+    """Names of every recorded metric."""
+    upstream = await fetch_upstream_analytics({"window_minutes": 7 * 24 * 60})
+    names = get_analytics().metrics()
+    if upstream is not None:
+        names += [item["metric"] for item in upstream.get("metrics", [])]
+    return {"metrics": sorted(names)}
@@ -0,0 +1,38 @@
+"""Route for bulk chat processing with streamed NDJSON results."""
+from __future__ import annotations
+
+import json
+from typing import AsyncIterator
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from ..config import BATCH_MAX_ITEMS
+from ..models.batch import BatchRequest
+from ..services.batch import get_batch_runner
+
+router = APIRouter()
+
+
+@router.post("/batch")
+async def run_batch(request: BatchRequest) -> StreamingResponse:
+    """Run every item and stream one JSON line per item as it finishes, then a summary.
+
+    Item lines carry ``index`` (position in the request), the caller's ``id``,
+    ``ok`` and either ``response``/``is_plan`` or ``status``/``error``.
+    ``gemini_batch`` mode also emits ``progress`` lines while the job runs.
+    """
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"A batch may hold at most {BATCH_MAX_ITEMS} items."
+        )
+
+    async def stream() -> AsyncIterator[str]:
+        async for line in get_batch_runner().run(request):
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,19 +1,55 @@
 """Chat-related API routes."""
 from __future__ import annotations
 
-from fastapi import APIRouter
+from typing import Literal
 
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from ..config import CHAT_DEADLINE_SECONDS, EXECUTE_DEADLINE_SECONDS
 from ..controllers import chat_controller
 from ..models.chat import ChatRequest, ChatResponse
+from ..models.job import JobAccepted
+from ..services.deadline import request_deadline, run_with_deadline
+from ..services.jobs import get_job_runner
 
 router = APIRouter()
 
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest) -> ChatResponse:
-    return await chat_controller.get_plan(request)
+async def chat_endpoint(request: ChatRequest, http_request: Request) -> ChatResponse:
+    deadline = request_deadline(http_request, CHAT_DEADLINE_SECONDS)
+    return await run_with_deadline(
+        http_request, deadline, chat_controller.get_plan(request, deadline)
+    )
+
 
+@router.post(
+    "/execute",
+    response_model=ChatResponse,
+    responses={202: {"model": JobAccepted, "description": "Plan queued as a background job"}},
+)
+async def execute_endpoint(
+    request: ChatRequest,
+    http_request: Request,
+    mode: Literal["sync", "async"] = "sync",
+) -> ChatResponse | JSONResponse:
+    prefer = http_request.headers.get("prefer", "")
+    if mode == "async" or "respond-async" in prefer:
+        job = get_job_runner().submit(request)
+        accepted = JobAccepted(
+            job_id=job.job_id,
+            status=job.status,
+            status_url=f"/jobs/{job.job_id}",
+            events_url=f"/jobs/{job.job_id}/events",
+        )
+        return JSONResponse(
+            accepted.model_dump(),
+            status_code=202,
+            headers={"Location": accepted.status_url},
+        )
 
-@router.post("/execute", response_model=ChatResponse)
-async def execute_endpoint(request: ChatRequest) -> ChatResponse:
-    return await chat_controller.execute_plan(request)
+    deadline = request_deadline(http_request, EXECUTE_DEADLINE_SECONDS)
+    return await run_with_deadline(
+        http_request, deadline, chat_controller.execute_plan(request, deadline)
+    )
@@ -1,7 +1,18 @@
 """Health check endpoint."""
 from __future__ import annotations
 
-from fastapi import APIRouter
+from typing import Any
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from ..services.batch import get_batch_runner
+from ..services.jobs import get_job_runner
+from ..services.mcp_service import get_tool_declarations
+from ..services.plan_cache import get_plan_cache
+from ..services.prefetch import get_prefetcher
+from ..services.readiness import get_readiness
+from ..services.recorder import get_gemini_cassette
 
 router = APIRouter()
 
@@ -9,3 +20,44 @@ router = APIRouter()
 @router.get("/health")
 async def health_check() -> dict[str, str]:
     return {"status": "healthy"}
+
+
+@router.get("/ready")
+async def readiness_check() -> JSONResponse:
+    """Cached MCP, Gemini, Epic and NCBI probe results; 503 until warmed up and passing."""
+    snapshot = get_readiness().snapshot()
+    snapshot["tool_declarations"] = get_tool_declarations().snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
+@router.get("/health/load")
+async def load_status(request: Request) -> dict[str, Any]:
+    """Admission-control counters plus background job queue depth."""
+    return {
+        **request.app.state.load_limiter.snapshot(),
+        "jobs": get_job_runner().metrics(),
+    }
+
+
+@router.get("/health/plan-cache")
+async def plan_cache_status() -> dict[str, Any]:
+    """Planning cache size, hit rate and PHI bypass counts."""
+    return get_plan_cache().snapshot()
+
+
+@router.get("/health/prefetch")
+async def prefetch_status() -> dict[str, Any]:
+    """Speculative prefetch counters and how often executed plans used them."""
+    return get_prefetcher().snapshot()
+
+
+@router.get("/health/cassette")
+async def cassette_status() -> dict[str, Any]:
+    """Gemini record/replay mode, cassette path and recorded/replayed/missed turns."""
+    return get_gemini_cassette().snapshot()
+
+
+@router.get("/health/batch")
+async def batch_status() -> dict[str, Any]:
+    """Bulk /batch counters: items running, outcomes and tool calls shared across items."""
+    return get_batch_runner().snapshot()
@@ -0,0 +1,44 @@
+"""Routes for polling and following background plan execution jobs."""
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from ..models.job import JobStatus
+from ..services.jobs import get_job_runner
+
+router = APIRouter(prefix="/jobs")
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str) -> JobStatus:
+    return get_job_runner().get(job_id).snapshot()
+
+
+@router.delete("/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str) -> JobStatus:
+    job = await get_job_runner().cancel(job_id)
+    return job.snapshot()
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    """Server-sent events: ``status``, ``step``, then ``result`` or ``error``."""
+    job = get_job_runner().get(job_id)
+
+    async def stream() -> AsyncIterator[str]:
+        async for event, data in job.stream():
+            yield _sse(event, data)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,27 @@
+"""WebSocket transport for chat: several conversations per connection."""
+from __future__ import annotations
+
+from fastapi import APIRouter, WebSocket, status
+
+from ..config import CORS_ALLOW_ORIGINS
+from ..services.conversations import ChatConnection
+
+router = APIRouter()
+
+
+@router.websocket("/ws/chat")
+async def chat_socket(websocket: WebSocket) -> None:
+    """Multiplexed chat; see ``ChatConnection`` and ``ClientFrame`` for the protocol.
+
+    Server frames: ``started``, ``token`` (streamed text while executing),
+    ``tool`` (one per tool call), ``result``, ``cancelled``, ``error`` and
+    ``pong``, each tagged with the ``conversation_id`` and ``turn_id`` it
+    belongs to.
+    """
+    origin = websocket.headers.get("origin")
+    if origin and "*" not in CORS_ALLOW_ORIGINS and origin not in CORS_ALLOW_ORIGINS:
+        # CORS does not cover WebSockets, so apply the same allow-list here.
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    await ChatConnection(websocket, websocket.app.state.load_limiter).run()
@@ -0,0 +1,6 @@
+"""
+Shared utilities used by both the MCP servers and the FastAPI app.
+
+Nothing here may import ``src.servers`` or ``src.app``, so either side can
+use these modules without loading the other.
+"""
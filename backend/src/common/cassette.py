@@ -0,0 +1,309 @@
+"""
+Record/replay of upstream and model traffic as scrubbed JSON Lines cassettes.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from . import json_codec
+
+MODES = ("off", "record", "replay")
+
+# Request parameters, form fields and JSON keys whose values never reach a cassette.
+SECRET_KEYS = frozenset(
+    {
+        "access_token",
+        "api_key",
+        "authorization",
+        "client_id",
+        "client_secret",
+        "id_token",
+        "password",
+        "refresh_token",
+    }
+)
+# FHIR elements (and search parameters) that identify a patient. Their string
+# leaves are redacted in place so replayed resources keep the same shape.
+PHI_KEYS = frozenset(
+    {
+        "address",
+        "birthDate",
+        "birthdate",
+        "contact",
+        "email",
+        "family",
+        "given",
+        "identifier",
+        "name",
+        "phone",
+        "photo",
+        "telecom",
+        # Narrative XHTML (``text.div``) restates demographics and clinical detail.
+        "div",
+    }
+)
+# Keys and search parameters holding a patient's logical id. Ids are replaced by
+# a stable pseudonym so recorded reads, searches and references still line up.
+PATIENT_ID_KEYS = frozenset({"patient", "patient_id", "subject"})
+SCRUBBED = "<scrubbed>"
+REDACTED = "REDACTED"
+_DATE = re.compile(r"^\d{4}(-\d{2}(-\d{2})?)?$")
+_PLACEHOLDER_DATE = "1900-01-01"
+_PSEUDONYM = re.compile(r"^pt-[0-9a-f]{16}$")
+# Patient ids inside references, URLs and query strings.
+_PATIENT_REFERENCE = re.compile(r"(Patient/)([A-Za-z0-9\-.]{1,64})")
+_PATIENT_PARAMETER = re.compile(r"([?&](?:patient|subject)=)(?:Patient/)?([^&#]+)")
+
+
+def pseudonym(patient_id: str) -> str:
+    """Stable stand-in for a patient id; already pseudonymous ids are kept."""
+    if _PSEUDONYM.match(patient_id):
+        return patient_id
+    return "pt-" + hashlib.sha256(patient_id.encode()).hexdigest()[:16]
+
+
+def scrub_text(value: str) -> str:
+    """Pseudonymize patient ids in references (``Patient/123``) and URLs (``?patient=123``)."""
+    value = _PATIENT_REFERENCE.sub(lambda match: match[1] + pseudonym(match[2]), value)
+    return _PATIENT_PARAMETER.sub(lambda match: match[1] + pseudonym(match[2]), value)
+
+
+def _redact(value: Any) -> Any:
+    if isinstance(value, str):
+        # Keep dates parseable for code that computes ages or sorts by them.
+        return _PLACEHOLDER_DATE[: len(value)] if _DATE.match(value) else REDACTED
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _redact(item) for key, item in value.items()}
+    return value
+
+
+def scrub_json(value: Any) -> Any:
+    """Drop secrets and redact patient identifiers from a decoded JSON document.
+
+    Besides the ``PHI_KEYS`` elements this redacts the ``display`` of every
+    Reference (``subject``, ``participant[].actor``, ``requester`` ...) and
+    pseudonymizes patient ids: Patient resource ids, ``PATIENT_ID_KEYS``
+    values and ``Patient/<id>`` inside any string.
+    """
+    if isinstance(value, list):
+        return [scrub_json(item) for item in value]
+    if isinstance(value, str):
+        return scrub_text(value)
+    if not isinstance(value, dict):
+        return value
+    scrubbed: Dict[str, Any] = {}
+    for key, item in value.items():
+        if key.lower() in SECRET_KEYS:
+            scrubbed[key] = SCRUBBED
+        elif key in PHI_KEYS or (key == "display" and "reference" in value):
+            scrubbed[key] = _redact(item)
+        elif key in PATIENT_ID_KEYS and isinstance(item, str):
+            scrubbed[key] = pseudonym(item.removeprefix("Patient/"))
+        elif key == "id" and value.get("resourceType") == "Patient" and isinstance(item, str):
+            scrubbed[key] = pseudonym(item)
+        else:
+            scrubbed[key] = scrub_json(item)
+    return scrubbed
+
+
+def scrub_pairs(pairs: Any) -> List[Tuple[str, str]]:
+    """Query parameters or form fields as sorted pairs with secrets and PHI removed."""
+    items = pairs.items() if isinstance(pairs, dict) else pairs or ()
+    scrubbed = []
+    for key, value in items:
+        key = str(key)
+        if key.lower() in SECRET_KEYS:
+            value = SCRUBBED
+        elif key.split(":")[0] in PHI_KEYS:
+            value = REDACTED
+        elif key.split(":")[0] in PATIENT_ID_KEYS:
+            value = pseudonym(str(value).removeprefix("Patient/"))
+        scrubbed.append((key, scrub_text(str(value))))
+    return sorted(scrubbed)
+
+
+def scrub_body(body: bytes, content_type: str) -> Dict[str, str]:
+    """Encode a response body for the cassette, scrubbing JSON documents."""
+    if "json" in content_type:
+        try:
+            return {"body": json_codec.dumps(scrub_json(json_codec.loads(body)))}
+        except ValueError:
+            pass
+    try:
+        return {"body": scrub_text(body.decode("utf-8"))}
+    except UnicodeDecodeError:
+        return {"body_b64": base64.b64encode(body).decode("ascii")}
+
+
+def decode_body(entry: Dict[str, Any]) -> bytes:
+    if "body_b64" in entry:
+        return base64.b64decode(entry["body_b64"])
+    return entry.get("body", "").encode("utf-8")
+
+
+def digest(*parts: Any) -> str:
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+
+def scrub_request(method: str, url: str, params: Any = None, data: Any = None) -> Dict[str, Any]:
+    request: Dict[str, Any] = {"method": method.upper(), "url": scrub_text(url)}
+    if params:
+        request["params"] = scrub_pairs(params)
+    if data and not isinstance(data, (bytes, str)):
+        request["data"] = scrub_pairs(data)
+    return request
+
+
+def http_key(method: str, url: str, params: Any = None, data: Any = None) -> str:
+    """Match key over the scrubbed request, so it is stable across credentials.
+
+    Requests differing only in redacted values share a key and replay in order.
+    """
+    body = data if isinstance(data, (bytes, str)) else None
+    return digest(scrub_request(method, url, params, data), body)
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded interaction for a request."""
+
+
+class Cassette:
+    """Appends interactions to ``path`` when recording and serves them back when replaying.
+
+    Each JSON line holds the interaction kind, its match key, a scrubbed copy of
+    the request and response, and the original latency. Replay hands out
+    entries for a key in recorded order (so repeated polls replay as they
+    happened) and sleeps ``latency_scale`` times the recorded latency; a scale
+    of 0 replays as fast as possible. Entries may also carry a ``group`` (such
+    as a Gemini turn phase) used as an in-order fallback when the exact key
+    was not recorded.
+    """
+
+    def __init__(self, path: Path | str, mode: str = "off", latency_scale: float = 1.0) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Cassette mode must be one of {', '.join(MODES)}, not {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries: Optional[List[Dict[str, Any]]] = None
+        self._by_key: Dict[Tuple[str, str], Deque[int]] = {}
+        self._by_group: Dict[Tuple[str, str], Deque[int]] = {}
+        self._used: set[int] = set()
+        self.stats: Dict[str, int] = {"recorded": 0, "replayed": 0, "misses": 0}
+
+    @classmethod
+    def from_env(cls, name: str) -> "Cassette":
+        """Cassette ``<CASSETTE_DIR>/<name>.jsonl`` configured by ``CASSETTE_MODE``."""
+        return cls(
+            Path(os.getenv("CASSETTE_DIR", "data/cassettes")) / f"{name}.jsonl",
+            os.getenv("CASSETTE_MODE", "off").lower(),
+            float(os.getenv("CASSETTE_LATENCY_SCALE", "1.0")),
+        )
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    async def record(
+        self,
+        kind: str,
+        key: str,
+        request: Dict[str, Any],
+        response: Dict[str, Any],
+        elapsed: float,
+        group: Optional[str] = None,
+    ) -> None:
+        """Append an interaction from a worker thread, off the event loop."""
+        await asyncio.to_thread(self.append, kind, key, request, response, elapsed, group)
+
+    def append(
+        self,
+        kind: str,
+        key: str,
+        request: Dict[str, Any],
+        response: Dict[str, Any],
+        elapsed: float,
+        group: Optional[str] = None,
+    ) -> None:
+        entry = {
+            "kind": kind,
+            "key": key,
+            "group": group,
+            "recorded_at": time.time(),
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "request": request,
+            "response": response,
+        }
+        line = json_codec.dumps(entry)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+            self.stats["recorded"] += 1
+
+    def _load(self) -> List[Dict[str, Any]]:
+        if self._entries is None:
+            entries: List[Dict[str, Any]] = []
+            if self.path.exists():
+                with self.path.open(encoding="utf-8") as handle:
+                    entries = [json_codec.loads(line) for line in handle if line.strip()]
+            for index, entry in enumerate(entries):
+                self._by_key.setdefault((entry["kind"], entry["key"]), deque()).append(index)
+                if entry.get("group"):
+                    self._by_group.setdefault((entry["kind"], entry["group"]), deque()).append(
+                        index
+                    )
+            self._entries = entries
+        return self._entries
+
+    def _take(self, queue: Optional[Deque[int]]) -> Optional[int]:
+        while queue:
+            index = queue.popleft()
+            if index not in self._used:
+                self._used.add(index)
+                return index
+        return None
+
+    async def replay(self, kind: str, key: str, group: Optional[str] = None) -> Dict[str, Any]:
+        """Next recorded response for ``key`` after its recorded (scaled) latency."""
+        with self._lock:
+            entries = self._load()
+            index = self._take(self._by_key.get((kind, key)))
+            if index is None and group is not None:
+                index = self._take(self._by_group.get((kind, group)))
+            if index is None:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"no recorded {kind} interaction in {self.path}")
+            self.stats["replayed"] += 1
+            entry = entries[index]
+        if self.latency_scale > 0:
+            await asyncio.sleep(entry["elapsed_ms"] / 1000 * self.latency_scale)
+        return entry["response"]
+
+    def snapshot(self) -> Dict[str, Any]:
+        remaining = None
+        if self._entries is not None:
+            remaining = len(self._entries) - len(self._used)
+        return {
+            "mode": self.mode,
+            "path": str(self.path),
+            "latency_scale": self.latency_scale,
+            "remaining": remaining,
+            **self.stats,
+        }
@@ -0,0 +1,98 @@
+"""
+JSON codec shared by the MCP servers - uses orjson or msgspec when installed.
+"""
+from __future__ import annotations
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+def _select_backend() -> str:
+    requested = os.getenv("FUSE_JSON_BACKEND", "auto").lower()
+    available = {
+        "msgspec": msgspec is not None,
+        "orjson": orjson is not None,
+        "json": True,
+    }
+    if requested != "auto":
+        return requested if available.get(requested) else "json"
+    for name in ("msgspec", "orjson"):
+        if available[name]:
+            return name
+    return "json"
+
+
+JSON_BACKEND: str = _select_backend()
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode a JSON document with the fastest available backend."""
+
+    if JSON_BACKEND == "msgspec":
+        return msgspec.json.decode(data)
+    if JSON_BACKEND == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Encode ``obj`` as compact JSON text."""
+
+    if JSON_BACKEND == "orjson":
+        return orjson.dumps(obj).decode()
+    if JSON_BACKEND == "msgspec":
+        return msgspec.json.encode(obj).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+@lru_cache(maxsize=64)
+def _projected_decoder(keys: frozenset[str]) -> Any:
+    """Build a msgspec decoder that keeps only ``keys`` on each resource.
+
+    The generated struct decodes both a bare resource and a searchset Bundle
+    whose entries hold such resources, so unused FHIR elements (narrative,
+    extensions, contained resources) are skipped instead of materialised.
+    """
+
+    resource_fields = [(key, Any, msgspec.UNSET) for key in sorted(keys)]
+    resource = msgspec.defstruct("ProjectedResource", resource_fields)
+    entry = msgspec.defstruct(
+        "ProjectedEntry",
+        [("resource", resource, msgspec.UNSET), ("search", Any, msgspec.UNSET)],
+    )
+    bundle_fields = [
+        ("total", Any, msgspec.UNSET),
+        ("link", Any, msgspec.UNSET),
+        ("entry", list[entry], msgspec.UNSET),
+    ]
+    document = msgspec.defstruct(
+        "ProjectedDocument",
+        [item for item in resource_fields if item[0] not in {"total", "link", "entry"}]
+        + bundle_fields,
+    )
+    return msgspec.json.Decoder(document)
+
+
+def loads_projected(data: bytes | str, keys: Optional[Iterable[str]] = None) -> Any:
+    """Decode a FHIR resource or Bundle keeping only the listed resource elements.
+
+    Falls back to a full :func:`loads` when msgspec is unavailable or no keys
+    are given; callers must therefore tolerate extra elements.
+    """
+
+    if not keys or msgspec is None or JSON_BACKEND == "json":
+        return loads(data)
+    decoded = _projected_decoder(frozenset(keys) | {"resourceType", "id"}).decode(data)
+    return msgspec.to_builtins(decoded)
@@ -0,0 +1,264 @@
+"""
+On-demand CPU and memory profiling plus event-loop lag monitoring for live processes.
+"""
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import traceback
+from collections import Counter
+from types import FrameType
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_PROFILE_SECONDS = 60.0
+MAX_STACK_DEPTH = 64
+TRACEMALLOC_FRAMES = 16
+
+# Only one profile may run at a time: cProfile hooks are process-wide and
+# concurrent samplers would just measure each other.
+_PROFILE_LOCK = asyncio.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Another profile is already running in this process."""
+
+
+def check_admin_token(supplied: Optional[str], expected: Optional[str]) -> bool:
+    """Constant-time token check; profiling is disabled when no token is configured."""
+    return bool(expected and supplied and hmac.compare_digest(supplied, expected))
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+def _collapse(frame: Optional[FrameType]) -> str:
+    labels: List[str] = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _sample(thread_id: int, duration: float, interval: float, stop: threading.Event) -> Counter:
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline and not stop.is_set():
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            stacks[_collapse(frame)] += 1
+        time.sleep(interval)
+    return stacks
+
+
+async def sample_profile(
+    duration: float, interval: float = 0.005, top: int = 200
+) -> Dict[str, Any]:
+    """Sample the event-loop thread's stack from a helper thread for ``duration`` seconds.
+
+    Returns flame-graph compatible collapsed stacks (``a;b;c count`` per line,
+    as consumed by flamegraph.pl or speedscope) with the hottest ``top`` kept.
+    """
+    duration = min(duration, MAX_PROFILE_SECONDS)
+    if _PROFILE_LOCK.locked():
+        raise ProfilerBusy("A profile is already running")
+    async with _PROFILE_LOCK:
+        stop = threading.Event()
+        try:
+            loop_thread = threading.get_ident()
+            stacks = await asyncio.to_thread(_sample, loop_thread, duration, interval, stop)
+        finally:
+            stop.set()
+    samples = sum(stacks.values())
+    hottest = stacks.most_common(top)
+    return {
+        "mode": "sample",
+        "duration_seconds": duration,
+        "interval_seconds": interval,
+        "samples": samples,
+        "distinct_stacks": len(stacks),
+        "collapsed": "\n".join(f"{stack} {count}" for stack, count in hottest),
+    }
+
+
+async def cprofile_profile(duration: float, top: int = 50) -> Dict[str, Any]:
+    """Deterministically profile everything the event loop runs for ``duration`` seconds."""
+    duration = min(duration, MAX_PROFILE_SECONDS)
+    if _PROFILE_LOCK.locked():
+        raise ProfilerBusy("A profile is already running")
+    async with _PROFILE_LOCK:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profiler.disable()
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    functions = []
+    for (filename, line, name), (calls, _, self_time, cumulative, _) in stats.stats.items():
+        functions.append(
+            {
+                "function": f"{os.path.basename(filename)}:{line}:{name}",
+                "calls": calls,
+                "self_ms": round(self_time * 1000, 2),
+                "cumulative_ms": round(cumulative * 1000, 2),
+            }
+        )
+    functions.sort(key=lambda item: item["self_ms"], reverse=True)
+    return {"mode": "cprofile", "duration_seconds": duration, "functions": functions[:top]}
+
+
+async def allocation_diff(duration: float, top: int = 25) -> Dict[str, Any]:
+    """Top allocation sites by net growth over ``duration`` seconds (tracemalloc).
+
+    Tracing is started for the window and stopped afterwards unless it was
+    already running, so it costs nothing between requests. Shares the profile
+    lock, and snapshots are taken and compared in a worker thread so the event
+    loop keeps serving while tracemalloc walks every traced block.
+    """
+    duration = min(duration, MAX_PROFILE_SECONDS)
+    if _PROFILE_LOCK.locked():
+        raise ProfilerBusy("A profile is already running")
+    async with _PROFILE_LOCK:
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        try:
+            before = await asyncio.to_thread(tracemalloc.take_snapshot)
+            await asyncio.sleep(duration)
+            after = await asyncio.to_thread(tracemalloc.take_snapshot)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+        allocators = await asyncio.to_thread(_top_allocators, before, after, top)
+    return {
+        "duration_seconds": duration,
+        "traced_current_kb": round(current / 1024, 1),
+        "traced_peak_kb": round(peak / 1024, 1),
+        "top_allocators": allocators,
+    }
+
+
+def _top_allocators(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, top: int
+) -> List[Dict[str, Any]]:
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "traceback")
+    allocators = []
+    for stat in diff[:top]:
+        frames = stat.traceback  # oldest frame first
+        allocators.append(
+            {
+                "site": f"{os.path.basename(frames[-1].filename)}:{frames[-1].lineno}",
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "size_kb": round(stat.size / 1024, 1),
+                "count_diff": stat.count_diff,
+                "stack": [
+                    f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in frames
+                ],
+            }
+        )
+    return allocators
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag and logs the loop's stack while a callback blocks it.
+
+    A heartbeat task wakes every ``interval`` seconds and records how late it
+    ran. A watchdog thread checks the heartbeat; when it is more than
+    ``threshold`` seconds overdue it captures the loop thread's current stack,
+    which names the slow callback while it is still running.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, recent: int = 20) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.recent = recent
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.beats = 0
+        self.stalls = 0
+        self.slow_callbacks: List[Dict[str, Any]] = []
+        self._heartbeat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._stop = threading.Event()
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._heartbeat = now
+            self.beats += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+
+    def _watch(self) -> None:
+        reported = 0.0
+        while not self._stop.wait(self.threshold / 2):
+            overdue = time.monotonic() - self._heartbeat - self.interval
+            if overdue < self.threshold or self._heartbeat == reported:
+                continue
+            reported = self._heartbeat
+            frame = sys._current_frames().get(self._loop_thread or 0)
+            stack = traceback.format_stack(frame, limit=20) if frame is not None else []
+            self.stalls += 1
+            self.slow_callbacks.append(
+                {
+                    "at": time.time(),
+                    "blocked_ms": round(overdue * 1000, 1),
+                    "stack": [line.strip() for line in stack],
+                }
+            )
+            del self.slow_callbacks[: -self.recent]
+            logger.warning(
+                "Event loop blocked for %.0f ms; loop thread is in:\n%s",
+                overdue * 1000,
+                "".join(stack[-8:]),
+            )
+
+    def start(self) -> None:
+        """Start on the running loop (idempotent)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True).start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_ms": round(self.interval * 1000, 1),
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "avg_lag_ms": round(self.total_lag / self.beats * 1000, 2) if self.beats else None,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stalls": self.stalls,
+            "slow_callbacks": list(self.slow_callbacks),
+        }
@@ -0,0 +1,137 @@
+"""
+Cached readiness probes refreshed in the background for load-balancer checks.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# A probe returns a short detail string when healthy and raises when it is not.
+Probe = Callable[[], Awaitable[str]]
+
+
+class ProbeFailed(Exception):
+    """Raised by a probe whose dependency is reachable but not usable."""
+
+
+class ReadinessMonitor:
+    """Runs probes every ``interval`` seconds and serves the last results.
+
+    Requests to ``/ready`` only read the cached results, so load-balancer
+    polling never multiplies traffic to the upstreams. The monitor reports
+    ready once it has been warmed up and every required probe passed within
+    the last ``stale_after`` seconds (three intervals by default).
+    """
+
+    def __init__(
+        self,
+        probes: Dict[str, Probe],
+        *,
+        interval: float = 30.0,
+        timeout: float = 5.0,
+        required: Optional[Iterable[str]] = None,
+        stale_after: Optional[float] = None,
+    ) -> None:
+        self.probes = probes
+        self.interval = interval
+        self.timeout = timeout
+        self.required = set(probes if required is None else required) & set(probes)
+        self.stale_after = stale_after if stale_after is not None else interval * 3
+        self.warmed_up = False
+        self.warm_up_steps: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def _run_probe(self, name: str, probe: Probe) -> None:
+        started = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(probe(), self.timeout)
+            ok = True
+        except asyncio.TimeoutError:
+            detail, ok = f"timed out after {self.timeout:g}s", False
+        except Exception as exc:  # noqa: BLE001 - any failure marks the probe down
+            detail, ok = str(exc) or type(exc).__name__, False
+        if not ok and self._results.get(name, {}).get("ok", True):
+            logger.warning("Readiness probe %s failed: %s", name, detail)
+        self._results[name] = {
+            "ok": ok,
+            "detail": detail,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "checked_at": time.time(),
+        }
+
+    async def run_once(self) -> None:
+        """Run every probe concurrently and store the results."""
+        await asyncio.gather(*(self._run_probe(name, probe) for name, probe in self.probes.items()))
+
+    async def warm_up(self, steps: Dict[str, Callable[[], Awaitable[Any]]]) -> None:
+        """Run warm-up steps, then a first probe round, then mark the monitor warm.
+
+        A failed step is recorded but does not block readiness on its own; the
+        probes decide whether the instance can take traffic.
+        """
+        for name, step in steps.items():
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(step(), self.timeout)
+                outcome: Dict[str, Any] = {"ok": True}
+            except Exception as exc:  # noqa: BLE001 - warm-up is best effort
+                logger.warning("Warm-up step %s failed: %s", name, exc)
+                outcome = {"ok": False, "detail": str(exc) or type(exc).__name__}
+            outcome["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self.warm_up_steps[name] = outcome
+        await self.run_once()
+        self.warmed_up = True
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def start(self) -> None:
+        """Start background refreshes on the running loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        checks: Dict[str, Any] = {}
+        ready = self.warmed_up
+        for name in self.probes:
+            result = self._results.get(name)
+            required = name in self.required
+            if result is None:
+                checks[name] = {"ok": False, "detail": "not checked yet", "required": required}
+                ready = ready and not required
+                continue
+            age = now - result["checked_at"]
+            passing = result["ok"] and age <= self.stale_after
+            checks[name] = {
+                **result,
+                "ok": passing,
+                "age_seconds": round(age, 1),
+                "required": required,
+            }
+            if result["ok"] and not passing:
+                checks[name]["detail"] = f"stale: last checked {age:.0f}s ago"
+            ready = ready and (passing or not required)
+        return {
+            "ready": ready,
+            "warmed_up": self.warmed_up,
+            "warm_up": self.warm_up_steps,
+            "interval_seconds": self.interval,
+            "checks": checks,
+        }
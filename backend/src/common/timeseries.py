@@ -0,0 +1,217 @@
+"""
+Bounded in-process time-series store - minute/hour rollups with latency sketches.
+"""
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+# Log-spaced latency buckets: each is 8% wider than the last, from 0.1 ms up to
+# roughly 8 minutes, so quantiles are within ~8% of the true value.
+SKETCH_GROWTH = 1.08
+SKETCH_MIN_MS = 0.1
+SKETCH_BUCKETS = 200
+
+RESOLUTIONS = {"minute": 60, "hour": 3600}
+
+
+class LatencySketch:
+    """Sparse log-bucket histogram; mergeable and constant-size per bucket."""
+
+    __slots__ = ("counts",)
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+
+    @staticmethod
+    def _index(ms: float) -> int:
+        if ms <= SKETCH_MIN_MS:
+            return 0
+        index = math.ceil(math.log(ms / SKETCH_MIN_MS, SKETCH_GROWTH))
+        return min(index, SKETCH_BUCKETS - 1)
+
+    def add(self, ms: float) -> None:
+        index = self._index(ms)
+        self.counts[index] = self.counts.get(index, 0) + 1
+
+    def merge(self, other: "LatencySketch") -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = sum(self.counts.values())
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return round(SKETCH_MIN_MS * SKETCH_GROWTH**index, 1)
+        return None
+
+
+class Rollup:
+    """Counters and a latency sketch for one time bucket."""
+
+    __slots__ = ("start", "count", "errors", "total_ms", "max_ms", "sketch")
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.sketch = LatencySketch()
+
+    def add(self, ms: float, ok: bool) -> None:
+        self.count += 1
+        self.errors += 0 if ok else 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.sketch.add(ms)
+
+    def merge(self, other: "Rollup") -> None:
+        self.count += other.count
+        self.errors += other.errors
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.sketch.merge(other.sketch)
+
+    def _quantile(self, q: float) -> Optional[float]:
+        value = self.sketch.quantile(q)
+        # Bucket bounds can overshoot; the true maximum is known exactly.
+        return min(value, round(self.max_ms, 1)) if value is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.count, 4) if self.count else None,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "max_ms": round(self.max_ms, 1) if self.count else None,
+            "p50_ms": self._quantile(0.50),
+            "p95_ms": self._quantile(0.95),
+            "p99_ms": self._quantile(0.99),
+        }
+
+
+class MetricSeries:
+    """Fixed-size rings of minute and hour rollups for one metric."""
+
+    def __init__(self, minute_buckets: int, hour_buckets: int) -> None:
+        self.rings: Dict[str, Deque[Rollup]] = {
+            "minute": deque(maxlen=minute_buckets),
+            "hour": deque(maxlen=hour_buckets),
+        }
+
+    def add(self, now: float, ms: float, ok: bool) -> None:
+        for resolution, ring in self.rings.items():
+            step = RESOLUTIONS[resolution]
+            start = int(now // step * step)
+            if not ring or ring[-1].start != start:
+                ring.append(Rollup(start))
+            ring[-1].add(ms, ok)
+
+
+def _split(metric: str) -> tuple[str, str]:
+    kind, _, name = metric.partition(":")
+    return kind, name
+
+
+class TimeSeriesStore:
+    """Records timed events per metric (``"<kind>:<name>"``) in bounded memory.
+
+    Each metric keeps ``minute_buckets`` minute rollups and ``hour_buckets``
+    hour rollups; once ``max_series`` metrics exist, new names within a kind
+    are folded into ``"<kind>:other"``.
+    """
+
+    def __init__(
+        self, minute_buckets: int = 180, hour_buckets: int = 168, max_series: int = 500
+    ) -> None:
+        self.minute_buckets = minute_buckets
+        self.hour_buckets = hour_buckets
+        self.max_series = max_series
+        self._series: Dict[str, MetricSeries] = {}
+
+    def record(
+        self, metric: str, seconds: float, ok: bool = True, now: Optional[float] = None
+    ) -> None:
+        series = self._series.get(metric)
+        if series is None:
+            if len(self._series) >= self.max_series:
+                metric = f"{_split(metric)[0]}:other"
+            series = self._series.get(metric)
+            if series is None:
+                series = self._series[metric] = MetricSeries(
+                    self.minute_buckets, self.hour_buckets
+                )
+        series.add(time.time() if now is None else now, seconds * 1000, ok)
+
+    def metrics(self) -> List[str]:
+        return sorted(self._series)
+
+    def _matching(self, selector: str) -> Iterable[MetricSeries]:
+        """Series for an exact metric, or every metric of a kind (``"tool"``)."""
+        if ":" in selector:
+            series = self._series.get(selector)
+            return [series] if series else []
+        return [series for metric, series in self._series.items() if _split(metric)[0] == selector]
+
+    def _resolution_for(self, window_minutes: int) -> str:
+        return "minute" if window_minutes <= self.minute_buckets else "hour"
+
+    def _window(self, selector: str, resolution: str, since: int) -> Rollup:
+        total = Rollup(since)
+        for series in self._matching(selector):
+            for rollup in series.rings[resolution]:
+                if rollup.start >= since:
+                    total.merge(rollup)
+        return total
+
+    def series(
+        self, selector: str, resolution: str = "minute", points: int = 60
+    ) -> List[Dict[str, Any]]:
+        """Dense per-bucket stats for the last ``points`` buckets, oldest first."""
+        step = RESOLUTIONS[resolution]
+        current = int(time.time() // step * step)
+        buckets = {
+            start: Rollup(start)
+            for start in range(current - (points - 1) * step, current + step, step)
+        }
+        for series in self._matching(selector):
+            for rollup in series.rings[resolution]:
+                if rollup.start in buckets:
+                    buckets[rollup.start].merge(rollup)
+        return [{"ts": start, **rollup.stats()} for start, rollup in buckets.items()]
+
+    def summary(self, window_minutes: int = 60, kind: Optional[str] = None) -> Dict[str, Any]:
+        """Totals, throughput and latency percentiles per kind and per metric."""
+        resolution = self._resolution_for(window_minutes)
+        step = RESOLUTIONS[resolution]
+        since = int((time.time() - window_minutes * 60) // step * step)
+
+        def describe(rollup: Rollup) -> Dict[str, Any]:
+            return {**rollup.stats(), "per_minute": round(rollup.count / window_minutes, 2)}
+
+        kinds = sorted({_split(metric)[0] for metric in self._series})
+        if kind is not None:
+            kinds = [name for name in kinds if name == kind]
+        metrics = []
+        for metric in self.metrics():
+            metric_kind, name = _split(metric)
+            if metric_kind in kinds:
+                rollup = self._window(metric, resolution, since)
+                if rollup.count:
+                    metrics.append(
+                        {"metric": metric, "kind": metric_kind, "name": name, **describe(rollup)}
+                    )
+        return {
+            "window_minutes": window_minutes,
+            "resolution": resolution,
+            "kinds": {name: describe(self._window(name, resolution, since)) for name in kinds},
+            "metrics": sorted(metrics, key=lambda item: item["count"], reverse=True),
+        }
@@ -0,0 +1,320 @@
+"""
+Local store for FHIR Bulk Data exports - NDJSON files plus a SQLite index.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..common import json_codec
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exports (
+    export_id TEXT PRIMARY KEY,
+    scope TEXT NOT NULL,
+    status_url TEXT,
+    state TEXT NOT NULL,
+    message TEXT,
+    created_at REAL NOT NULL,
+    completed_at REAL
+);
+CREATE TABLE IF NOT EXISTS export_files (
+    export_id TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    path TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    resources INTEGER NOT NULL,
+    PRIMARY KEY (export_id, path)
+);
+CREATE TABLE IF NOT EXISTS resources (
+    export_id TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    id TEXT NOT NULL,
+    patient TEXT,
+    status TEXT,
+    code TEXT,
+    date TEXT,
+    path TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS resources_patient
+    ON resources (export_id, resource_type, patient);
+CREATE INDEX IF NOT EXISTS resources_code
+    ON resources (export_id, resource_type, code);
+CREATE INDEX IF NOT EXISTS resources_id
+    ON resources (export_id, resource_type, id);
+"""
+
+GROUPABLE_COLUMNS = ("patient", "status", "code", "date")
+
+INDEX_BATCH_SIZE = 5000
+
+
+def _reference_id(
+    reference: Optional[Dict[str, Any]], resource_type: str = "Patient"
+) -> Optional[str]:
+    value = (reference or {}).get("reference", "")
+    prefix = f"{resource_type}/"
+    return value[len(prefix):] if value.startswith(prefix) else None
+
+
+def _concept_text(concept: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not concept:
+        return None
+    if concept.get("text"):
+        return concept["text"]
+    for coding in concept.get("coding", []):
+        if coding.get("display"):
+            return coding["display"]
+    return None
+
+
+def _index_columns(resource: Dict[str, Any]) -> Tuple[Optional[str], ...]:
+    """Return (patient, status, code, date) used to answer cohort queries."""
+
+    resource_type = resource.get("resourceType")
+    if resource_type == "Patient":
+        names = resource.get("name", [])
+        name = None
+        if names:
+            name = names[0].get("text") or " ".join(
+                names[0].get("given", []) + [names[0].get("family", "")]
+            ).strip()
+        return resource.get("id"), None, name, resource.get("birthDate")
+
+    patient = _reference_id(resource.get("subject")) or _reference_id(resource.get("patient"))
+    if patient is None:
+        for participant in resource.get("participant", []):
+            patient = _reference_id(participant.get("actor"))
+            if patient:
+                break
+
+    code = (
+        _concept_text(resource.get("medicationCodeableConcept"))
+        or (resource.get("medicationReference") or {}).get("display")
+        or _concept_text(resource.get("code"))
+        or next(
+            (text for text in map(_concept_text, resource.get("serviceType", [])) if text),
+            None,
+        )
+        or next(
+            (text for text in map(_concept_text, resource.get("reasonCode", [])) if text),
+            None,
+        )
+    )
+    date = (
+        resource.get("authoredOn")
+        or resource.get("start")
+        or resource.get("effectiveDateTime")
+        or (resource.get("meta") or {}).get("lastUpdated")
+    )
+    return patient, resource.get("status"), code, date
+
+
+class BulkExportStore:
+    """Tracks bulk exports on disk and indexes their NDJSON output.
+
+    Resources stay in the downloaded NDJSON files; the index only records a
+    handful of query columns plus the byte range of each line, so queries
+    touch SQLite indexes and read back just the matching resources.
+    """
+
+    def __init__(self, root: Path | str) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.root / "index.db", check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+
+    def export_dir(self, export_id: str) -> Path:
+        path = self.root / export_id
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def create_export(self, export_id: str, scope: str, status_url: Optional[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO exports (export_id, scope, status_url, state, created_at)"
+                " VALUES (?, ?, ?, 'in-progress', ?)",
+                (export_id, scope, status_url, time.time()),
+            )
+
+    def update_export(self, export_id: str, state: str, message: Optional[str] = None) -> None:
+        completed_at = time.time() if state in ("complete", "failed") else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE exports SET state = ?, message = ?, completed_at = ? WHERE export_id = ?",
+                (state, message, completed_at, export_id),
+            )
+
+    def get_export(self, export_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return an export record, defaulting to the latest completed export."""
+
+        with self._lock:
+            if export_id:
+                row = self._conn.execute(
+                    "SELECT * FROM exports WHERE export_id = ?", (export_id,)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT * FROM exports WHERE state = 'complete'"
+                    " ORDER BY completed_at DESC LIMIT 1"
+                ).fetchone()
+            if row is None:
+                return None
+            files = self._conn.execute(
+                "SELECT resource_type, path, bytes, resources FROM export_files"
+                " WHERE export_id = ?",
+                (row["export_id"],),
+            ).fetchall()
+        record = dict(row)
+        record["files"] = [dict(item) for item in files]
+        return record
+
+    def index_file(self, export_id: str, resource_type: str, path: Path) -> int:
+        """Index one downloaded NDJSON file line by line; returns the resource count.
+
+        Rows are committed every ``INDEX_BATCH_SIZE`` resources and the lock is
+        taken per batch only, so status and query calls are not held up for the
+        whole file. A file that fails to index leaves no rows behind.
+        """
+
+        count = 0
+        batch: List[Tuple[Any, ...]] = []
+        self._delete_rows(export_id, path)
+        try:
+            with open(path, "rb") as handle:
+                offset = 0
+                for line in handle:
+                    length = len(line)
+                    if line.strip():
+                        resource = json_codec.loads(line)
+                        batch.append(
+                            (
+                                export_id,
+                                resource.get("resourceType", resource_type),
+                                resource.get("id", ""),
+                                *_index_columns(resource),
+                                str(path),
+                                offset,
+                                length,
+                            )
+                        )
+                        count += 1
+                        if len(batch) >= INDEX_BATCH_SIZE:
+                            self._insert(batch)
+                            batch = []
+                    offset += length
+            with self._lock, self._conn:
+                if batch:
+                    self._insert_locked(batch)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO export_files"
+                    " (export_id, resource_type, path, bytes, resources) VALUES (?, ?, ?, ?, ?)",
+                    (export_id, resource_type, str(path), os.path.getsize(path), count),
+                )
+        except BaseException:
+            self._delete_rows(export_id, path)
+            raise
+        return count
+
+    def _delete_rows(self, export_id: str, path: Path) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM resources WHERE export_id = ? AND path = ?", (export_id, str(path))
+            )
+
+    def _insert(self, rows: Sequence[Tuple[Any, ...]]) -> None:
+        with self._lock, self._conn:
+            self._insert_locked(rows)
+
+    def _insert_locked(self, rows: Sequence[Tuple[Any, ...]]) -> None:
+        self._conn.executemany(
+            "INSERT INTO resources (export_id, resource_type, id, patient, status, code, date,"
+            " path, offset, length) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    @staticmethod
+    def _filters(
+        export_id: str,
+        resource_type: str,
+        *,
+        patient_id: Optional[str] = None,
+        status: Optional[str] = None,
+        code_contains: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        clauses = ["export_id = ?", "resource_type = ?"]
+        args: List[Any] = [export_id, resource_type]
+        if patient_id:
+            clauses.append("patient = ?")
+            args.append(patient_id)
+        if status:
+            clauses.append("status = ?")
+            args.append(status)
+        if code_contains:
+            clauses.append("code LIKE ?")
+            args.append(f"%{code_contains}%")
+        if date_from:
+            clauses.append("date >= ?")
+            args.append(date_from)
+        if date_to:
+            clauses.append("date <= ?")
+            args.append(date_to)
+        return " AND ".join(clauses), args
+
+    def query(
+        self, export_id: str, resource_type: str, *, limit: int = 50, **filters: Any
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return (total matches, first ``limit`` matching resources)."""
+
+        where, args = self._filters(export_id, resource_type, **filters)
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM resources WHERE {where}", args
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT path, offset, length FROM resources WHERE {where}"
+                " ORDER BY date DESC LIMIT ?",
+                [*args, limit],
+            ).fetchall()
+        return total, list(self._read_resources(rows))
+
+    def group_counts(
+        self, export_id: str, resource_type: str, group_by: str, *, limit: int = 50, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """Count matching resources and distinct patients per ``group_by`` value."""
+
+        if group_by not in GROUPABLE_COLUMNS:
+            raise ValueError(f"group_by must be one of {', '.join(GROUPABLE_COLUMNS)}")
+        where, args = self._filters(export_id, resource_type, **filters)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {group_by} AS value, COUNT(*) AS resources,"
+                f" COUNT(DISTINCT patient) AS patients FROM resources WHERE {where}"
+                f" GROUP BY {group_by} ORDER BY resources DESC LIMIT ?",
+                [*args, limit],
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _read_resources(rows: Sequence[sqlite3.Row]) -> Iterator[Dict[str, Any]]:
+        handles: Dict[str, Any] = {}
+        try:
+            for row in rows:
+                handle = handles.get(row["path"])
+                if handle is None:
+                    handle = handles[row["path"]] = open(row["path"], "rb")
+                handle.seek(row["offset"])
+                yield json_codec.loads(handle.read(row["length"]))
+        finally:
+            for handle in handles.values():
+                handle.close()
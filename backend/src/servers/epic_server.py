@@ -3,18 +3,45 @@ Epic MCP Server - Interact with Epic FHIR APIs for clinical workflows.
 """
 from __future__ import annotations
 
+import asyncio
+import logging
 import os
 import time
-from typing import Any, Callable, Dict, Optional
+import uuid
+import weakref
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+)
+from urllib.parse import parse_qsl
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-import aiohttp
 from fastmcp import FastMCP
+from fastmcp.tools.tool import ToolResult
 from pydantic import BaseModel, Field, model_validator
 
+from ..common import json_codec
+from ..common.readiness import ProbeFailed
+from .bulk_store import BulkExportStore
+from .epic_tenants import DEFAULT_TENANT, EpicTenant, load_tenants
+from .fhir_subscriptions import SUBSCRIBED_TYPES, patient_references
+from .upstream import UpstreamError, ignore_request_deadline, request_tenant
+
+logger = logging.getLogger(__name__)
 
 EPIC_BASE_URL: str = os.getenv(
     "EPIC_BASE_URL",
@@ -31,14 +58,150 @@ EPIC_DEFAULT_SCOPE: str = os.getenv(
     "system/Patient.read system/Appointment.read system/MedicationRequest.read",
 )
 
+# How record projections are pushed down to Epic: "elements" sends _elements,
+# "summary" sends _summary=true when the summary view covers the request, "off"
+# fetches full resources.
+EPIC_PROJECTION: str = os.getenv("EPIC_PROJECTION", "elements").lower()
+
+EPIC_BULK_EXPORT_DIR: str = os.getenv("EPIC_BULK_EXPORT_DIR", "data/epic_bulk")
+
+# Working sets for incremental appointment/medication reads. A full resync every
+# EPIC_SYNC_FULL_RESYNC_SECONDS reconciles hard deletions, which _lastUpdated
+# searches cannot see.
+EPIC_SYNC_STORE: str = os.getenv("EPIC_SYNC_STORE", "data/epic_sync.db")
+EPIC_SYNC_FULL_RESYNC_SECONDS: float = float(
+    os.getenv("EPIC_SYNC_FULL_RESYNC_SECONDS", str(24 * 60 * 60))
+)
+
 TOKEN_SAFETY_BUFFER_SECONDS = 30
-_TOKEN_CACHE: Dict[str, Any] = {"token": None, "expires_at": 0.0}
+BULK_POLL_INITIAL_SECONDS = 2.0
+BULK_POLL_MAX_SECONDS = 60.0
+BULK_DOWNLOAD_CHUNK_BYTES = 1 << 16
+BULK_DOWNLOAD_CONCURRENCY = 3
+SYNC_PAGE_SIZE = 100
+SYNC_MAX_PAGES = 50
+# Re-read a little before the watermark so writes committed while the previous
+# sync's search ran are not missed; overlapping resources merge idempotently.
+SYNC_OVERLAP_SECONDS = 5
+
+# Opt-in per-tenant fuzzy patient index (seconds a seen patient stays resolvable
+# locally; 0 disables it). search_patients answers exact identifier lookups from
+# it and offers name spelling variants from it when Epic finds nobody.
+EPIC_PATIENT_INDEX_TTL: float = float(os.getenv("EPIC_PATIENT_INDEX_TTL", "0"))
+EPIC_PATIENT_INDEX_MAX_ENTRIES: int = int(os.getenv("EPIC_PATIENT_INDEX_MAX_ENTRIES", "50000"))
+EPIC_PATIENT_INDEX_MIN_SCORE: float = float(os.getenv("EPIC_PATIENT_INDEX_MIN_SCORE", "0.8"))
+
+# Opt-in FHIR Subscriptions (rest-hook) for Patient, Appointment and
+# MedicationRequest changes on the patients whose data is cached. Set
+# EPIC_SUBSCRIPTION_ENDPOINT to the public URL of this server's /fhir/notify
+# receiver and EPIC_SUBSCRIPTION_SECRET to the bearer token notifications must
+# carry (these configure the default tenant; other tenants set their own
+# subscription_endpoint and subscription_secret_env). Watched patients' cached
+# responses and working sets then live for EPIC_SUBSCRIBED_CACHE_TTL seconds;
+# everything else keeps EPIC_CACHE_TTL.
+EPIC_SUBSCRIPTION_ENDPOINT: Optional[str] = os.getenv("EPIC_SUBSCRIPTION_ENDPOINT")
+EPIC_SUBSCRIPTION_SECRET: Optional[str] = os.getenv("EPIC_SUBSCRIPTION_SECRET")
+EPIC_SUBSCRIPTION_LEASE_SECONDS: float = float(
+    os.getenv("EPIC_SUBSCRIPTION_LEASE_SECONDS", "3600")
+)
+EPIC_SUBSCRIPTION_MAX_PATIENTS: int = int(os.getenv("EPIC_SUBSCRIPTION_MAX_PATIENTS", "500"))
+EPIC_SUBSCRIPTION_RETRY_SECONDS: float = float(
+    os.getenv("EPIC_SUBSCRIPTION_RETRY_SECONDS", "300")
+)
+EPIC_SUBSCRIBED_CACHE_TTL: float = float(os.getenv("EPIC_SUBSCRIBED_CACHE_TTL", "900"))
+
+# Connections kept open per organization.
+EPIC_POOL_SIZE: int = int(os.getenv("EPIC_POOL_SIZE", "20"))
+# Tenant used when a call names none (the chat API sends X-Fuse-Tenant); set it
+# empty to make every call name its organization.
+EPIC_DEFAULT_TENANT: str = os.getenv("EPIC_DEFAULT_TENANT", DEFAULT_TENANT)
+
+# One entry per organization: the env-configured "default" tenant plus any from
+# EPIC_TENANTS_FILE / EPIC_TENANTS. Each has its own token, connection pool,
+# sync/bulk stores and Upstream - timeouts, breakers and a short-lived response
+# cache (EPIC_CONNECT_TIMEOUT, EPIC_READ_TIMEOUT, EPIC_BREAKER_FAILURES,
+# EPIC_BREAKER_RESET, EPIC_HEDGE, EPIC_CACHE_TTL, or EPIC_<KEY>_* per tenant). The
+# cache lets speculative prefetches from the chat API warm reads that the
+# approved plan then repeats.
+EPIC_TENANTS: Dict[str, EpicTenant] = load_tenants(
+    {
+        "base_url": EPIC_BASE_URL,
+        "auth_url": EPIC_AUTH_URL,
+        "client_id": EPIC_CLIENT_ID,
+        "client_secret": EPIC_CLIENT_SECRET,
+        "scope": EPIC_DEFAULT_SCOPE,
+        "sync_store": EPIC_SYNC_STORE,
+        "bulk_export_dir": EPIC_BULK_EXPORT_DIR,
+        "pool_size": EPIC_POOL_SIZE,
+        "patient_index_ttl": EPIC_PATIENT_INDEX_TTL,
+        "patient_index_max_entries": EPIC_PATIENT_INDEX_MAX_ENTRIES,
+        "patient_index_min_score": EPIC_PATIENT_INDEX_MIN_SCORE,
+        "subscription_endpoint": EPIC_SUBSCRIPTION_ENDPOINT,
+        "subscription_secret": EPIC_SUBSCRIPTION_SECRET,
+        "subscription_lease": EPIC_SUBSCRIPTION_LEASE_SECONDS,
+        "subscription_max_patients": EPIC_SUBSCRIPTION_MAX_PATIENTS,
+        "subscription_retry": EPIC_SUBSCRIPTION_RETRY_SECONDS,
+        "subscribed_cache_ttl": EPIC_SUBSCRIBED_CACHE_TTL,
+    }
+)
 
 
 epic_server = FastMCP("EpicMCP")
 
+OutputMode = Literal["text", "json", "minimal"]
+
+
+class PatientRecord(TypedDict, total=False):
+    id: str
+    name: str
+    gender: str
+    birthDate: str
+    mrn: str
+    identifiers: List[Dict[str, str]]
+    telecom: List[Dict[str, str]]
+    addresses: List[str]
+
+
+class AppointmentRecord(TypedDict, total=False):
+    id: str
+    status: str
+    start: str
+    end: str
+    reasons: List[str]
+    participants: List[Dict[str, Any]]
+
+
+class MedicationRecord(TypedDict, total=False):
+    id: str
+    medication: str
+    status: str
+    prescriber: str
+    authoredOn: str
+    dosage: List[str]
+
+
+class OutputOptions(BaseModel):
+    """Controls how Epic tool results are rendered for the calling agent."""
+
+    output_mode: OutputMode = Field(
+        "text",
+        description=(
+            "text: readable multi-line summary; json: compact JSON records returned as "
+            "structured content; minimal: compact JSON limited to key fields with empty "
+            "values dropped"
+        ),
+    )
+    fields: Optional[List[str]] = Field(
+        None,
+        description=(
+            "Optional field projection for json/minimal output, e.g. "
+            "['name', 'birthDate', 'mrn']. Pass an empty list to return only the "
+            "match count."
+        ),
+    )
+
 
-class PatientSearchRequest(BaseModel):
+class PatientSearchRequest(OutputOptions):
     """Parameters accepted by Epic's FHIR /Patient search endpoint."""
 
     given: Optional[str] = Field(None, description="Given name (first name) to search for")
@@ -57,6 +220,14 @@ class PatientSearchRequest(BaseModel):
         le=100,
         description="Number of records to return per page (_count parameter)",
     )
+    use_local_index: bool = Field(
+        True,
+        description=(
+            "Use the index of recently seen patients: an exact identifier match is "
+            "answered locally, and when Epic finds nobody, close name spellings seen "
+            "recently are offered as candidates; set false to use Epic only"
+        ),
+    )
 
     @model_validator(mode="after")
     def _ensure_search_params(self) -> "PatientSearchRequest":
@@ -67,7 +238,7 @@ class PatientSearchRequest(BaseModel):
         return self
 
 
-class AppointmentSearchRequest(BaseModel):
+class AppointmentSearchRequest(OutputOptions):
     """Parameters for querying Epic FHIR /Appointment endpoint."""
 
     patient_id: str = Field(..., description="FHIR Patient ID (e.g., 12345)")
@@ -89,40 +260,121 @@ class AppointmentSearchRequest(BaseModel):
         le=100,
         description="Number of appointments to return (_count parameter)",
     )
+    incremental: bool = Field(
+        False,
+        description=(
+            "Answer from a local working set refreshed with only the appointments "
+            "changed since the last call for this patient; use when polling"
+        ),
+    )
+
+
+class BulkExportRequest(BaseModel):
+    """Parameters for a FHIR Bulk Data $export kick-off."""
+
+    group_id: Optional[str] = Field(
+        None,
+        description="FHIR Group ID to export (e.g., a clinic panel); omit for a system export",
+    )
+    resource_types: List[str] = Field(
+        default_factory=lambda: ["Patient", "Appointment", "MedicationRequest"],
+        description="Resource types to export (_type parameter)",
+    )
+    since: Optional[str] = Field(
+        None,
+        description="Only export resources updated after this instant (_since, ISO 8601)",
+    )
+    wait: bool = Field(
+        False,
+        description="Wait for the export to finish downloading instead of returning its ID",
+    )
+    max_wait_seconds: int = Field(
+        900,
+        ge=10,
+        le=6 * 60 * 60,
+        description="How long to keep polling Epic before giving up on the export",
+    )
+
+
+class BulkQueryRequest(OutputOptions):
+    """Filters for querying resources downloaded by a bulk export."""
+
+    export_id: Optional[str] = Field(
+        None,
+        description="Export to query; defaults to the most recently completed export",
+    )
+    resource_type: str = Field("Patient", description="Resource type to query")
+    patient_id: Optional[str] = Field(None, description="Only resources for this patient")
+    status: Optional[str] = Field(None, description="Exact resource status (e.g., active)")
+    code_contains: Optional[str] = Field(
+        None,
+        description="Substring of the medication/code/service text (or patient name)",
+    )
+    date_from: Optional[str] = Field(
+        None, description="Lower bound on the authored/start/birth date (ISO 8601)"
+    )
+    date_to: Optional[str] = Field(
+        None, description="Upper bound on the authored/start/birth date (ISO 8601)"
+    )
+    group_by: Optional[Literal["patient", "status", "code", "date"]] = Field(
+        None,
+        description="Return resource and distinct-patient counts per value instead of records",
+    )
+    limit: int = Field(50, ge=1, le=1000, description="Maximum records or groups to return")
+
+
+def _tenant(key: Optional[str] = None) -> EpicTenant | str:
+    """Resolve the tenant for the current call, or return an error message."""
+
+    key = key or request_tenant() or EPIC_DEFAULT_TENANT
+    if not key:
+        return "Error: No Epic organization selected; send the X-Fuse-Tenant header."
+    tenant = EPIC_TENANTS.get(key)
+    if tenant is None:
+        return f"Error: Unknown Epic organization '{key}'."
+    return tenant
 
 
-async def _get_access_token(session: aiohttp.ClientSession) -> Optional[str]:
-    """Return a cached OAuth token or request a new one from Epic."""
+async def _get_access_token(tenant: EpicTenant) -> Optional[str]:
+    """Return the tenant's cached OAuth token or request a new one from Epic.
 
-    now = time.time()
-    token = _TOKEN_CACHE["token"]
-    expires_at = _TOKEN_CACHE["expires_at"]
-    if token and expires_at - TOKEN_SAFETY_BUFFER_SECONDS > now:
-        return token
+    Concurrent callers share one token request per tenant.
+    """
 
-    if not (EPIC_CLIENT_ID and EPIC_CLIENT_SECRET):
+    if not tenant.requires_auth:
         return None
 
-    payload = {
-        "grant_type": "client_credentials",
-        "client_id": EPIC_CLIENT_ID,
-        "client_secret": EPIC_CLIENT_SECRET,
-        "scope": EPIC_DEFAULT_SCOPE,
-    }
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    async with tenant.token_lock:
+        now = time.time()
+        token = tenant.token_cache["token"]
+        if token and tenant.token_cache["expires_at"] - TOKEN_SAFETY_BUFFER_SECONDS > now:
+            return token
+
+        payload = {
+            "grant_type": "client_credentials",
+            "client_id": tenant.client_id,
+            "client_secret": tenant.client_secret,
+            "scope": tenant.scope,
+        }
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
-    async with session.post(EPIC_AUTH_URL, data=payload, headers=headers) as response:
+        try:
+            response = await tenant.upstream.request(
+                tenant.session(), "POST", tenant.auth_url, data=payload, headers=headers
+            )
+        except UpstreamError:
+            return None
         if response.status != 200:
-            _TOKEN_CACHE.update({"token": None, "expires_at": 0.0})
+            tenant.token_cache.update({"token": None, "expires_at": 0.0})
             return None
 
-        data = await response.json()
+        data = response.json()
         access_token = data.get("access_token")
         expires_in = data.get("expires_in", 0)
         if not access_token:
             return None
 
-        _TOKEN_CACHE.update(
+        tenant.token_cache.update(
             {
                 "token": access_token,
                 "expires_at": now + float(expires_in),
@@ -131,43 +383,248 @@ async def _get_access_token(session: aiohttp.ClientSession) -> Optional[str]:
         return access_token
 
 
-async def _epic_get(resource_path: str, *, params: Optional[Dict[str, Any]] = None) -> Any:
-    """Helper to perform a GET against Epic's FHIR API."""
+async def probe_access_token() -> str:
+    """Readiness probe: make sure every tenant has a usable OAuth token cached.
 
-    url = f"{EPIC_BASE_URL.rstrip('/')}/{resource_path.lstrip('/')}"
+    Runs on the readiness interval, so tokens are renewed in the background
+    before they expire instead of on the first clinical request after expiry.
+    """
 
-    async with aiohttp.ClientSession() as session:
-        token = await _get_access_token(session)
-        headers = {
-            "Accept": "application/fhir+json",
-        }
-
-        if EPIC_CLIENT_ID and EPIC_CLIENT_SECRET:
-            if not token:
-                return (
-                    "Error: Unable to acquire Epic access token. Check EPIC_CLIENT_ID and "
-                    "EPIC_CLIENT_SECRET environment variables."
-                )
-            headers["Authorization"] = f"Bearer {token}"
+    tenants = list(EPIC_TENANTS.values())
+    tokens = await asyncio.gather(*(_get_access_token(tenant) for tenant in tenants))
+    details, failed = [], []
+    for tenant, token in zip(tenants, tokens):
+        if not tenant.requires_auth:
+            details.append(f"{tenant.key}: no client credentials; requests are unauthenticated")
+        elif not token:
+            failed.append(tenant.key)
         else:
-            # Some sandbox endpoints allow unauthenticated requests; warn user.
-            headers["Epic-Sandbox-Mode"] = "true"
+            remaining = int(tenant.token_cache["expires_at"] - time.time())
+            details.append(f"{tenant.key}: token valid for {remaining}s")
+    if failed:
+        raise ProbeFailed(f"Epic token endpoint did not issue a token for {', '.join(failed)}")
+    return "; ".join(details)
 
-        async with session.get(url, params=params, headers=headers) as response:
-            if response.status != 200:
-                error_body = await response.text()
-                return (
-                    f"Error: Epic API request to {resource_path} failed with status "
-                    f"{response.status}. Response: {error_body}"
+
+async def close_sessions() -> None:
+    """Close every tenant's connection pool (e.g. after warming up on another loop)."""
+
+    await asyncio.gather(*(tenant.close() for tenant in EPIC_TENANTS.values()))
+
+
+async def _auth_headers(
+    tenant: EpicTenant, accept: str = "application/fhir+json"
+) -> Dict[str, str] | str:
+    """Build request headers for Epic, or return an error message."""
+
+    headers = {"Accept": accept}
+
+    if tenant.requires_auth:
+        token = await _get_access_token(tenant)
+        if not token:
+            return (
+                f"Error: Unable to acquire an Epic access token for '{tenant.key}'. Check "
+                "its client ID and secret."
+            )
+        headers["Authorization"] = f"Bearer {token}"
+    else:
+        # Some sandbox endpoints allow unauthenticated requests; warn user.
+        headers["Epic-Sandbox-Mode"] = "true"
+    return headers
+
+
+async def _epic_get(
+    resource_path: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    decode_keys: Optional[Iterable[str]] = None,
+    tenant: Optional[EpicTenant] = None,
+    cacheable: bool = True,
+) -> Any:
+    """Helper to perform a GET against Epic's FHIR API.
+
+    ``decode_keys`` limits JSON decoding to those resource elements when a
+    projecting decoder is available. The tenant defaults to the one the
+    current call names; ``cacheable=False`` always asks Epic.
+    """
+
+    tenant = tenant or _tenant()
+    if isinstance(tenant, str):
+        return tenant
+
+    headers = await _auth_headers(tenant)
+    if isinstance(headers, str):
+        return headers
+
+    try:
+        response = await tenant.upstream.request(
+            tenant.session(),
+            "GET",
+            tenant.url(resource_path),
+            params=params,
+            headers=headers,
+            cacheable=cacheable,
+        )
+    except UpstreamError as exc:
+        return f"Error: {exc}"
+
+    if response.status != 200:
+        return (
+            f"Error: Epic API request to {resource_path} failed with status "
+            f"{response.status}. Response: {response.text()}"
+        )
+    content_type = response.headers.get("Content-Type", "")
+    if "json" not in content_type:
+        return response.text()
+    data = json_codec.loads_projected(response.body, decode_keys)
+    _track_patients(tenant, resource_path, params, headers, data)
+    return data
+
+
+def _response_patients(
+    resource_path: str, params: Optional[Dict[str, Any]], data: Any
+) -> set[str]:
+    """Patients a Patient, Appointment or MedicationRequest read or search is about."""
+
+    path, _, query = resource_path.partition("?")
+    if params is None and query:
+        # Follow-up pages carry their search parameters in the path.
+        params = dict(parse_qsl(query))
+    resource_type, _, resource_id = path.strip("/").partition("/")
+    if resource_type not in SUBSCRIBED_TYPES:
+        return set()
+    patients = set()
+    if resource_type == "Patient" and resource_id:
+        patients.add(resource_id)
+    if params and params.get("patient"):
+        patients.add(str(params["patient"]))
+    if resource_type == "Patient" and isinstance(data, dict) and data.get("entry"):
+        patients.update(
+            entry["resource"]["id"]
+            for entry in data["entry"]
+            if (entry.get("resource") or {}).get("resourceType") == "Patient"
+            and entry["resource"].get("id")
+        )
+    return patients
+
+
+def _track_patients(
+    tenant: EpicTenant,
+    resource_path: str,
+    params: Optional[Dict[str, Any]],
+    headers: Dict[str, str],
+    data: Any,
+) -> None:
+    """Tag a cached response with the patients it covers and watch them for changes.
+
+    The response keeps the plain cache TTL unless every one of its patients
+    was already watched when it was requested.
+    """
+
+    patients = _response_patients(resource_path, params, data)
+    if not patients:
+        return
+    registry = tenant.subscriptions
+    ttl = not_before = None
+    if registry is not None:
+        since = [
+            registry.watched_since(patient, tenant.subscribed_cache_ttl) for patient in patients
+        ]
+        if all(value is not None for value in since):
+            ttl = tenant.subscribed_cache_ttl
+            not_before = time.monotonic() - (time.time() - max(since))
+    tenant.upstream.tag_cached(
+        "GET",
+        tenant.url(resource_path),
+        params=params,
+        headers=headers,
+        tags=[f"Patient/{patient}" for patient in patients],
+        ttl=ttl,
+        ttl_not_before=not_before,
+    )
+    if registry is not None:
+        claimed = registry.claim(sorted(patients))
+        if claimed:
+            task = asyncio.create_task(_register_subscriptions(tenant, claimed))
+            _SUBSCRIPTION_TASKS.add(task)
+            task.add_done_callback(_SUBSCRIPTION_TASKS.discard)
+
+
+_SUBSCRIPTION_TASKS: set[asyncio.Task] = set()
+
+
+async def _epic_send(
+    tenant: EpicTenant, method: str, resource_path: str, body: Optional[Dict[str, Any]] = None
+) -> Any:
+    """Send a write to Epic's FHIR API; returns the response or an error message."""
+
+    headers = await _auth_headers(tenant)
+    if isinstance(headers, str):
+        return headers
+    if body is not None:
+        headers["Content-Type"] = "application/fhir+json"
+    try:
+        return await tenant.upstream.request(
+            tenant.session(),
+            method,
+            tenant.url(resource_path),
+            data=json_codec.dumps(body) if body is not None else None,
+            headers=headers,
+        )
+    except UpstreamError as exc:
+        return f"Error: {exc}"
+
+
+def _created_id(response: Any) -> Optional[str]:
+    if isinstance(response, str) or response.status not in (200, 201):
+        return None
+    if "json" in response.headers.get("Content-Type", ""):
+        created = response.json().get("id")
+        if created:
+            return str(created)
+    # Location: <base>/Subscription/<id>[/_history/<version>]
+    location = response.headers.get("Location", "").split("/_history/")[0]
+    return location.rstrip("/").rsplit("/", 1)[-1] or None
+
+
+async def _delete_subscriptions(tenant: EpicTenant, subscription_ids: Iterable[str]) -> None:
+    # Best effort: a subscription left behind still ends with its lease.
+    for subscription_id in subscription_ids:
+        await _epic_send(tenant, "DELETE", f"Subscription/{subscription_id}")
+
+
+async def _register_subscriptions(tenant: EpicTenant, patients: List[str]) -> None:
+    """Create a Subscription per watched type for each patient, in the background.
+
+    The first refusal marks the tenant's subscriptions unavailable for a
+    while; cached data for its patients then simply expires by TTL.
+    """
+
+    ignore_request_deadline()
+    registry = tenant.subscriptions
+    for position, patient in enumerate(patients):
+        created: Dict[str, str] = {}
+        for resource_type in SUBSCRIBED_TYPES:
+            body = registry.subscription(tenant.key, patient, resource_type)
+            response = await _epic_send(tenant, "POST", "Subscription", body)
+            subscription_id = _created_id(response)
+            if subscription_id is None:
+                reason = (
+                    response
+                    if isinstance(response, str)
+                    else f"Epic refused the Subscription with status {response.status}"
                 )
-            content_type = response.headers.get("Content-Type", "")
-            if "json" not in content_type:
-                return await response.text()
-            return await response.json()
+                registry.fail(patients[position:], reason)
+                await _delete_subscriptions(tenant, created.values())
+                return
+            created[resource_type] = subscription_id
+        await _delete_subscriptions(tenant, registry.activate(patient, created))
 
 
-def _format_patient(resource: Dict[str, Any]) -> str:
-    """Convert a FHIR Patient resource into a readable summary."""
+def _patient_record(
+    resource: Dict[str, Any], included: Optional[Dict[str, Dict[str, Any]]] = None
+) -> PatientRecord:
+    """Extract the fields our tools expose from a FHIR Patient resource."""
 
     names = []
     for name in resource.get("name", []):
@@ -176,72 +633,106 @@ def _format_patient(resource: Dict[str, Any]) -> str:
         full_name = " ".join(part for part in [given, family] if part)
         if full_name:
             names.append(full_name)
-    display_name = names[0] if names else "Unknown"
 
     identifiers = []
+    mrn = None
     for identifier in resource.get("identifier", []):
-        system = identifier.get("system", "")
         value = identifier.get("value", "")
-        if value:
-            identifiers.append(f"{system}: {value}" if system else value)
+        if not value:
+            continue
+        identifiers.append({"system": identifier.get("system", ""), "value": value})
+        id_type = identifier.get("type", {})
+        type_codes = {coding.get("code") for coding in id_type.get("coding", [])}
+        if mrn is None and ("MR" in type_codes or id_type.get("text") in ("MRN", "EPI")):
+            mrn = value
 
     telecoms = []
     for telecom in resource.get("telecom", []):
         number = telecom.get("value")
-        use = telecom.get("use")
         if number:
-            telecoms.append(f"{use}: {number}" if use else number)
+            telecoms.append({"use": telecom.get("use", ""), "value": number})
+
+    addresses = []
+    for address in resource.get("address", []):
+        parts = address.get("line", []) + [
+            address.get("city"),
+            address.get("state"),
+            address.get("postalCode"),
+        ]
+        addresses.append(", ".join(part for part in parts if part))
+
+    record: PatientRecord = {
+        "id": resource.get("id", "Unknown"),
+        "name": names[0] if names else "Unknown",
+        "gender": resource.get("gender", "unknown"),
+        "birthDate": resource.get("birthDate", "Unknown"),
+        "identifiers": identifiers,
+        "telecom": telecoms,
+        "addresses": addresses,
+    }
+    if mrn:
+        record["mrn"] = mrn
+    return record
 
-    gender = resource.get("gender", "unknown").title()
-    birth_date = resource.get("birthDate", "Unknown")
+
+def _format_patient(record: PatientRecord) -> str:
+    """Convert a patient record into a readable summary."""
+
+    identifiers = [
+        f"{item['system']}: {item['value']}" if item["system"] else item["value"]
+        for item in record["identifiers"]
+    ]
+    telecoms = [
+        f"{item['use']}: {item['value']}" if item["use"] else item["value"]
+        for item in record["telecom"]
+    ]
 
     lines = [
-        f"Patient: {display_name} (ID: {resource.get('id', 'Unknown')})",
-        f"Gender: {gender}",
-        f"Birth Date: {birth_date}",
+        f"Patient: {record['name']} (ID: {record['id']})",
+        f"Gender: {record['gender'].title()}",
+        f"Birth Date: {record['birthDate']}",
     ]
 
     if identifiers:
         lines.append("Identifiers: " + "; ".join(identifiers))
     if telecoms:
         lines.append("Contact: " + "; ".join(telecoms))
-
-    addresses = resource.get("address", [])
-    if addresses:
-        formatted_addresses = []
-        for address in addresses:
-            parts = address.get("line", []) + [
-                address.get("city"),
-                address.get("state"),
-                address.get("postalCode"),
-            ]
-            formatted_addresses.append(
-                ", ".join(part for part in parts if part)
-            )
-        lines.append("Addresses: " + " | ".join(formatted_addresses))
+    if record["addresses"]:
+        lines.append("Addresses: " + " | ".join(record["addresses"]))
 
     return "\n".join(lines)
 
 
-def _format_bundle(
-    bundle: Dict[str, Any], *, resource_formatter: Callable[[Dict[str, Any]], str]
-) -> str:
-    entries = bundle.get("entry", [])
-    if not entries:
-        return "No records found."
-
-    formatted_entries = []
-    for entry in entries:
-        resource = entry.get("resource", {})
-        formatted_entries.append(resource_formatter(resource))
+def _resolve_reference(
+    reference: Dict[str, Any], included: Optional[Dict[str, Dict[str, Any]]]
+) -> Optional[Dict[str, Any]]:
+    """Look up a referenced resource among the ``_include`` entries of a bundle."""
 
-    return "\n\n".join(formatted_entries)
+    if not included or not reference.get("reference"):
+        return None
+    return included.get(reference["reference"])
 
 
-def _format_appointment(resource: Dict[str, Any]) -> str:
-    status = resource.get("status", "unknown")
-    start = resource.get("start", "Unknown start")
-    end = resource.get("end", "Unknown end")
+def _reference_display(
+    reference: Dict[str, Any], included: Optional[Dict[str, Dict[str, Any]]], default: str
+) -> str:
+    if reference.get("display"):
+        return reference["display"]
+    resource = _resolve_reference(reference, included)
+    if resource:
+        for name in resource.get("name", []):
+            if name.get("text"):
+                return name["text"]
+            full_name = " ".join(name.get("given", []) + [name.get("family", "")]).strip()
+            if full_name:
+                return full_name
+    return reference.get("reference", default)
+
+
+def _appointment_record(
+    resource: Dict[str, Any], included: Optional[Dict[str, Dict[str, Any]]] = None
+) -> AppointmentRecord:
+    """Extract the fields our tools expose from a FHIR Appointment resource."""
 
     reasons = []
     for reason in resource.get("reasonCode", []):
@@ -257,27 +748,331 @@ def _format_appointment(resource: Dict[str, Any]) -> str:
             for coding in type_info.get("coding", []):
                 if coding.get("display"):
                     role_codes.append(coding["display"])
-        actor = participant.get("actor", {})
-        actor_display = actor.get("display") or actor.get("reference", "Unknown")
         participants.append(
-            f"{actor_display} ({', '.join(role_codes)})" if role_codes else actor_display
+            {
+                "actor": _reference_display(participant.get("actor", {}), included, "Unknown"),
+                "roles": role_codes,
+            }
         )
 
+    return {
+        "id": resource.get("id", "Unknown"),
+        "status": resource.get("status", "unknown"),
+        "start": resource.get("start", "Unknown start"),
+        "end": resource.get("end", "Unknown end"),
+        "reasons": reasons,
+        "participants": participants,
+    }
+
+
+def _format_appointment(record: AppointmentRecord) -> str:
+    participants = [
+        f"{item['actor']} ({', '.join(item['roles'])})" if item["roles"] else item["actor"]
+        for item in record["participants"]
+    ]
+
     lines = [
-        f"Appointment ID: {resource.get('id', 'Unknown')} - Status: {status}",
-        f"Start: {start}",
-        f"End: {end}",
+        f"Appointment ID: {record['id']} - Status: {record['status']}",
+        f"Start: {record['start']}",
+        f"End: {record['end']}",
     ]
-    if reasons:
-        lines.append("Reasons: " + ", ".join(reasons))
+    if record["reasons"]:
+        lines.append("Reasons: " + ", ".join(record["reasons"]))
     if participants:
         lines.append("Participants: " + "; ".join(participants))
 
     return "\n".join(lines)
 
 
-async def _require_patient_resource(patient_id: str) -> Any:
-    data = await _epic_get(f"Patient/{patient_id}")
+def _medication_record(
+    resource: Dict[str, Any], included: Optional[Dict[str, Dict[str, Any]]] = None
+) -> MedicationRecord:
+    """Extract the fields our tools expose from a FHIR MedicationRequest resource."""
+
+    med = resource.get("medicationCodeableConcept")
+    if med is None:
+        reference = resource.get("medicationReference", {})
+        medication = _resolve_reference(reference, included) or {}
+        med = medication.get("code") or {"text": reference.get("display")}
+    coding_display = next(
+        (
+            coding.get("display")
+            for coding in med.get("coding", [])
+            if coding.get("display")
+        ),
+        None,
+    )
+    dosage = []
+    for instruction in resource.get("dosageInstruction", []):
+        text = instruction.get("text")
+        if text:
+            dosage.append(text)
+
+    return {
+        "id": resource.get("id", "Unknown"),
+        "medication": med.get("text") or coding_display or "Unknown medication",
+        "status": resource.get("status", "unknown"),
+        "prescriber": _reference_display(
+            resource.get("requester", {}), included, "Unknown prescriber"
+        ),
+        "authoredOn": resource.get("authoredOn", "Unknown date"),
+        "dosage": dosage,
+    }
+
+
+def _format_medication(record: MedicationRecord) -> str:
+    return "\n".join(
+        filter(
+            None,
+            [
+                f"Medication: {record['medication']}",
+                f"Status: {record['status']}",
+                f"Prescriber: {record['prescriber']}",
+                f"Authored On: {record['authoredOn']}",
+                "Dosage: " + " | ".join(record["dosage"]) if record["dosage"] else None,
+            ],
+        )
+    )
+
+
+def _project(record: Dict[str, Any], fields: Sequence[str], *, drop_empty: bool) -> Dict[str, Any]:
+    return {
+        name: record[name]
+        for name in fields
+        if name in record and not (drop_empty and record[name] in (None, "", [], {}))
+    }
+
+
+@dataclass(frozen=True)
+class ResourceView:
+    """How one FHIR resource type is extracted, rendered and projected for agents."""
+
+    resource_type: str
+    record_extractor: Callable[..., Dict[str, Any]]
+    text_formatter: Callable[[Any], str]
+    # Record field -> FHIR elements it is derived from.
+    field_elements: Dict[str, Sequence[str]]
+    minimal_fields: Sequence[str]
+    # Elements marked isSummary in the FHIR R4 definition of the resource.
+    summary_elements: frozenset[str]
+    # Record field -> _include needed to resolve its references in one round trip.
+    field_includes: Dict[str, str] = field(default_factory=dict)
+    # Elements read from the included resources.
+    include_elements: Sequence[str] = ()
+    empty_message: str = "No records found."
+
+    @property
+    def fields(self) -> Sequence[str]:
+        return tuple(self.field_elements)
+
+    def decode_keys(self, fields: Sequence[str]) -> set[str]:
+        """Resource elements worth decoding from a response for ``fields``."""
+
+        keys = {element for name in fields for element in self.field_elements[name]}
+        if any(name in self.field_includes for name in fields):
+            keys.update(self.include_elements)
+        return keys
+
+
+PATIENT_VIEW = ResourceView(
+    resource_type="Patient",
+    record_extractor=_patient_record,
+    text_formatter=_format_patient,
+    field_elements={
+        "id": ("id",),
+        "name": ("name",),
+        "gender": ("gender",),
+        "birthDate": ("birthDate",),
+        "mrn": ("identifier",),
+        "identifiers": ("identifier",),
+        "telecom": ("telecom",),
+        "addresses": ("address",),
+    },
+    minimal_fields=("id", "name", "birthDate", "mrn"),
+    summary_elements=frozenset(
+        {"id", "identifier", "active", "name", "telecom", "gender", "birthDate", "address"}
+    ),
+)
+
+APPOINTMENT_VIEW = ResourceView(
+    resource_type="Appointment",
+    record_extractor=_appointment_record,
+    text_formatter=_format_appointment,
+    field_elements={
+        "id": ("id",),
+        "status": ("status",),
+        "start": ("start",),
+        "end": ("end",),
+        "reasons": ("reasonCode",),
+        "participants": ("participant",),
+    },
+    minimal_fields=("id", "status", "start"),
+    summary_elements=frozenset(
+        {"id", "identifier", "status", "serviceType", "start", "end", "participant"}
+    ),
+    field_includes={"participants": "Appointment:practitioner"},
+    include_elements=("name",),
+)
+
+MEDICATION_VIEW = ResourceView(
+    resource_type="MedicationRequest",
+    record_extractor=_medication_record,
+    text_formatter=_format_medication,
+    field_elements={
+        "id": ("id",),
+        "medication": ("medicationCodeableConcept", "medicationReference"),
+        "status": ("status",),
+        "prescriber": ("requester",),
+        "authoredOn": ("authoredOn",),
+        "dosage": ("dosageInstruction",),
+    },
+    minimal_fields=("medication", "status", "dosage"),
+    summary_elements=frozenset(
+        {
+            "id",
+            "identifier",
+            "status",
+            "intent",
+            "medicationCodeableConcept",
+            "medicationReference",
+            "subject",
+            "authoredOn",
+            "requester",
+        }
+    ),
+    field_includes={
+        "medication": "MedicationRequest:medication",
+        "prescriber": "MedicationRequest:requester",
+    },
+    include_elements=("code", "name"),
+    empty_message="No active medications found.",
+)
+
+
+_RESOURCE_VIEWS: Dict[str, ResourceView] = {
+    view.resource_type: view for view in (PATIENT_VIEW, APPOINTMENT_VIEW, MEDICATION_VIEW)
+}
+
+
+def _requested_fields(view: ResourceView, options: OutputOptions) -> Sequence[str] | str:
+    """Return the record fields the requested output needs, or an error message."""
+
+    if options.output_mode == "text":
+        return view.fields
+    if options.fields is not None:
+        unknown = [name for name in options.fields if name not in view.field_elements]
+        if unknown:
+            return (
+                f"Error: Unknown {view.resource_type} fields requested: {', '.join(unknown)}. "
+                f"Available fields: {', '.join(view.fields)}"
+            )
+        return options.fields
+    if options.output_mode == "minimal":
+        return view.minimal_fields
+    return view.fields
+
+
+def _projection_params(
+    view: ResourceView, fields: Sequence[str], *, search: bool = True
+) -> Dict[str, Any]:
+    """Translate the fields a formatter needs into FHIR projection parameters.
+
+    An empty projection on a search only needs the match count. Otherwise the
+    elements behind the requested fields are sent as ``_elements`` (or as
+    ``_summary=true`` when configured and the summary view covers them), and
+    referenced resources the fields display are pulled in with ``_include``.
+    """
+
+    if EPIC_PROJECTION == "off":
+        return {}
+    if not fields:
+        return {"_summary": "count"} if search else {}
+
+    params: Dict[str, Any] = {}
+    elements = sorted({element for name in fields for element in view.field_elements[name]})
+    if EPIC_PROJECTION == "summary":
+        if set(elements) <= view.summary_elements:
+            params["_summary"] = "true"
+    else:
+        params["_elements"] = ",".join(elements)
+
+    if search:
+        includes = sorted(
+            {view.field_includes[name] for name in fields if name in view.field_includes}
+        )
+        if includes:
+            params["_include"] = includes if len(includes) > 1 else includes[0]
+    return params
+
+
+def _render_records(
+    records: List[Dict[str, Any]],
+    *,
+    view: ResourceView,
+    options: OutputOptions,
+    fields: Sequence[str],
+    total: Optional[int] = None,
+    note: Optional[str] = None,
+) -> ToolResult | str:
+    """Render extracted records in the caller's requested output mode.
+
+    Text mode keeps the readable summaries. The JSON modes return the records as
+    MCP structured content alongside a compact JSON text block, which is far
+    cheaper for the model to read on list-heavy calls. ``note`` tells the agent
+    where the records came from when that is not Epic itself.
+    """
+
+    if options.output_mode == "text":
+        if not records:
+            return view.empty_message
+        text = "\n\n".join(view.text_formatter(record) for record in records)
+        return f"{note}\n\n{text}" if note else text
+
+    payload: Dict[str, Any] = {"resourceType": view.resource_type}
+    if note:
+        payload["note"] = note
+    if total is not None:
+        payload["total"] = total
+    if fields:
+        drop_empty = options.output_mode == "minimal"
+        payload["count"] = len(records)
+        payload["records"] = [
+            _project(record, fields, drop_empty=drop_empty) for record in records
+        ]
+    return ToolResult(content=json_codec.dumps(payload), structured_content=payload)
+
+
+def _format_bundle(
+    bundle: Dict[str, Any],
+    *,
+    view: ResourceView,
+    options: OutputOptions,
+    fields: Sequence[str],
+) -> ToolResult | str:
+    matches = []
+    included: Dict[str, Dict[str, Any]] = {}
+    for entry in bundle.get("entry", []):
+        resource = entry.get("resource", {})
+        mode = entry.get("search", {}).get("mode", "match")
+        if mode == "include":
+            included[f"{resource.get('resourceType')}/{resource.get('id')}"] = resource
+        elif mode == "match":
+            matches.append(resource)
+
+    records = [view.record_extractor(resource, included) for resource in matches]
+    total = bundle.get("total")
+    if total is None and not fields:
+        total = len(records)
+    return _render_records(records, view=view, options=options, fields=fields, total=total)
+
+
+async def _require_patient_resource(
+    patient_id: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    decode_keys: Optional[Iterable[str]] = None,
+) -> Any:
+    data = await _epic_get(f"Patient/{patient_id}", params=params, decode_keys=decode_keys)
     if isinstance(data, str):
         return data
     if data.get("resourceType") == "Patient":
@@ -285,22 +1080,329 @@ async def _require_patient_resource(patient_id: str) -> Any:
     return "Error: Unexpected response when retrieving Patient resource."
 
 
+LOCAL_INDEX_NOTE = (
+    "Matched locally by exact identifier from recently seen patients; "
+    "search again with use_local_index=false to query Epic."
+)
+SPELLING_CANDIDATES_NOTE = (
+    "Epic found no patient matching this search. These recently seen patients have "
+    "similar names or identifiers; they are NOT confirmed matches - verify identity "
+    "(e.g. birth date and identifier) before using any of them."
+)
+
+
+def _index_patients(
+    resources: Iterable[Dict[str, Any]],
+    elements: Iterable[str],
+    tenant: Optional[EpicTenant] = None,
+) -> None:
+    """Feed Patient resources fetched with ``elements`` to the tenant's fuzzy index."""
+
+    elements = set(elements)
+    tenant = tenant or _tenant()
+    if elements and isinstance(tenant, EpicTenant) and tenant.patient_index is not None:
+        tenant.patient_index.add_many(resources, elements)
+
+
+# One lock per (tenant, patient, resource type) while a sync holds or awaits it;
+# entries vanish once no coroutine references the lock any more.
+_SYNC_LOCKS: "weakref.WeakValueDictionary[tuple[str, str, str], asyncio.Lock]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+_END_OF_TIME = datetime.max.replace(tzinfo=timezone.utc)
+
+
+def _fhir_time_span(value: str) -> Optional[tuple[datetime, datetime]]:
+    """The [start, end) span of a FHIR date or dateTime, as aware datetimes.
+
+    ``2024`` covers the year, ``2024-03`` the month and ``2024-03-01`` the
+    day; a full dateTime is an instant. Values without an offset are taken as
+    UTC. Returns None when ``value`` is not a FHIR date or dateTime.
+    """
+
+    try:
+        if len(value) == 4:
+            year = int(value)
+            start = datetime(year, 1, 1, tzinfo=timezone.utc)
+            return start, start.replace(year=year + 1)
+        if len(value) == 7:
+            year, month = int(value[:4]), int(value[5:])
+            start = datetime(year, month, 1, tzinfo=timezone.utc)
+            if month == 12:
+                return start, start.replace(year=year + 1, month=1)
+            return start, start.replace(month=month + 1)
+        if len(value) == 10:
+            day = date.fromisoformat(value)
+            start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+            return start, start + timedelta(days=1)
+        instant = datetime.fromisoformat(value)
+    except (ValueError, OverflowError):
+        return None
+    if instant.tzinfo is None:
+        instant = instant.replace(tzinfo=timezone.utc)
+    return instant, instant + timedelta(microseconds=1)
+
+
+def _with_overlap(instant: str) -> str:
+    try:
+        parsed = datetime.fromisoformat(instant)
+    except ValueError:
+        return instant
+    return (parsed - timedelta(seconds=SYNC_OVERLAP_SECONDS)).isoformat()
+
+
+async def _sync_working_set(
+    patient_id: str, view: ResourceView
+) -> tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]] | str:
+    """Bring a patient's working set for ``view`` up to date and return it.
+
+    The first sync (and one every EPIC_SYNC_FULL_RESYNC_SECONDS) pages through
+    every resource; later syncs only request ``_lastUpdated`` at or after the
+    stored watermark, and are skipped for EPIC_SUBSCRIBED_CACHE_TTL seconds
+    while a Subscription reports the patient's changes. Status changes arrive
+    as ordinary updates, so the set is fetched without status filters and
+    filtered locally.
+    """
+
+    tenant = _tenant()
+    if isinstance(tenant, str):
+        return tenant
+    store = tenant.sync_store()
+    key = (tenant.key, patient_id, view.resource_type)
+    lock = _SYNC_LOCKS.get(key)
+    if lock is None:
+        lock = _SYNC_LOCKS[key] = asyncio.Lock()
+    async with lock:
+        mark = await asyncio.to_thread(store.watermark, patient_id, view.resource_type)
+        full = (
+            mark is None
+            or not mark["last_updated"]
+            or time.time() - mark["full_synced_at"] > EPIC_SYNC_FULL_RESYNC_SECONDS
+        )
+        since = tenant.subscriptions.watched_since(patient_id) if tenant.subscriptions else None
+        if (
+            not full
+            and since is not None
+            and since <= mark["synced_at"]
+            and time.time() - mark["synced_at"] < tenant.subscribed_cache_ttl
+        ):
+            # Changes since that sync were pushed to the receiver and patched in.
+            return await asyncio.to_thread(store.resources, patient_id, view.resource_type)
+        params: Dict[str, Any] = {"patient": patient_id, "_count": SYNC_PAGE_SIZE}
+        includes = sorted(set(view.field_includes.values()))
+        if includes:
+            params["_include"] = includes if len(includes) > 1 else includes[0]
+        if not full:
+            params["_lastUpdated"] = f"ge{_with_overlap(mark['last_updated'])}"
+
+        changed: List[Dict[str, Any]] = []
+        included: Dict[str, Dict[str, Any]] = {}
+        server_time: Optional[str] = None
+        path: Optional[str] = view.resource_type
+        base_url = tenant.base_url + "/"
+        for _ in range(SYNC_MAX_PAGES):
+            # Never from the response cache: a cached page would move the watermark
+            # past changes it does not contain.
+            data = await _epic_get(path, params=params, tenant=tenant, cacheable=False)
+            if isinstance(data, str):
+                return data
+            if data.get("resourceType") != "Bundle":
+                return f"Error: Unexpected response from Epic when syncing {view.resource_type}."
+            server_time = server_time or (data.get("meta") or {}).get("lastUpdated")
+            for entry in data.get("entry", []):
+                resource = entry.get("resource", {})
+                if entry.get("search", {}).get("mode", "match") == "include":
+                    included[f"{resource.get('resourceType')}/{resource.get('id')}"] = resource
+                elif resource.get("resourceType") == view.resource_type:
+                    changed.append(resource)
+            next_url = next(
+                (
+                    link.get("url")
+                    for link in data.get("link", [])
+                    if link.get("relation") == "next"
+                ),
+                None,
+            )
+            if not next_url:
+                break
+            if not next_url.startswith(base_url):
+                return f"Error: Epic returned a next page outside {tenant.base_url}."
+            path, params = next_url[len(base_url):], None
+        else:
+            return (
+                f"Error: More than {SYNC_MAX_PAGES * SYNC_PAGE_SIZE} {view.resource_type} "
+                "changes to sync; use bulk_export for this patient."
+            )
+
+        await asyncio.to_thread(
+            store.merge,
+            patient_id,
+            view.resource_type,
+            changed,
+            included,
+            server_time=server_time,
+            full=full,
+        )
+        return await asyncio.to_thread(store.resources, patient_id, view.resource_type)
+
+
+async def receive_notification(
+    tenant_key: str,
+    method: str,
+    resource_type: Optional[str],
+    resource_id: Optional[str],
+    body: bytes,
+    authorization: Optional[str],
+) -> tuple[int, Dict[str, Any]]:
+    """Apply a Subscription notification to a tenant's caches; returns (status, body).
+
+    Accepts the R4 rest-hook forms: an empty POST (handshake or heartbeat),
+    the changed resource PUT to ``<endpoint>/<type>/<id>`` (or its DELETE),
+    and a Bundle of changed resources. Cached responses about the affected
+    patients are dropped, incremental working sets are patched in place and
+    the patient index gets the new Patient resource.
+    """
+
+    tenant = EPIC_TENANTS.get(tenant_key)
+    registry = tenant.subscriptions if tenant is not None else None
+    if registry is None:
+        return 404, {"error": f"No subscriptions for Epic organization '{tenant_key}'."}
+    if not registry.verify(authorization):
+        return 401, {"error": "Invalid notification credentials."}
+    registry.stats["notifications"] += 1
+
+    changed: List[Dict[str, Any]] = []
+    deleted: List[tuple[str, str]] = []
+    if method == "DELETE":
+        if resource_type and resource_id:
+            deleted.append((resource_type, resource_id))
+    elif body.strip():
+        try:
+            payload = json_codec.loads(body)
+        except ValueError:
+            return 400, {"error": "Notification body is not valid JSON."}
+        if not isinstance(payload, dict):
+            return 400, {"error": "Notification body must be a FHIR resource or Bundle."}
+        if payload.get("resourceType") == "Bundle":
+            for entry in payload.get("entry", []):
+                request = entry.get("request") or {}
+                if request.get("method") == "DELETE":
+                    kind, _, rest = request.get("url", "").partition("?")[0].partition("/")
+                    if kind and rest:
+                        deleted.append((kind, rest.split("/")[0]))
+                elif entry.get("resource"):
+                    changed.append(entry["resource"])
+        elif resource_type and (payload.get("resourceType"), payload.get("id")) != (
+            resource_type,
+            resource_id,
+        ):
+            return 400, {"error": "Notification body does not match its URL."}
+        else:
+            changed.append(payload)
+
+    patched = invalidated = 0
+    store = tenant.sync_store()
+    for resource in changed:
+        kind = resource.get("resourceType")
+        if kind not in SUBSCRIBED_TYPES or not resource.get("id"):
+            continue
+        registry.stats["resources"] += 1
+        patients = patient_references(resource)
+        for patient in patients:
+            invalidated += tenant.upstream.invalidate(f"Patient/{patient}")
+            if kind == "Patient":
+                continue
+            if await asyncio.to_thread(store.patch, patient, kind, resource):
+                patched += 1
+        if kind == "Patient" and tenant.patient_index is not None:
+            # Notifications carry the whole resource.
+            tenant.patient_index.add(resource)
+    for kind, ident in deleted:
+        if kind not in SUBSCRIBED_TYPES:
+            continue
+        registry.stats["resources"] += 1
+        if kind == "Patient":
+            patients = [ident]
+            if tenant.patient_index is not None:
+                tenant.patient_index.discard(ident)
+            await asyncio.to_thread(store.forget, ident)
+            await _delete_subscriptions(tenant, registry.forget(ident))
+        else:
+            patients = await asyncio.to_thread(store.discard, kind, ident)
+            if not patients:
+                # Whose it was is unknown, so no cached response can be trusted.
+                invalidated += tenant.upstream.clear_cache()
+        for patient in patients:
+            invalidated += tenant.upstream.invalidate(f"Patient/{patient}")
+    registry.stats["patched"] += patched
+    registry.stats["invalidated"] += invalidated
+    return 200, {"status": "ok", "patched": patched, "invalidated": invalidated}
+
+
 @epic_server.tool()
-async def get_patient_summary(patient_id: str) -> str:
+async def get_patient_summary(
+    patient_id: str,
+    output_mode: OutputMode = "text",
+    fields: Optional[List[str]] = None,
+) -> ToolResult | str:
     """Retrieve demographics and contact details for a patient."""
 
-    data = await _require_patient_resource(patient_id)
+    options = OutputOptions(output_mode=output_mode, fields=fields)
+    requested = _requested_fields(PATIENT_VIEW, options)
+    if isinstance(requested, str):
+        return requested
+
+    data = await _require_patient_resource(
+        patient_id,
+        params=_projection_params(PATIENT_VIEW, requested, search=False),
+        decode_keys=PATIENT_VIEW.decode_keys(requested),
+    )
     if isinstance(data, str):
         return data
-    summary = _format_patient(data)
-    return summary
+    _index_patients([data], PATIENT_VIEW.decode_keys(requested))
+    return _render_records(
+        [_patient_record(data)], view=PATIENT_VIEW, options=options, fields=requested
+    )
 
 
 @epic_server.tool()
-async def search_patients(request: PatientSearchRequest) -> str:
+async def search_patients(request: PatientSearchRequest) -> ToolResult | str:
     """Search for patients using Epic FHIR parameters."""
 
-    params = {"_count": request.page_size}
+    requested = _requested_fields(PATIENT_VIEW, request)
+    if isinstance(requested, str):
+        return requested
+
+    tenant = _tenant()
+    if isinstance(tenant, str):
+        return tenant
+    index = tenant.patient_index if request.use_local_index and requested else None
+    query = {
+        "given": request.given,
+        "family": request.family,
+        "birthdate": request.birthdate,
+        "identifier": request.identifier,
+        "elements": PATIENT_VIEW.decode_keys(requested),
+        "limit": request.page_size,
+    }
+    # A fuzzy name match must never stand in for Epic: another patient with the
+    # searched name may exist that the index has not seen. Only an identifier
+    # matched exactly (with any given names matching exactly too) is conclusive.
+    if index is not None and request.identifier:
+        exact = index.search(**query, min_score=1.0)
+        if exact:
+            return _render_records(
+                [_patient_record(resource) for resource in exact],
+                view=PATIENT_VIEW,
+                options=request,
+                fields=requested,
+                total=len(exact),
+                note=LOCAL_INDEX_NOTE,
+            )
+
+    params = {"_count": request.page_size, **_projection_params(PATIENT_VIEW, requested)}
     if request.given:
         params["given"] = request.given
     if request.family:
@@ -310,23 +1412,101 @@ async def search_patients(request: PatientSearchRequest) -> str:
     if request.identifier:
         params["identifier"] = request.identifier
 
-    data = await _epic_get("Patient", params=params)
+    data = await _epic_get(
+        "Patient",
+        params=params,
+        decode_keys=PATIENT_VIEW.decode_keys(requested),
+        tenant=tenant,
+    )
     if isinstance(data, str):
         return data
     if data.get("resourceType") != "Bundle":
         return "Error: Unexpected response from Epic when searching patients."
+    if requested:
+        _index_patients(
+            (
+                entry.get("resource", {})
+                for entry in data.get("entry", [])
+                if entry.get("search", {}).get("mode", "match") == "match"
+            ),
+            PATIENT_VIEW.decode_keys(requested),
+            tenant,
+        )
+
+    matched = any(
+        entry.get("search", {}).get("mode", "match") == "match" for entry in data.get("entry", [])
+    )
+    if index is not None and not matched:
+        candidates = index.search(**query)
+        if candidates:
+            return _render_records(
+                [_patient_record(resource) for resource in candidates],
+                view=PATIENT_VIEW,
+                options=request,
+                fields=requested,
+                total=0,
+                note=SPELLING_CANDIDATES_NOTE,
+            )
 
-    return _format_bundle(data, resource_formatter=_format_patient)
+    return _format_bundle(data, view=PATIENT_VIEW, options=request, fields=requested)
 
 
 @epic_server.tool()
-async def get_patient_appointments(request: AppointmentSearchRequest) -> str:
+async def get_patient_appointments(request: AppointmentSearchRequest) -> ToolResult | str:
     """Fetch upcoming appointments for a patient."""
 
+    requested = _requested_fields(APPOINTMENT_VIEW, request)
+    if isinstance(requested, str):
+        return requested
+
+    if request.incremental:
+        bounds = {}
+        for name in ("min_start", "max_start"):
+            value = getattr(request, name)
+            if value:
+                bounds[name] = _fhir_time_span(value)
+                if bounds[name] is None:
+                    return f"Error: {name} must be a FHIR date or dateTime, got {value!r}."
+        synced = await _sync_working_set(request.patient_id, APPOINTMENT_VIEW)
+        if isinstance(synced, str):
+            return synced
+        resources, included = synced
+        starts = {
+            id(resource): _fhir_time_span(resource.get("start") or "") for resource in resources
+        }
+
+        def in_range(resource: Dict[str, Any]) -> bool:
+            start = starts[id(resource)]
+            if start is None:
+                return not bounds
+            # As Epic's date=ge/le: the bound's own precision sets the span it covers.
+            if "min_start" in bounds and start[0] < bounds["min_start"][0]:
+                return False
+            return "max_start" not in bounds or start[0] < bounds["max_start"][1]
+
+        matches = sorted(
+            (
+                resource
+                for resource in resources
+                if (not request.status or resource.get("status") == request.status)
+                and in_range(resource)
+            ),
+            key=lambda resource: (starts[id(resource)] or (_END_OF_TIME,))[0],
+        )
+        records = [_appointment_record(resource, included) for resource in matches]
+        return _render_records(
+            records[: request.page_size],
+            view=APPOINTMENT_VIEW,
+            options=request,
+            fields=requested,
+            total=len(records),
+        )
+
     params = {
         "patient": request.patient_id,
         "_count": request.page_size,
         "_sort": "date",
+        **_projection_params(APPOINTMENT_VIEW, requested),
     }
     if request.status:
         params["status"] = request.status
@@ -338,73 +1518,332 @@ async def get_patient_appointments(request: AppointmentSearchRequest) -> str:
     if date_filters:
         params["date"] = date_filters if len(date_filters) > 1 else date_filters[0]
 
-    data = await _epic_get("Appointment", params=params)
+    data = await _epic_get(
+        "Appointment", params=params, decode_keys=APPOINTMENT_VIEW.decode_keys(requested)
+    )
     if isinstance(data, str):
         return data
     if data.get("resourceType") != "Bundle":
         return "Error: Unexpected response from Epic when fetching appointments."
 
-    return _format_bundle(data, resource_formatter=_format_appointment)
+    return _format_bundle(data, view=APPOINTMENT_VIEW, options=request, fields=requested)
 
 
 @epic_server.tool()
-async def get_patient_medications(patient_id: str, page_size: int = 20) -> str:
-    """Retrieve active medication statements for a patient."""
+async def get_patient_medications(
+    patient_id: str,
+    page_size: int = 20,
+    output_mode: OutputMode = "text",
+    fields: Optional[List[str]] = None,
+    incremental: bool = False,
+) -> ToolResult | str:
+    """Retrieve active medication statements for a patient.
+
+    Set ``incremental`` when polling the same patient: results then come from a
+    local working set refreshed with only the orders changed since the last call.
+    """
+
+    options = OutputOptions(output_mode=output_mode, fields=fields)
+    requested = _requested_fields(MEDICATION_VIEW, options)
+    if isinstance(requested, str):
+        return requested
+
+    if incremental:
+        synced = await _sync_working_set(patient_id, MEDICATION_VIEW)
+        if isinstance(synced, str):
+            return synced
+        resources, included = synced
+        active = sorted(
+            (resource for resource in resources if resource.get("status") == "active"),
+            key=lambda resource: resource.get("authoredOn", ""),
+            reverse=True,
+        )
+        records = [_medication_record(resource, included) for resource in active]
+        return _render_records(
+            records[:page_size],
+            view=MEDICATION_VIEW,
+            options=options,
+            fields=requested,
+            total=len(records),
+        )
 
     params = {
         "patient": patient_id,
         "status": "active",
         "_count": page_size,
+        **_projection_params(MEDICATION_VIEW, requested),
     }
-    data = await _epic_get("MedicationRequest", params=params)
+    data = await _epic_get(
+        "MedicationRequest", params=params, decode_keys=MEDICATION_VIEW.decode_keys(requested)
+    )
     if isinstance(data, str):
         return data
     if data.get("resourceType") != "Bundle":
         return "Error: Unexpected response from Epic when fetching medications."
 
-    lines = []
-    for entry in data.get("entry", []):
-        resource = entry.get("resource", {})
-        med = resource.get("medicationCodeableConcept", {})
-        med_text = med.get("text")
-        coding_display = next(
-            (
-                coding.get("display")
-                for coding in med.get("coding", [])
-                if coding.get("display")
-            ),
-            None,
-        )
-        display_value = med_text or coding_display or "Unknown medication"
-
-        requester = resource.get("requester", {}).get("display", "Unknown prescriber")
-        authored_on = resource.get("authoredOn", "Unknown date")
-        dosage = []
-        for instruction in resource.get("dosageInstruction", []):
-            text = instruction.get("text")
-            if text:
-                dosage.append(text)
-        status = resource.get("status", "unknown")
-
-        lines.append(
-            "\n".join(
-                filter(
-                    None,
-                    [
-                        f"Medication: {display_value}",
-                        f"Status: {status}",
-                        f"Prescriber: {requester}",
-                        f"Authored On: {authored_on}",
-                        "Dosage: " + " | ".join(dosage) if dosage else None,
-                    ],
-                )
+    return _format_bundle(data, view=MEDICATION_VIEW, options=options, fields=requested)
+
+
+_BULK_TASKS: Dict[str, asyncio.Task] = {}
+
+
+async def _poll_bulk_status(
+    tenant: EpicTenant, status_url: str, max_wait_seconds: float
+) -> Dict[str, Any] | str:
+    """Poll a $export status endpoint with backoff until the manifest is ready."""
+
+    deadline = time.monotonic() + max_wait_seconds
+    delay = BULK_POLL_INITIAL_SECONDS
+    while True:
+        headers = await _auth_headers(tenant, "application/json")
+        if isinstance(headers, str):
+            return headers
+        try:
+            response = await tenant.upstream.request(
+                tenant.session(), "GET", status_url, headers=headers, hedge=False
             )
+        except UpstreamError as exc:
+            return f"Error: {exc}"
+        if response.status == 200:
+            try:
+                return response.json()
+            except ValueError:
+                return "Error: Bulk export status returned a manifest that is not valid JSON."
+        if response.status != 202:
+            return (
+                f"Error: Bulk export status check failed with status {response.status}. "
+                f"Response: {response.text()}"
+            )
+        retry_after = response.headers.get("Retry-After", "")
+
+        wait = float(retry_after) if retry_after.isdigit() else delay
+        delay = min(delay * 2, BULK_POLL_MAX_SECONDS)
+        if time.monotonic() + wait > deadline:
+            return f"Error: Bulk export did not complete within {max_wait_seconds:.0f} seconds."
+        await asyncio.sleep(wait)
+
+
+async def _download_ndjson(
+    tenant: EpicTenant, url: str, destination: Path, requires_token: bool
+) -> Optional[str]:
+    """Stream one NDJSON output file to disk in fixed-size chunks.
+
+    The file is written to a ``.part`` sibling and renamed once complete; the
+    partial file is removed whatever ends the download.
+    """
+
+    headers = await _auth_headers(tenant, "application/fhir+ndjson")
+    if isinstance(headers, str):
+        return headers
+    if not requires_token:
+        headers.pop("Authorization", None)
+
+    partial = destination.with_suffix(".part")
+    try:
+        async with tenant.upstream.stream(
+            tenant.session(), "GET", url, headers=headers
+        ) as response:
+            if response.status != 200:
+                return f"Error: Downloading {url} failed with status {response.status}."
+            with open(partial, "wb") as handle:
+                async for chunk in response.content.iter_chunked(BULK_DOWNLOAD_CHUNK_BYTES):
+                    handle.write(chunk)
+        partial.replace(destination)
+    except (UpstreamError, OSError) as exc:
+        return f"Error: Downloading {url} failed: {exc}"
+    finally:
+        partial.unlink(missing_ok=True)
+    return None
+
+
+async def _run_bulk_export(
+    tenant: EpicTenant, export_id: str, status_url: str, max_wait_seconds: float
+) -> None:
+    # Outlives the kick-off tool call, so it must not inherit that call's deadline.
+    ignore_request_deadline()
+    store = tenant.bulk_store()
+    try:
+        state, message = await _download_bulk_export(
+            tenant, store, export_id, status_url, max_wait_seconds
         )
+    except asyncio.CancelledError:
+        await asyncio.to_thread(store.update_export, export_id, "failed", "Export cancelled.")
+        raise
+    except Exception as exc:  # noqa: BLE001 - an export never stays "downloading"
+        logger.exception("Bulk export %s failed", export_id)
+        state, message = "failed", f"Error: Bulk export failed: {exc}"
+    await asyncio.to_thread(store.update_export, export_id, state, message)
+
+
+async def _download_bulk_export(
+    tenant: EpicTenant,
+    store: BulkExportStore,
+    export_id: str,
+    status_url: str,
+    max_wait_seconds: float,
+) -> Tuple[str, Optional[str]]:
+    """Wait for the manifest, then download and index every output file."""
+
+    manifest = await _poll_bulk_status(tenant, status_url, max_wait_seconds)
+    if isinstance(manifest, str):
+        return "failed", manifest
+
+    await asyncio.to_thread(store.update_export, export_id, "downloading")
+    export_dir = store.export_dir(export_id)
+    requires_token = bool(manifest.get("requiresAccessToken", True))
+    semaphore = asyncio.Semaphore(BULK_DOWNLOAD_CONCURRENCY)
+
+    async def fetch(index: int, output: Dict[str, Any]) -> Optional[str]:
+        resource_type = output.get("type", "Resource")
+        destination = export_dir / f"{resource_type}-{index}.ndjson"
+        async with semaphore:
+            error = await _download_ndjson(tenant, output["url"], destination, requires_token)
+        if error:
+            return error
+        await asyncio.to_thread(store.index_file, export_id, resource_type, destination)
+        if resource_type == "Patient" and tenant.patient_index is not None:
+            await asyncio.to_thread(tenant.patient_index.add_ndjson, destination)
+        return None
+
+    results = await asyncio.gather(
+        *(fetch(index, output) for index, output in enumerate(manifest.get("output", []))),
+        return_exceptions=True,
+    )
+    errors = []
+    for result in results:
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            logger.error("Bulk export %s file failed: %r", export_id, result)
+            errors.append(f"Error: {type(result).__name__}: {result}")
+        elif result:
+            errors.append(result)
+
+    if errors:
+        return "failed", "; ".join(errors)
+    return "complete", None
+
+
+def _describe_export(export: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "export_id": export["export_id"],
+        "scope": export["scope"],
+        "state": export["state"],
+        "message": export["message"],
+        "files": [
+            {"resource_type": item["resource_type"], "resources": item["resources"]}
+            for item in export["files"]
+        ],
+    }
+
 
-    if not lines:
-        return "No active medications found."
+@epic_server.tool()
+async def bulk_export(request: BulkExportRequest) -> Dict[str, Any] | str:
+    """Start a FHIR Bulk Data $export and download its NDJSON output locally."""
+
+    resource_path = f"Group/{request.group_id}/$export" if request.group_id else "$export"
+    params: Dict[str, Any] = {"_type": ",".join(request.resource_types)}
+    if request.since:
+        params["_since"] = request.since
+
+    tenant = _tenant()
+    if isinstance(tenant, str):
+        return tenant
+    headers = await _auth_headers(tenant)
+    if isinstance(headers, str):
+        return headers
+    headers["Prefer"] = "respond-async"
+    try:
+        # Each kick-off starts a server-side job, so it is never hedged.
+        response = await tenant.upstream.request(
+            tenant.session(),
+            "GET",
+            tenant.url(resource_path),
+            params=params,
+            headers=headers,
+            hedge=False,
+        )
+    except UpstreamError as exc:
+        return f"Error: {exc}"
+    if response.status != 202:
+        return (
+            f"Error: Bulk export kick-off failed with status {response.status}. "
+            f"Response: {response.text()}"
+        )
+    status_url = response.headers.get("Content-Location")
+    if not status_url:
+        return "Error: Epic did not return a Content-Location for the bulk export."
+
+    export_id = uuid.uuid4().hex
+    store = tenant.bulk_store()
+    await asyncio.to_thread(store.create_export, export_id, resource_path, status_url)
+    task = asyncio.create_task(
+        _run_bulk_export(tenant, export_id, status_url, request.max_wait_seconds)
+    )
+    _BULK_TASKS[export_id] = task
+    task.add_done_callback(lambda _: _BULK_TASKS.pop(export_id, None))
+
+    if request.wait:
+        # Shield the export so a cancelled tool call does not abort the download.
+        await asyncio.shield(task)
+    return _describe_export(await asyncio.to_thread(store.get_export, export_id))
+
+
+@epic_server.tool()
+async def bulk_export_status(export_id: str) -> Dict[str, Any] | str:
+    """Report progress and downloaded files for a bulk export."""
+
+    tenant = _tenant()
+    if isinstance(tenant, str):
+        return tenant
+    export = await asyncio.to_thread(tenant.bulk_store().get_export, export_id)
+    if export is None:
+        return f"Error: Unknown bulk export {export_id}."
+    return _describe_export(export)
+
+
+@epic_server.tool()
+async def query_bulk_export(request: BulkQueryRequest) -> ToolResult | Dict[str, Any] | str:
+    """Query resources downloaded by a bulk export using the local index."""
+
+    tenant = _tenant()
+    if isinstance(tenant, str):
+        return tenant
+    store = tenant.bulk_store()
+    export = await asyncio.to_thread(store.get_export, request.export_id)
+    if export is None:
+        return "Error: No completed bulk export found. Run bulk_export first."
+
+    filters = {
+        "patient_id": request.patient_id,
+        "status": request.status,
+        "code_contains": request.code_contains,
+        "date_from": request.date_from,
+        "date_to": request.date_to,
+    }
+    if request.group_by:
+        groups = await asyncio.to_thread(
+            store.group_counts,
+            export["export_id"],
+            request.resource_type,
+            request.group_by,
+            limit=request.limit,
+            **filters,
+        )
+        return {"export_id": export["export_id"], "group_by": request.group_by, "groups": groups}
+
+    total, resources = await asyncio.to_thread(
+        store.query, export["export_id"], request.resource_type, limit=request.limit, **filters
+    )
+    view = _RESOURCE_VIEWS.get(request.resource_type)
+    if view is None:
+        return {"export_id": export["export_id"], "total": total, "resources": resources}
 
-    return "\n\n".join(lines)
+    requested = _requested_fields(view, request)
+    if isinstance(requested, str):
+        return requested
+    records = [view.record_extractor(resource) for resource in resources] if requested else []
+    return _render_records(records, view=view, options=request, fields=requested, total=total)
 
 
 @epic_server.prompt()
@@ -418,13 +1857,15 @@ def epic_clinical_assistant_prompt(topic: str = "clinical decision support") ->
         "- search_patients: Locate patients within the organization.\n"
         "- get_patient_summary: Summarize patient demographics and contact details.\n"
         "- get_patient_medications: Review active medication orders.\n"
-        "- get_patient_appointments: Retrieve scheduled encounters.\n\n"
+        "- get_patient_appointments: Retrieve scheduled encounters.\n"
+        "- bulk_export / query_bulk_export: Population-level exports and cohort queries.\n\n"
         "Guidelines:\n"
         "1. Respect access controls; only request data necessary for the task.\n"
         "2. Confirm patient identity with multiple identifiers when possible.\n"
         "3. Note medication statuses, prescribers, and instructions in clinical summaries.\n"
         "4. Highlight gaps in care, follow-up requirements, or abnormal findings.\n"
-        "5. Document data provenance with Epic resource IDs or links.\n\n"
+        "5. Document data provenance with Epic resource IDs or links.\n"
+        "6. Prefer output_mode='minimal' with a fields projection when scanning many records.\n\n"
         "Respond with structured, clinician-friendly narratives and include actionable next steps."
     )
 
@@ -441,6 +1882,11 @@ async def get_epic_capabilities() -> Dict[str, Any]:
             "Patient search",
             "Medication review",
             "Appointment lookups",
+            "Bulk Data $export with local cohort queries",
+            "Incremental appointment/medication sync via _lastUpdated watermarks",
+            "Multiple Epic organizations selected per call via X-Fuse-Tenant",
+            "Fuzzy local patient lookup over recently seen patients (opt-in)",
+            "FHIR Subscription notifications invalidate cached patient data (opt-in)",
         ],
         "fhir_base_url": EPIC_BASE_URL,
         "requires_auth": bool(EPIC_CLIENT_ID and EPIC_CLIENT_SECRET),
@@ -450,12 +1896,45 @@ async def get_epic_capabilities() -> Dict[str, Any]:
             "Appointment",
             "MedicationRequest",
         ],
+        "output_modes": ["text", "json", "minimal"],
+        "projectable_fields": {
+            resource_type: list(view.fields) for resource_type, view in _RESOURCE_VIEWS.items()
+        },
+        "bulk_export_dir": EPIC_BULK_EXPORT_DIR,
+        "projection_pushdown": EPIC_PROJECTION,
+        "json_backend": json_codec.JSON_BACKEND,
+        "default_tenant": EPIC_DEFAULT_TENANT or None,
+        "tenants": {key: tenant.snapshot() for key, tenant in EPIC_TENANTS.items()},
         "environment_variables": [
             "EPIC_BASE_URL",
             "EPIC_AUTH_URL",
             "EPIC_CLIENT_ID",
             "EPIC_CLIENT_SECRET",
             "EPIC_SCOPE",
+            "EPIC_PROJECTION",
+            "FUSE_JSON_BACKEND",
+            "EPIC_BULK_EXPORT_DIR",
+            "EPIC_SYNC_STORE",
+            "EPIC_SYNC_FULL_RESYNC_SECONDS",
+            "EPIC_CONNECT_TIMEOUT",
+            "EPIC_READ_TIMEOUT",
+            "EPIC_BREAKER_FAILURES",
+            "EPIC_BREAKER_RESET",
+            "EPIC_HEDGE",
+            "EPIC_CACHE_TTL",
+            "EPIC_POOL_SIZE",
+            "EPIC_TENANTS",
+            "EPIC_TENANTS_FILE",
+            "EPIC_DEFAULT_TENANT",
+            "EPIC_PATIENT_INDEX_TTL",
+            "EPIC_PATIENT_INDEX_MAX_ENTRIES",
+            "EPIC_PATIENT_INDEX_MIN_SCORE",
+            "EPIC_SUBSCRIPTION_ENDPOINT",
+            "EPIC_SUBSCRIPTION_SECRET",
+            "EPIC_SUBSCRIPTION_LEASE_SECONDS",
+            "EPIC_SUBSCRIPTION_MAX_PATIENTS",
+            "EPIC_SUBSCRIPTION_RETRY_SECONDS",
+            "EPIC_SUBSCRIBED_CACHE_TTL",
         ],
         "sandbox_notice": (
             "Epic sandbox endpoints may return synthetic data and require sandbox keys."
@@ -0,0 +1,232 @@
+"""
+Epic organization registry - per-tenant FHIR endpoints, credentials, tokens, pools and caches.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from ..common import json_codec
+from .bulk_store import BulkExportStore
+from .fhir_subscriptions import SubscriptionRegistry
+from .patient_index import PatientIndex
+from .sync_store import WorkingSetStore
+from .upstream import Upstream
+
+DEFAULT_TENANT = "default"
+_TENANT_KEY = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _with_suffix(path: str, key: str) -> str:
+    """``data/epic_sync.db`` -> ``data/epic_sync-<key>.db`` for non-default tenants."""
+    if key == DEFAULT_TENANT:
+        return path
+    original = Path(path)
+    return str(original.with_name(f"{original.stem}-{key}{original.suffix}"))
+
+
+class EpicTenant:
+    """Everything one Epic organization needs, isolated from every other tenant.
+
+    Each tenant has its own OAuth token (refreshed single-flight), its own
+    ``Upstream`` (breakers, response cache, rate limit, read from
+    ``EPIC_<KEY>_*`` env overrides), its own pooled ``aiohttp`` session, its
+    own sync and bulk-export stores and, when ``patient_index_ttl`` is set, its
+    own fuzzy patient index, so patient IDs and cached responses can never
+    cross organizations. With a ``subscription_endpoint`` and
+    ``subscription_secret`` it also watches cached patients through FHIR
+    Subscriptions, and their cached data may live for ``subscribed_cache_ttl``.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        *,
+        base_url: str,
+        auth_url: str,
+        client_id: Optional[str],
+        client_secret: Optional[str],
+        scope: str,
+        sync_store: str,
+        bulk_export_dir: str,
+        pool_size: int = 20,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 20.0,
+        cache_ttl: float = 60.0,
+        rate_limit: float = 0.0,
+        patient_index_ttl: float = 0.0,
+        patient_index_max_entries: int = 50_000,
+        patient_index_min_score: float = 0.8,
+        subscription_endpoint: Optional[str] = None,
+        subscription_secret: Optional[str] = None,
+        subscription_lease: float = 3600.0,
+        subscription_max_patients: int = 500,
+        subscription_retry: float = 300.0,
+        subscribed_cache_ttl: float = 900.0,
+    ) -> None:
+        if not _TENANT_KEY.match(key):
+            raise ValueError(f"Invalid Epic tenant key {key!r}; use letters, digits, - and _")
+        self.key = key
+        self.base_url = base_url.rstrip("/")
+        self.auth_url = auth_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self.sync_store_path = sync_store
+        self.bulk_export_dir = bulk_export_dir
+        self.pool_size = pool_size
+        prefix = "EPIC" if key == DEFAULT_TENANT else f"EPIC_{key.upper().replace('-', '_')}"
+        self.upstream = Upstream(
+            "Epic" if key == DEFAULT_TENANT else f"Epic[{key}]",
+            prefix,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            cache_ttl=cache_ttl,
+            rate_limit=rate_limit,
+        )
+        self.patient_index: Optional[PatientIndex] = None
+        if patient_index_ttl > 0:
+            self.patient_index = PatientIndex(
+                patient_index_ttl, patient_index_max_entries, patient_index_min_score
+            )
+        self.subscriptions: Optional[SubscriptionRegistry] = None
+        if subscription_endpoint and subscription_secret:
+            self.subscriptions = SubscriptionRegistry(
+                subscription_endpoint,
+                subscription_secret,
+                lease=subscription_lease,
+                max_patients=subscription_max_patients,
+                retry_after=subscription_retry,
+            )
+        self.subscribed_cache_ttl = subscribed_cache_ttl
+        self.token_cache: Dict[str, Any] = {"token": None, "expires_at": 0.0}
+        self.token_lock = asyncio.Lock()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync_store: Optional[WorkingSetStore] = None
+        self._bulk_store: Optional[BulkExportStore] = None
+
+    @property
+    def requires_auth(self) -> bool:
+        return bool(self.client_id and self.client_secret)
+
+    def url(self, resource_path: str) -> str:
+        return f"{self.base_url}/{resource_path.lstrip('/')}"
+
+    def session(self) -> aiohttp.ClientSession:
+        """The tenant's pooled session for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size)
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def sync_store(self) -> WorkingSetStore:
+        if self._sync_store is None:
+            self._sync_store = WorkingSetStore(self.sync_store_path)
+        return self._sync_store
+
+    def bulk_store(self) -> BulkExportStore:
+        if self._bulk_store is None:
+            self._bulk_store = BulkExportStore(self.bulk_export_dir)
+        return self._bulk_store
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Non-secret settings and state for capability reports."""
+        return {
+            "fhir_base_url": self.base_url,
+            "requires_auth": self.requires_auth,
+            "scope": self.scope,
+            "pool_size": self.pool_size,
+            "bulk_export_dir": self.bulk_export_dir,
+            "sync_store": self._sync_store.stats() if self._sync_store else None,
+            "upstream": self.upstream.snapshot(),
+            "patient_index": self.patient_index.snapshot() if self.patient_index else None,
+            "subscriptions": self.subscriptions.snapshot() if self.subscriptions else None,
+        }
+
+
+def load_tenants(defaults: Dict[str, Any]) -> Dict[str, EpicTenant]:
+    """Build the registry: the env-configured ``default`` tenant plus configured ones.
+
+    Extra tenants come from ``EPIC_TENANTS_FILE`` (a JSON file) or
+    ``EPIC_TENANTS`` (inline JSON), mapping a tenant key to settings such as
+    ``base_url``, ``auth_url``, ``client_id``, ``client_secret_env`` (name of
+    the env var holding the secret; ``client_secret`` is also accepted),
+    ``scope``, ``pool_size``, ``rate_limit``, ``cache_ttl``, ``sync_store``,
+    ``bulk_export_dir``, ``patient_index_ttl``, ``subscription_endpoint`` and
+    ``subscription_secret_env`` (``subscription_secret`` is also accepted).
+    Unset settings fall back to ``defaults``; a ``default`` entry overrides the
+    env-configured tenant. Other tenants never inherit the default tenant's
+    endpoints or credentials: they must set ``base_url``, and ``auth_url`` too
+    when they set credentials, so a secret is only ever posted to its own
+    organization's token endpoint. Subscriptions likewise need the tenant's
+    own endpoint and secret, and no two tenants may share a notification
+    secret, so one organization can never post notifications as another.
+    """
+
+    configured: Dict[str, Dict[str, Any]] = {}
+    path = os.getenv("EPIC_TENANTS_FILE")
+    if path:
+        configured.update(json_codec.loads(Path(path).read_bytes()))
+    if os.getenv("EPIC_TENANTS"):
+        configured.update(json_codec.loads(os.environ["EPIC_TENANTS"]))
+
+    tenants: Dict[str, EpicTenant] = {}
+    for key, settings in {DEFAULT_TENANT: {}, **configured}.items():
+        merged = {**defaults, **(settings if key == DEFAULT_TENANT else {})}
+        if key != DEFAULT_TENANT:
+            if not settings.get("base_url"):
+                raise ValueError(f"Epic tenant {key!r} must set base_url")
+            has_credentials = any(
+                settings.get(name) for name in ("client_id", "client_secret", "client_secret_env")
+            )
+            if has_credentials and not settings.get("auth_url"):
+                raise ValueError(f"Epic tenant {key!r} sets credentials but no auth_url")
+            # Other organizations never inherit the default tenant's credentials.
+            merged.update(
+                {
+                    "client_id": None,
+                    "client_secret": None,
+                    "auth_url": "",
+                    "subscription_endpoint": None,
+                    "subscription_secret": None,
+                    **settings,
+                }
+            )
+            merged["sync_store"] = settings.get(
+                "sync_store", _with_suffix(defaults["sync_store"], key)
+            )
+            merged["bulk_export_dir"] = settings.get(
+                "bulk_export_dir", _with_suffix(defaults["bulk_export_dir"], key)
+            )
+        secret_env = merged.pop("client_secret_env", None)
+        if secret_env:
+            merged["client_secret"] = os.getenv(secret_env)
+        subscription_secret_env = merged.pop("subscription_secret_env", None)
+        if subscription_secret_env:
+            merged["subscription_secret"] = os.getenv(subscription_secret_env)
+        if merged.get("subscription_endpoint") and not merged.get("subscription_secret"):
+            raise ValueError(
+                f"Epic tenant {key!r} sets subscription_endpoint but no subscription secret"
+            )
+        tenants[key] = EpicTenant(key, **merged)
+
+    secrets = [
+        tenant.subscriptions.secret for tenant in tenants.values() if tenant.subscriptions
+    ]
+    if len(secrets) != len(set(secrets)):
+        raise ValueError("Epic tenants must not share a subscription secret")
+    return tenants
@@ -0,0 +1,196 @@
+"""
+FHIR R4 rest-hook Subscriptions that keep cached Epic data current, per tenant.
+"""
+from __future__ import annotations
+
+import hmac
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+SUBSCRIBED_TYPES = ("Patient", "Appointment", "MedicationRequest")
+# Renew a patient's subscriptions once less than this share of the lease is left.
+RENEW_FRACTION = 0.5
+
+
+def patient_references(resource: Dict[str, Any]) -> Set[str]:
+    """IDs of the patients a Patient, Appointment or MedicationRequest is about."""
+
+    resource_type = resource.get("resourceType")
+    if resource_type == "Patient":
+        return {resource["id"]} if resource.get("id") else set()
+    references = [(resource.get("subject") or {}).get("reference", "")]
+    references += [
+        (participant.get("actor") or {}).get("reference", "")
+        for participant in resource.get("participant", [])
+    ]
+    return {
+        reference.split("/", 1)[1]
+        for reference in references
+        if reference.startswith("Patient/") and len(reference) > len("Patient/")
+    }
+
+
+@dataclass
+class _Watch:
+    # resource type -> Subscription id on the FHIR server
+    subscriptions: Dict[str, str]
+    expires_at: float
+    # Wall-clock time since which changes to the patient are being reported.
+    since: float
+
+
+class SubscriptionRegistry:
+    """Tracks which cached patients have live change notifications.
+
+    Patients are claimed as their data is cached; the Epic server then creates
+    one Subscription per type in ``SUBSCRIBED_TYPES`` pointing at
+    ``endpoint`` (the receiver, authenticated with ``secret``) with an ``end``
+    of ``lease`` seconds. Covered patients may be cached for longer because
+    notifications invalidate them; when the FHIR server refuses subscriptions
+    the registry stays unavailable for ``retry_after`` seconds and every
+    patient falls back to the plain cache TTL. At most ``max_patients`` are
+    watched (least recently used dropped first).
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        secret: str,
+        *,
+        lease: float = 3600.0,
+        max_patients: int = 500,
+        retry_after: float = 300.0,
+    ) -> None:
+        self.endpoint = endpoint
+        self._secret = secret
+        self.lease = lease
+        self.max_patients = max_patients
+        self.retry_after = retry_after
+        self._watches: OrderedDict[str, _Watch] = OrderedDict()
+        self._pending: Set[str] = set()
+        self._unavailable_until = 0.0
+        self.last_error: Optional[str] = None
+        self.stats: Dict[str, int] = {
+            "registered": 0,
+            "renewed": 0,
+            "failures": 0,
+            "evicted": 0,
+            "notifications": 0,
+            "resources": 0,
+            "patched": 0,
+            "invalidated": 0,
+            "unauthorized": 0,
+        }
+
+    @property
+    def secret(self) -> str:
+        return self._secret
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def verify(self, authorization: Optional[str]) -> bool:
+        """Check the ``Authorization`` header a notification arrived with."""
+
+        ok = hmac.compare_digest(
+            (authorization or "").encode(), f"Bearer {self._secret}".encode()
+        )
+        if not ok:
+            self.stats["unauthorized"] += 1
+        return ok
+
+    def claim(self, patients: Iterable[str]) -> List[str]:
+        """Patients that need (re-)registering; they stay pending until settled."""
+
+        if not self.available:
+            return []
+        renew_at = time.monotonic() + self.lease * RENEW_FRACTION
+        claimed = []
+        for patient in patients:
+            watch = self._watches.get(patient)
+            if watch is not None:
+                self._watches.move_to_end(patient)
+                if watch.expires_at > renew_at:
+                    continue
+            if patient not in self._pending:
+                self._pending.add(patient)
+                claimed.append(patient)
+        return claimed
+
+    def subscription(self, tenant: str, patient: str, resource_type: str) -> Dict[str, Any]:
+        """The Subscription resource to create for one patient and type."""
+
+        criteria = (
+            f"Patient?_id={patient}"
+            if resource_type == "Patient"
+            else f"{resource_type}?patient={patient}"
+        )
+        end = datetime.fromtimestamp(time.time() + self.lease, tz=timezone.utc)
+        return {
+            "resourceType": "Subscription",
+            "status": "requested",
+            "reason": "Invalidate cached clinical data on change",
+            "criteria": criteria,
+            "end": end.isoformat(timespec="seconds"),
+            "channel": {
+                "type": "rest-hook",
+                "endpoint": f"{self.endpoint.rstrip('/')}/{tenant}",
+                "payload": "application/fhir+json",
+                "header": [f"Authorization: Bearer {self._secret}"],
+            },
+        }
+
+    def activate(self, patient: str, subscriptions: Dict[str, str]) -> List[str]:
+        """Record a patient's subscriptions; returns Subscription ids to delete."""
+
+        self._pending.discard(patient)
+        previous = self._watches.pop(patient, None)
+        # Renewals overlap the old subscriptions, so coverage is continuous.
+        since = previous.since if previous else time.time()
+        self._watches[patient] = _Watch(subscriptions, time.monotonic() + self.lease, since)
+        self.stats["renewed" if previous else "registered"] += 1
+        stale = list(previous.subscriptions.values()) if previous else []
+        while len(self._watches) > self.max_patients:
+            _, evicted = self._watches.popitem(last=False)
+            stale.extend(evicted.subscriptions.values())
+            self.stats["evicted"] += 1
+        return stale
+
+    def fail(self, patients: Iterable[str], reason: str) -> None:
+        """Registration failed: back off and let cached data expire by TTL meanwhile."""
+
+        self._pending.difference_update(patients)
+        self._unavailable_until = time.monotonic() + self.retry_after
+        self.last_error = reason
+        self.stats["failures"] += 1
+
+    def watched_since(self, patient: str, for_seconds: float = 0.0) -> Optional[float]:
+        """When notifications for ``patient`` started, if they last ``for_seconds`` more."""
+
+        watch = self._watches.get(patient)
+        if watch is None or watch.expires_at <= time.monotonic() + for_seconds:
+            return None
+        return watch.since
+
+    def forget(self, patient: str) -> List[str]:
+        """Stop watching ``patient``; returns its Subscription ids."""
+
+        watch = self._watches.pop(patient, None)
+        return list(watch.subscriptions.values()) if watch else []
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "endpoint": self.endpoint,
+            "available": self.available,
+            "last_error": self.last_error,
+            "lease_seconds": self.lease,
+            "watched_patients": sum(
+                self.watched_since(patient) is not None for patient in self._watches
+            ),
+            "pending_patients": len(self._pending),
+            **self.stats,
+        }
@@ -0,0 +1,168 @@
+"""
+Map-reduce summarization of PubMed result sets with Gemini.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+from .pubmed_store import ArticleRecord, render_article
+
+GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
+SUMMARY_MAP_MODEL: str = os.getenv("PUBMED_SUMMARY_MAP_MODEL", "gemini-2.5-flash-lite")
+SUMMARY_REDUCE_MODEL: str = os.getenv("PUBMED_SUMMARY_REDUCE_MODEL", "gemini-2.5-flash")
+SUMMARY_CONCURRENCY: int = int(os.getenv("PUBMED_SUMMARY_CONCURRENCY", "4"))
+
+# Rough token estimate; good enough to keep prompts well inside model limits.
+CHARS_PER_TOKEN = 4
+MAP_OUTPUT_TOKENS = 512
+REDUCE_INPUT_TOKENS = 12000
+REDUCE_OUTPUT_TOKENS = 1500
+
+ProgressCallback = Callable[[str, int, int, str], Awaitable[None]]
+
+MAP_PROMPT = """You are summarizing PubMed abstracts for a clinical evidence review.
+Question: {question}
+
+Summarize the findings relevant to the question in at most 200 words. Note study
+design and population where stated. Cite every claim with its PMID as [PMID:12345].
+Do not use knowledge beyond the abstracts below.
+
+{articles}"""
+
+REDUCE_PROMPT = """You are writing the final evidence summary for a clinical literature review.
+Question: {question}
+
+Below are partial summaries of {count} PubMed articles. Merge them into one evidence
+summary: key findings, strength and consistency of evidence, notable gaps. Keep the
+[PMID:n] citations attached to the claims they support and do not invent new ones.
+
+{summaries}"""
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chunk_records(records: Sequence[ArticleRecord], max_tokens: int) -> List[str]:
+    """Pack rendered articles into chunks of at most ``max_tokens`` (estimated).
+
+    A single article larger than the budget is truncated rather than split so
+    its PMID stays with its text.
+    """
+
+    chunks: List[str] = []
+    current: List[str] = []
+    used = 0
+    limit_chars = max_tokens * CHARS_PER_TOKEN
+    for record in records:
+        text = render_article(record)[:limit_chars]
+        cost = estimate_tokens(text)
+        if current and used + cost > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, used = [], 0
+        current.append(text)
+        used += cost
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _group_texts(texts: Sequence[str], max_tokens: int) -> List[List[str]]:
+    groups: List[List[str]] = [[]]
+    used = 0
+    for text in texts:
+        cost = estimate_tokens(text)
+        if groups[-1] and used + cost > max_tokens:
+            groups.append([])
+            used = 0
+        groups[-1].append(text)
+        used += cost
+    return groups
+
+
+class LiteratureSummarizer:
+    """Summarizes chunks in parallel with a cheap model, then reduces the partials."""
+
+    def __init__(
+        self,
+        *,
+        map_model: str = SUMMARY_MAP_MODEL,
+        reduce_model: str = SUMMARY_REDUCE_MODEL,
+        concurrency: int = SUMMARY_CONCURRENCY,
+    ) -> None:
+        from google import genai
+
+        self._genai = genai
+        self._client = genai.Client(api_key=GEMINI_API_KEY)
+        self.map_model = map_model
+        self.reduce_model = reduce_model
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _generate(self, model: str, prompt: str, max_output_tokens: int) -> str:
+        async with self._semaphore:
+            response = await self._client.aio.models.generate_content(
+                model=model,
+                contents=prompt,
+                config=self._genai.types.GenerateContentConfig(
+                    temperature=0.2, max_output_tokens=max_output_tokens
+                ),
+            )
+        return (response.text or "").strip()
+
+    async def summarize(
+        self,
+        chunks: Sequence[str],
+        *,
+        question: str,
+        article_count: int,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> str:
+        """Map every chunk to a partial summary, then reduce (hierarchically if needed)."""
+
+        total = len(chunks)
+        done = 0
+        partials: List[str] = [""] * total
+
+        async def map_chunk(index: int, chunk: str) -> None:
+            nonlocal done
+            prompt = MAP_PROMPT.format(question=question, articles=chunk)
+            partials[index] = await self._generate(self.map_model, prompt, MAP_OUTPUT_TOKENS)
+            done += 1
+            if on_progress:
+                await on_progress("map", done, total, partials[index])
+
+        await asyncio.gather(*(map_chunk(index, chunk) for index, chunk in enumerate(chunks)))
+
+        summaries = [partial for partial in partials if partial]
+        while len(summaries) > 1 and sum(map(estimate_tokens, summaries)) > REDUCE_INPUT_TOKENS:
+            groups = _group_texts(summaries, REDUCE_INPUT_TOKENS)
+            if len(groups) == len(summaries):
+                # Each partial alone fills the budget; reducing further cannot help.
+                break
+            summaries = await asyncio.gather(
+                *(
+                    self._generate(
+                        self.map_model,
+                        REDUCE_PROMPT.format(
+                            question=question,
+                            count=article_count,
+                            summaries="\n\n---\n\n".join(group),
+                        ),
+                        MAP_OUTPUT_TOKENS * 2,
+                    )
+                    for group in groups
+                )
+            )
+            if on_progress:
+                await on_progress("reduce", len(summaries), len(groups), "")
+
+        if len(summaries) == 1 and total == 1:
+            return summaries[0]
+        prompt = REDUCE_PROMPT.format(
+            question=question,
+            count=article_count,
+            summaries="\n\n---\n\n".join(summaries),
+        )
+        return await self._generate(self.reduce_model, prompt, REDUCE_OUTPUT_TOKENS)
@@ -0,0 +1,310 @@
+"""
+In-memory fuzzy patient lookup over recently seen Patient resources, with TTL eviction.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..common import json_codec
+
+_NON_LETTERS = re.compile(r"[^a-z]+")
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+_PLAIN_DATE = re.compile(r"^(?:eq)?(\d{4}-\d{2}-\d{2})$")
+# Query prefixes that match a name token which merely starts with the query,
+# mirroring how FHIR string search treats given/family.
+MIN_PREFIX_LENGTH = 3
+PREFIX_SCORE = 0.95
+PHONETIC_SCORE = 0.85
+
+
+def name_tokens(value: str) -> List[str]:
+    """Lower-case ASCII letter runs: ``"O'Brien-Smith"`` -> ``["o", "brien", "smith"]``."""
+    folded = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode().lower()
+    return [token for token in _NON_LETTERS.split(folded) if token]
+
+
+def soundex(token: str) -> str:
+    """American Soundex code, e.g. ``robert`` and ``rupert`` -> ``R163``."""
+    if not token:
+        return ""
+    code = token[0].upper()
+    previous = _SOUNDEX_CODES.get(token[0], "")
+    for letter in token[1:]:
+        digit = _SOUNDEX_CODES.get(letter, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+def similarity(query: str, token: str) -> float:
+    """Score in [0, 1] for how well a query token matches a name token."""
+    if query == token:
+        return 1.0
+    if len(query) >= MIN_PREFIX_LENGTH and token.startswith(query):
+        return PREFIX_SCORE
+    left, right = trigrams(query), trigrams(token)
+    score = len(left & right) / len(left | right)
+    if soundex(query) == soundex(token):
+        score = max(score, PHONETIC_SCORE)
+    return score
+
+
+def _identifier_keys(resource: Dict[str, Any]) -> Set[Tuple[str, str]]:
+    return {
+        (item.get("system", ""), str(item["value"]).strip().lower())
+        for item in resource.get("identifier", [])
+        if item.get("value")
+    }
+
+
+@dataclass
+class _Entry:
+    resource: Dict[str, Any]
+    # FHIR elements the stored resource is known to be complete for; None means all.
+    elements: Optional[Set[str]]
+    expires_at: float
+    given: Set[str] = field(default_factory=set)
+    family: Set[str] = field(default_factory=set)
+    postings: Set[str] = field(default_factory=set)
+
+
+class PatientIndex:
+    """Resolves name/birthDate/identifier lookups against patients seen recently.
+
+    Every Patient resource passed to :meth:`add` is indexed under the trigrams
+    and Soundex codes of its name tokens, its birth date and its identifiers,
+    and kept for ``ttl`` seconds after it was last seen (at most
+    ``max_entries`` patients, oldest first out) so PHI does not linger in
+    memory. :meth:`search` ranks candidates by name similarity and returns
+    those scoring at least ``min_score``; an empty result means the caller
+    should ask Epic.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 50_000, min_score: float = 0.8) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.min_score = min_score
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._postings: Dict[str, Set[str]] = {}
+        self.stats: Dict[str, int] = {
+            "added": 0,
+            "hits": 0,
+            "misses": 0,
+            "skipped": 0,
+            "expired": 0,
+            "evicted": 0,
+        }
+
+    def add(self, resource: Dict[str, Any], elements: Optional[Iterable[str]] = None) -> None:
+        """Index ``resource``; ``elements`` lists the elements it was fetched with."""
+        self.add_many([resource], elements)
+
+    def add_many(
+        self, resources: Iterable[Dict[str, Any]], elements: Optional[Iterable[str]] = None
+    ) -> int:
+        known = None if elements is None else set(elements) | {"id"}
+        now = time.monotonic()
+        added = 0
+        with self._lock:
+            self._expire(now)
+            for resource in resources:
+                if resource.get("resourceType", "Patient") != "Patient" or not resource.get("id"):
+                    continue
+                self._put(resource, known, now)
+                added += 1
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.stats["evicted"] += 1
+            self.stats["added"] += added
+        return added
+
+    def add_ndjson(self, path: Path | str) -> int:
+        """Index every Patient in a bulk-export NDJSON file (complete resources)."""
+        with open(path, "rb") as handle:
+            return self.add_many(json_codec.loads(line) for line in handle if line.strip())
+
+    def _put(self, resource: Dict[str, Any], known: Optional[Set[str]], now: float) -> None:
+        patient_id = resource["id"]
+        previous = self._entries.get(patient_id)
+        if previous is not None:
+            self._drop(patient_id)
+            # A partial fetch refreshes the elements it carried and keeps the rest.
+            if known is not None:
+                kept = {key: value for key, value in previous.resource.items() if key not in known}
+                resource = {**kept, **resource}
+                if previous.elements is None:
+                    known = None
+                else:
+                    known = known | previous.elements
+        entry = _Entry(resource, known, now + self.ttl)
+        for name in resource.get("name", []):
+            for given in name.get("given", []):
+                entry.given.update(name_tokens(given))
+            entry.family.update(name_tokens(name.get("family", "")))
+        for token in entry.given | entry.family:
+            entry.postings.update(f"t:{gram}" for gram in trigrams(token))
+            entry.postings.add(f"s:{soundex(token)}")
+        if resource.get("birthDate"):
+            entry.postings.add(f"b:{resource['birthDate']}")
+        entry.postings.update(f"i:{value}" for _, value in _identifier_keys(resource))
+        for key in entry.postings:
+            self._postings.setdefault(key, set()).add(patient_id)
+        self._entries[patient_id] = entry
+
+    def _drop(self, patient_id: str) -> None:
+        entry = self._entries.pop(patient_id)
+        for key in entry.postings:
+            ids = self._postings.get(key)
+            if ids is not None:
+                ids.discard(patient_id)
+                if not ids:
+                    del self._postings[key]
+
+    def _expire(self, now: float) -> None:
+        # Entries are kept in last-seen order, so expired ones are at the front.
+        while self._entries:
+            patient_id, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now:
+                break
+            self._drop(patient_id)
+            self.stats["expired"] += 1
+
+    def discard(self, patient_id: str) -> None:
+        with self._lock:
+            if patient_id in self._entries:
+                self._drop(patient_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+
+    def search(
+        self,
+        *,
+        given: Optional[str] = None,
+        family: Optional[str] = None,
+        birthdate: Optional[str] = None,
+        identifier: Optional[str] = None,
+        elements: Iterable[str] = (),
+        limit: int = 20,
+        min_score: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Best local matches, highest score first, or ``[]`` when Epic must be asked.
+
+        Only candidates whose stored resource covers ``elements`` and score at
+        least ``min_score`` (the index's own threshold by default) qualify.
+        Searches the index cannot answer faithfully (birth-date ranges, or no
+        name or identifier to anchor on) always return ``[]``.
+        """
+        date = None
+        if birthdate:
+            match = _PLAIN_DATE.match(birthdate)
+            if not match:
+                return self._skip()
+            date = match.group(1)
+        given_tokens = name_tokens(given or "")
+        family_tokens = name_tokens(family or "")
+        if not (identifier or given_tokens or family_tokens):
+            return self._skip()
+
+        wanted = set(elements)
+        threshold = self.min_score if min_score is None else min_score
+        with self._lock:
+            self._expire(time.monotonic())
+            candidates = self._candidates(identifier, given_tokens + family_tokens, date)
+            scored = []
+            for patient_id in candidates:
+                entry = self._entries[patient_id]
+                if entry.elements is not None and not wanted <= entry.elements:
+                    continue
+                score = self._score(entry, identifier, given_tokens, family_tokens, date)
+                if score >= threshold:
+                    scored.append((score, patient_id, entry.resource))
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            self.stats["hits" if scored else "misses"] += 1
+        return [resource for _, _, resource in scored[:limit]]
+
+    def _skip(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.stats["skipped"] += 1
+        return []
+
+    def _candidates(
+        self, identifier: Optional[str], tokens: List[str], date: Optional[str]
+    ) -> Set[str]:
+        if identifier:
+            return set(self._postings.get(f"i:{identifier.rpartition('|')[2].lower()}", ()))
+        candidates: Set[str] = set()
+        for token in tokens:
+            candidates.update(self._postings.get(f"s:{soundex(token)}", ()))
+            for gram in trigrams(token):
+                candidates.update(self._postings.get(f"t:{gram}", ()))
+        if date:
+            candidates &= self._postings.get(f"b:{date}", set())
+        return candidates
+
+    @staticmethod
+    def _score(
+        entry: _Entry,
+        identifier: Optional[str],
+        given: List[str],
+        family: List[str],
+        date: Optional[str],
+    ) -> float:
+        if date and entry.resource.get("birthDate") != date:
+            return 0.0
+        if identifier:
+            system, _, value = identifier.rpartition("|")
+            keys = _identifier_keys(entry.resource)
+            if not any(
+                value.lower() == stored and (not system or system == stored_system)
+                for stored_system, stored in keys
+            ):
+                return 0.0
+        parts = []
+        for tokens, stored in ((given, entry.given), (family, entry.family)):
+            if not tokens:
+                continue
+            if not stored:
+                return 0.0
+            parts.append(
+                sum(max(similarity(token, name) for name in stored) for token in tokens)
+                / len(tokens)
+            )
+        return sum(parts) / len(parts) if parts else 1.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "ttl_seconds": self.ttl,
+                "max_entries": self.max_entries,
+                "min_score": self.min_score,
+                "entries": len(self._entries),
+                **self.stats,
+            }
@@ -6,16 +6,115 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import asyncio
+import os
+import re
+import time
+from collections import Counter
+from datetime import datetime
 import aiohttp
-from typing import Dict, Any, Optional, Literal
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Literal
 from urllib.parse import urlencode, quote_plus
 
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
 from pydantic import BaseModel, Field
 
+from ..common import json_codec
+from ..common.readiness import ProbeFailed
+from . import literature_summary
+from .pubmed_store import ArticleRecord, PubMedStore, parse_pubmed_xml, render_article
+from .upstream import Upstream, UpstreamError
+
+# Optional local article store. "cache" serves known PMIDs locally and only
+# EFetches the rest; "mirror" also answers simple term/author searches from
+# the full-text index, but only when it fills the requested page and was synced
+# within PUBMED_MIRROR_MAX_AGE_SECONDS - otherwise NCBI is asked, and the local
+# hits are only served (flagged as possibly incomplete) if NCBI fails.
+PUBMED_LOCAL_STORE: Optional[str] = os.getenv("PUBMED_LOCAL_STORE")
+PUBMED_LOCAL_MODE: str = os.getenv("PUBMED_LOCAL_MODE", "cache").lower()
+PUBMED_MIRROR_MAX_AGE_SECONDS: float = float(
+    os.getenv("PUBMED_MIRROR_MAX_AGE_SECONDS", str(2 * 24 * 60 * 60))
+)
+PUBMED_FTP_URL: str = os.getenv("PUBMED_FTP_URL", "https://ftp.ncbi.nlm.nih.gov/pubmed")
+# An NCBI API key raises the E-utilities limit from 3 to 10 requests per second.
+NCBI_API_KEY: Optional[str] = os.getenv("NCBI_API_KEY")
+
+ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+ESUMMARY_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+ELINK_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/elink.fcgi"
+EINFO_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/einfo.fcgi"
+SYNC_DOWNLOAD_CHUNK_BYTES = 1 << 20
+EFETCH_BATCH_SIZE = 200
+_SYNC_FILE_PATTERN = re.compile(r"pubmed\d+n\d+\.xml\.gz")
+DEFAULT_PUBLICATION_TYPES = [
+    "Randomized Controlled Trial",
+    "Clinical Trial",
+    "Meta-Analysis",
+    "Systematic Review",
+    "Review",
+    "Observational Study",
+    "Case Reports",
+]
+# Top results sampled to pick journals when count_by_facet gets none.
+JOURNAL_SAMPLE_SIZE = 100
+# PMIDs per ELink request; each is sent as its own id= so link sets stay per source.
+ELINK_BATCH_SIZE = 100
+# relation -> (ELink cmd, linkname)
+ELINK_RELATIONS = {
+    "similar": ("neighbor_score", "pubmed_pubmed"),
+    "cited_by": ("neighbor", "pubmed_pubmed_citedin"),
+    "references": ("neighbor", "pubmed_pubmed_refs"),
+}
+# Citation links carry no score; they count as a moderately similar neighbour.
+CITATION_EDGE_WEIGHT = 0.5
+
+# Timeouts, breakers and response cache for NCBI E-utilities and the FTP mirror
+# (NCBI_CONNECT_TIMEOUT, NCBI_READ_TIMEOUT, NCBI_BREAKER_FAILURES, NCBI_BREAKER_RESET,
+# NCBI_HEDGE, NCBI_CACHE_TTL, NCBI_RATE_LIMIT). Hedging is opt-in because duplicate
+# requests count against NCBI's rate limit, which the limiter enforces client-side.
+NCBI_UPSTREAM = Upstream(
+    "NCBI",
+    "NCBI",
+    connect_timeout=5.0,
+    read_timeout=30.0,
+    cache_ttl=600.0,
+    rate_limit=10.0 if NCBI_API_KEY else 3.0,
+)
+
 # PubMed MCP Server
 pubmed_server = FastMCP("PubMedMCP")
 
+_LOCAL_STORE: Optional[PubMedStore] = None
+
+
+def _eutils_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the NCBI API key to E-utilities parameters when one is configured."""
+    return {**params, "api_key": NCBI_API_KEY} if NCBI_API_KEY else params
+
+
+async def probe_eutils() -> str:
+    """Readiness probe: one uncached EInfo call through the NCBI breaker and rate limiter."""
+    async with aiohttp.ClientSession() as session:
+        response = await NCBI_UPSTREAM.request(
+            session,
+            "GET",
+            EINFO_URL,
+            params=_eutils_params({"db": "pubmed", "retmode": "json"}),
+            hedge=False,
+        )
+    if response.status != 200:
+        raise ProbeFailed(f"E-utilities returned HTTP {response.status}")
+    return "E-utilities reachable"
+
+
+def _local_store() -> Optional[PubMedStore]:
+    """Return the local article store when PUBMED_LOCAL_STORE is configured."""
+    global _LOCAL_STORE
+    if _LOCAL_STORE is None and PUBMED_LOCAL_STORE:
+        _LOCAL_STORE = PubMedStore(PUBMED_LOCAL_STORE)
+    return _LOCAL_STORE
+
 
 class SearchAbstractsRequest(BaseModel):
     """
@@ -46,6 +145,9 @@ class SearchAbstractsRequest(BaseModel):
         ...     term="asthma",
         ...     sort="pub_date"
         ... )
+
+        >>> # Titles, journals, dates and authors only, for triage
+        >>> SearchAbstractsRequest(term="asthma", retmax=200, mode="summary")
     """
 
     term: str = Field(
@@ -98,6 +200,242 @@ class SearchAbstractsRequest(BaseModel):
         description="""End date for date range. Format: YYYY/MM/DD, YYYY/MM, or YYYY. 
         Must be used with mindate.""",
     )
+    mode: Literal["abstract", "summary"] = Field(
+        "abstract",
+        description="""Result detail:
+        - abstract: full abstracts (default)
+        - summary: title, journal, date and authors only; much smaller, use for triage
+        before fetching details of selected PMIDs""",
+    )
+
+
+class SummarizeLiteratureRequest(SearchAbstractsRequest):
+    """
+    Request parameters for summarizing a large PubMed result set.
+
+    Examples:
+        >>> # Evidence summary over the 500 most relevant asthma biologics papers
+        >>> SummarizeLiteratureRequest(
+        ...     term="asthma biologics",
+        ...     retmax=500,
+        ...     question="How do biologics compare for severe eosinophilic asthma?"
+        ... )
+    """
+
+    retmax: Optional[int] = Field(
+        200,
+        ge=1,
+        le=10000,
+        description="""Number of articles to summarize (default=200, max=10000).""",
+    )
+    question: Optional[str] = Field(
+        None,
+        description="""Question the summary should answer. Defaults to the search term.""",
+    )
+    chunk_tokens: int = Field(
+        6000,
+        ge=1000,
+        le=30000,
+        description="""Approximate token budget of the abstracts sent in each map call.""",
+    )
+
+
+async def _fetch_records(
+    session: aiohttp.ClientSession, id_list: List[str]
+) -> Dict[str, ArticleRecord] | str:
+    """Fetch structured article records for PMIDs via XML EFetch.
+
+    PMIDs already in the local store are served from it; the rest are EFetched
+    in batches of EFETCH_BATCH_SIZE and, when a store is configured, ingested.
+
+    Args:
+        session: Open aiohttp session
+        id_list: PMIDs to fetch
+
+    Returns:
+        Records keyed by PMID, or an error message starting with "Error:"
+    """
+    store = _local_store()
+    records: Dict[str, ArticleRecord] = (
+        await asyncio.to_thread(store.get_many, id_list) if store else {}
+    )
+    missing = [pmid for pmid in id_list if pmid not in records]
+    for start in range(0, len(missing), EFETCH_BATCH_SIZE):
+        batch = missing[start:start + EFETCH_BATCH_SIZE]
+        efetch_params = {
+            "db": "pubmed",
+            "retmode": "xml",
+            "rettype": "abstract",
+            "id": ",".join(batch),
+            "tool": "PubMedMCP",
+            "email": "research@example.com"
+        }
+        response = await NCBI_UPSTREAM.request(
+            session, "GET", EFETCH_URL, params=_eutils_params(efetch_params), cacheable=True
+        )
+        if response.status != 200:
+            return f"Error: EFetch request failed with status {response.status}"
+        if store:
+            await asyncio.to_thread(store.ingest, response.body)
+            records.update(await asyncio.to_thread(store.get_many, batch))
+        else:
+            records.update(
+                (payload["pmid"], payload)
+                for kind, payload in parse_pubmed_xml(response.body)
+                if kind == "article"
+            )
+    return records
+
+
+def _docsum_to_record(doc: Dict[str, Any]) -> ArticleRecord:
+    doi = next(
+        (
+            item.get("value", "")
+            for item in doc.get("articleids", [])
+            if item.get("idtype") == "doi"
+        ),
+        "",
+    )
+    return ArticleRecord(
+        pmid=str(doc.get("uid", "")),
+        title=doc.get("title", ""),
+        abstract="",
+        authors=[author.get("name", "") for author in doc.get("authors", [])],
+        journal=doc.get("source", ""),
+        pub_date=doc.get("pubdate", ""),
+        doi=doi,
+    )
+
+
+async def _fetch_docsums(
+    session: aiohttp.ClientSession, id_list: List[str]
+) -> Dict[str, ArticleRecord] | str:
+    """Fetch ESummary DocSums (no abstracts) for PMIDs in batches of EFETCH_BATCH_SIZE.
+
+    Args:
+        session: Open aiohttp session
+        id_list: PMIDs to summarize
+
+    Returns:
+        Abstract-less records keyed by PMID, or an error message starting with "Error:"
+    """
+    records: Dict[str, ArticleRecord] = {}
+    for start in range(0, len(id_list), EFETCH_BATCH_SIZE):
+        esummary_params = {
+            "db": "pubmed",
+            "retmode": "json",
+            "id": ",".join(id_list[start:start + EFETCH_BATCH_SIZE]),
+            "tool": "PubMedMCP",
+            "email": "research@example.com"
+        }
+        response = await NCBI_UPSTREAM.request(
+            session, "GET", ESUMMARY_URL, params=_eutils_params(esummary_params), cacheable=True
+        )
+        if response.status != 200:
+            return f"Error: ESummary request failed with status {response.status}"
+        result = response.json().get("result")
+        if not isinstance(result, dict):
+            return "Error: Invalid response from PubMed ESummary"
+        for uid in result.get("uids", []):
+            if "error" not in result.get(uid, {}):
+                records[uid] = _docsum_to_record(result[uid])
+    return records
+
+
+async def _fetch_abstracts(session: aiohttp.ClientSession, id_list: List[str]) -> str:
+    """Fetch abstracts for PMIDs, serving from the local store when enabled.
+
+    Without a local store this returns EFetch's plain-text abstracts. With one,
+    known PMIDs are rendered locally and only the missing ones are EFetched as
+    XML, which also populates the store for next time.
+
+    Args:
+        session: Open aiohttp session
+        id_list: PMIDs to fetch, in display order
+
+    Returns:
+        Abstract text, or an error message starting with "Error:"
+    """
+    if _local_store() is None:
+        efetch_params = {
+            "db": "pubmed",
+            "retmode": "text",
+            "rettype": "abstract",
+            "id": ",".join(id_list),
+            "tool": "PubMedMCP",
+            "email": "research@example.com"
+        }
+        response = await NCBI_UPSTREAM.request(
+            session, "GET", EFETCH_URL, params=_eutils_params(efetch_params), cacheable=True
+        )
+        if response.status != 200:
+            return f"Error: EFetch request failed with status {response.status}"
+        return response.text()
+
+    records = await _fetch_records(session, id_list)
+    if isinstance(records, str):
+        return records
+
+    return "\n\n\n".join(
+        render_article(records[pmid], position)
+        for position, pmid in enumerate((pmid for pmid in id_list if pmid in records), 1)
+    )
+
+
+async def _esearch(
+    session: aiohttp.ClientSession, request: SearchAbstractsRequest
+) -> List[str] | str:
+    """Run ESearch for a request and return its PMIDs, or an error message.
+
+    Args:
+        session: Open aiohttp session
+        request: SearchAbstractsRequest with search parameters
+
+    Returns:
+        PMIDs in ESearch order, or an error message starting with "Error:"
+    """
+    # Build search parameters
+    search_params = {
+        "db": "pubmed",
+        "term": request.term,
+        "retmax": request.retmax or 20,
+        "retmode": "json",
+        "tool": "PubMedMCP",
+        "email": "research@example.com"
+    }
+
+    # Add optional parameters
+    if request.sort:
+        search_params["sort"] = request.sort
+    if request.field:
+        search_params["field"] = request.field
+    if request.datetype:
+        search_params["datetype"] = request.datetype
+    if request.reldate:
+        search_params["reldate"] = request.reldate
+    if request.mindate:
+        search_params["mindate"] = request.mindate
+    if request.maxdate:
+        search_params["maxdate"] = request.maxdate
+
+    # Perform ESearch to get article IDs
+    response = await NCBI_UPSTREAM.request(
+        session, "GET", ESEARCH_URL, params=_eutils_params(search_params), cacheable=True
+    )
+    if response.status != 200:
+        return f"Error: ESearch request failed with status {response.status}"
+
+    search_data = response.json()
+    if "esearchresult" not in search_data:
+        return "Error: Invalid response from PubMed ESearch"
+    return search_data["esearchresult"].get("idlist", [])
+
+
+def _is_simple_search(request: "SearchAbstractsRequest") -> bool:
+    """Whether a search can be answered from the local full-text index."""
+    return not any(
+        [request.field, request.datetype, request.reldate, request.mindate, request.maxdate]
+    ) and request.sort in (None, "relevance", "pub_date")
 
 
 async def _search_pubmed_abstracts(request: SearchAbstractsRequest) -> str:
@@ -115,77 +453,142 @@ async def _search_pubmed_abstracts(request: SearchAbstractsRequest) -> str:
     Args:
         request: SearchAbstractsRequest with search parameters
     """
+    local_records: List[ArticleRecord] = []
     try:
-        # Build search parameters
-        search_params = {
-            "db": "pubmed",
-            "term": request.term,
-            "retmax": request.retmax or 20,
-            "retmode": "json",
-            "tool": "PubMedMCP",
-            "email": "research@example.com"
-        }
-
-        # Add optional parameters
-        if request.sort:
-            search_params["sort"] = request.sort
-        if request.field:
-            search_params["field"] = request.field
-        if request.datetype:
-            search_params["datetype"] = request.datetype
-        if request.reldate:
-            search_params["reldate"] = request.reldate
-        if request.mindate:
-            search_params["mindate"] = request.mindate
-        if request.maxdate:
-            search_params["maxdate"] = request.maxdate
-
-        # Perform ESearch to get article IDs
-        esearch_url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+        store = _local_store()
+        if store and PUBMED_LOCAL_MODE == "mirror" and _is_simple_search(request):
+            limit = request.retmax or 20
+            local_records = await asyncio.to_thread(
+                store.search,
+                request.term,
+                limit=limit,
+                newest_first=request.sort == "pub_date",
+            )
+            last_sync = await asyncio.to_thread(store.last_sync)
+            fresh = last_sync is not None and (
+                time.time() - last_sync <= PUBMED_MIRROR_MAX_AGE_SECONDS
+            )
+            # A short page may just mean the mirror is missing articles.
+            if fresh and len(local_records) >= limit:
+                return _render_local(request, local_records)
 
         async with aiohttp.ClientSession() as session:
-            async with session.get(esearch_url, params=search_params) as response:
-                if response.status != 200:
-                    return f"Error: ESearch request failed with status {response.status}"
+            id_list = await _esearch(session, request)
+            if isinstance(id_list, str):
+                return id_list
+
+            if not id_list:
+                return f"No articles found for the search query: {request.term}"
+
+            if request.mode == "summary":
+                docsums = await _fetch_docsums(session, id_list)
+                if isinstance(docsums, str):
+                    return docsums
+                summaries_text = "\n\n".join(
+                    render_article(docsums[pmid], position)
+                    for position, pmid in enumerate(
+                        (pmid for pmid in id_list if pmid in docsums), 1
+                    )
+                )
+                return (
+                    f"Search Results for '{request.term}' ({len(id_list)} articles found, "
+                    f"summary mode):\n\n{summaries_text}"
+                )
+
+            # Fetch article details (locally where possible)
+            abstracts_text = await _fetch_abstracts(session, id_list)
+            if abstracts_text.startswith("Error:"):
+                return abstracts_text
+
+            return f"Search Results for '{request.term}' ({len(id_list)} articles found):\n\n{abstracts_text}"
+
+    except UpstreamError as e:
+        if local_records:
+            return _render_local(
+                request,
+                local_records,
+                note=f"NCBI is unavailable ({e}); local results may be incomplete or stale.",
+            )
+        return f"Error: {str(e)}"
+    except Exception as e:
+        return f"Error searching PubMed: {str(e)}"
 
-                search_data = await response.json()
 
-                if "esearchresult" not in search_data:
-                    return "Error: Invalid response from PubMed ESearch"
+def _render_local(
+    request: SearchAbstractsRequest, records: List[ArticleRecord], note: str = ""
+) -> str:
+    if request.mode == "summary":
+        records = [{**record, "abstract": ""} for record in records]
+    abstracts_text = "\n\n\n".join(
+        render_article(record, position) for position, record in enumerate(records, 1)
+    )
+    header = f"Search Results for '{request.term}' ({len(records)} articles found in local index):"
+    if note:
+        header += f"\n{note}"
+    return f"{header}\n\n{abstracts_text}"
 
-                search_result = search_data["esearchresult"]
-                id_list = search_result.get("idlist", [])
 
-                if not id_list:
-                    return f"No articles found for the search query: {request.term}"
+@pubmed_server.tool()
+async def search_abstracts(request: SearchAbstractsRequest) -> str:
+    """Search abstracts on PubMed database based on the request parameters."""
+    return await _search_pubmed_abstracts(request)
 
-                # Perform EFetch to get article details
-                efetch_params = {
-                    "db": "pubmed",
-                    "id": ",".join(id_list),
-                    "retmode": "text",
-                    "rettype": "abstract",
-                    "tool": "PubMedMCP",
-                    "email": "research@example.com"
-                }
 
-                efetch_url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+@pubmed_server.tool()
+async def summarize_literature(request: SummarizeLiteratureRequest, ctx: Context) -> str:
+    """Summarize a large PubMed result set into one cited evidence summary.
 
-                async with session.get(efetch_url, params=efetch_params) as fetch_response:
-                    if fetch_response.status != 200:
-                        return f"Error: EFetch request failed with status {fetch_response.status}"
+    Abstracts are split into token-bounded chunks, summarized in parallel with a
+    cheaper model, then reduced into a final summary citing PMIDs. Partial
+    summaries are streamed as progress notifications while the map step runs.
+    Prefer this over search_abstracts for literature reviews of more than a few
+    dozen papers.
 
-                    abstracts_text = await fetch_response.text()
+    Args:
+        request: SummarizeLiteratureRequest with search parameters and question
 
-                    return f"Search Results for '{request.term}' ({len(id_list)} articles found):\n\n{abstracts_text}"
+    Returns:
+        Evidence summary with [PMID:n] citations followed by run statistics
+    """
+    if not literature_summary.GEMINI_API_KEY:
+        return "Error: GEMINI_API_KEY is not set; literature summarization is unavailable."
 
+    question = request.question or request.term
+    try:
+        async with aiohttp.ClientSession() as session:
+            id_list = await _esearch(session, request)
+            if isinstance(id_list, str):
+                return id_list
+            if not id_list:
+                return f"No articles found for the search query: {request.term}"
+            await ctx.info(f"Fetching {len(id_list)} articles for '{request.term}'")
+            records = await _fetch_records(session, id_list)
+        if isinstance(records, str):
+            return records
+
+        ordered = [records[pmid] for pmid in id_list if pmid in records]
+        chunks = literature_summary.chunk_records(ordered, request.chunk_tokens)
+
+        async def on_progress(stage: str, done: int, total: int, partial: str) -> None:
+            await ctx.report_progress(done, total, f"{stage} {done}/{total}")
+            if partial:
+                await ctx.info(partial)
+
+        summarizer = literature_summary.LiteratureSummarizer()
+        summary = await summarizer.summarize(
+            chunks, question=question, article_count=len(ordered), on_progress=on_progress
+        )
+    except UpstreamError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
-        return f"Error searching PubMed: {str(e)}"
+        return f"Error summarizing PubMed literature: {str(e)}"
 
-@pubmed_server.tool()
-async def search_abstracts(request: SearchAbstractsRequest) -> str:
-    """Search abstracts on PubMed database based on the request parameters."""
-    return await _search_pubmed_abstracts(request)
+    return (
+        f"Evidence Summary for '{question}'\n\n{summary}\n\n"
+        f"Summarized {len(ordered)} of {len(id_list)} articles found for '{request.term}' "
+        f"in {len(chunks)} chunks (map model: {summarizer.map_model}, "
+        f"reduce model: {summarizer.reduce_model})."
+    )
 
 
 @pubmed_server.tool()
@@ -200,28 +603,78 @@ async def get_article_details(pmid: str) -> str:
     """
 
     try:
-        efetch_params = {
-            "db": "pubmed",
-            "id": pmid,
-            "retmode": "text",
-            "rettype": "abstract",
-            "tool": "PubMedMCP",
-            "email": "research@example.com"
-        }
+        async with aiohttp.ClientSession() as session:
+            article_data = await _fetch_abstracts(session, [pmid])
+        if article_data.startswith("Error:"):
+            return article_data
 
-        efetch_url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+        return f"Article Details for PMID {pmid}:\n\n{article_data}"
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(efetch_url, params=efetch_params) as response:
-                if response.status != 200:
-                    return f"Error: EFetch request failed with status {response.status}"
+    except UpstreamError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        return f"Error retrieving article {pmid}: {str(e)}"
 
-                article_data = await response.text()
 
-                return f"Article Details for PMID {pmid}:\n\n{article_data}"
+@pubmed_server.tool()
+async def sync_local_index(
+    source: Literal["updatefiles", "baseline"] = "updatefiles", max_files: int = 1
+) -> Dict[str, Any]:
+    """Incrementally load NCBI baseline or daily update files into the local index.
 
+    Files already ingested are skipped, so repeated calls walk forward through
+    the update stream. Requires PUBMED_LOCAL_STORE to be configured.
+
+    Args:
+        source: NCBI file set to sync from (default: updatefiles)
+        max_files: Maximum number of new files to ingest in this call (default: 1)
+
+    Returns:
+        Files ingested with article/deletion counts and the store totals
+    """
+    store = _local_store()
+    if store is None:
+        return {"error": "Local PubMed store is disabled; set PUBMED_LOCAL_STORE to enable it."}
+
+    listing_url = f"{PUBMED_FTP_URL.rstrip('/')}/{source}/"
+    ingested = []
+    try:
+        async with aiohttp.ClientSession() as session:
+            response = await NCBI_UPSTREAM.request(session, "GET", listing_url)
+            if response.status != 200:
+                return {"error": f"Listing {listing_url} failed with status {response.status}"}
+            listing = response.text()
+
+            available = sorted(set(_SYNC_FILE_PATTERN.findall(listing)))
+            synced = await asyncio.to_thread(store.synced_files)
+            unsynced = [name for name in available if name not in synced]
+            pending = unsynced[:max(1, max_files)]
+
+            for name in pending:
+                destination = Path(store.path).with_name(name)
+                async with NCBI_UPSTREAM.stream(session, "GET", listing_url + name) as response:
+                    if response.status != 200:
+                        return {
+                            "error": f"Downloading {name} failed with status {response.status}",
+                            "ingested": ingested,
+                        }
+                    with open(destination, "wb") as handle:
+                        async for chunk in response.content.iter_chunked(SYNC_DOWNLOAD_CHUNK_BYTES):
+                            handle.write(chunk)
+                try:
+                    upserted, deleted = await asyncio.to_thread(store.ingest_file, destination)
+                finally:
+                    destination.unlink(missing_ok=True)
+                ingested.append({"file": name, "articles": upserted, "deleted": deleted})
     except Exception as e:
-        return f"Error retrieving article {pmid}: {str(e)}"
+        return {"error": f"Error syncing local PubMed index: {str(e)}", "ingested": ingested}
+
+    return {
+        "source": source,
+        "ingested": ingested,
+        "remaining": len(unsynced) - len(ingested),
+        "store": await asyncio.to_thread(store.stats),
+    }
 
 
 @pubmed_server.tool()
@@ -272,6 +725,245 @@ async def search_recent_articles(topic: str, days: int = 30, retmax: int = 20) -
     return await _search_pubmed_abstracts(request)
 
 
+async def _elink(
+    session: aiohttp.ClientSession, id_list: List[str], relation: str
+) -> Dict[str, List[tuple[str, float]]]:
+    """Return ``{source: [(target, weight), ...]}`` for one ELink relation.
+
+    Similar-article weights are neighbor scores normalised to the source's best
+    match; citation links get CITATION_EDGE_WEIGHT.
+    """
+    cmd, linkname = ELINK_RELATIONS[relation]
+    links: Dict[str, List[tuple[str, float]]] = {}
+    for start in range(0, len(id_list), ELINK_BATCH_SIZE):
+        elink_params = {
+            "dbfrom": "pubmed",
+            "db": "pubmed",
+            "cmd": cmd,
+            "linkname": linkname,
+            "retmode": "json",
+            "tool": "PubMedMCP",
+            "email": "research@example.com"
+        }
+        params = list(_eutils_params(elink_params).items()) + [
+            ("id", pmid) for pmid in id_list[start:start + ELINK_BATCH_SIZE]
+        ]
+        response = await NCBI_UPSTREAM.request(
+            session, "GET", ELINK_URL, params=params, cacheable=True
+        )
+        if response.status != 200:
+            raise UpstreamError(f"ELink request failed with status {response.status}")
+        for linkset in response.json().get("linksets", []):
+            for source in linkset.get("ids", []):
+                edges = links.setdefault(str(source), [])
+                for linksetdb in linkset.get("linksetdbs", []):
+                    if linksetdb.get("linkname") != linkname:
+                        continue
+                    if cmd == "neighbor_score":
+                        scored = [
+                            (str(link["id"]), float(link.get("score", 0)))
+                            for link in linksetdb.get("links", [])
+                        ]
+                        best = max((score for _, score in scored), default=0.0) or 1.0
+                        edges.extend((target, score / best) for target, score in scored)
+                    else:
+                        edges.extend(
+                            (str(target), CITATION_EDGE_WEIGHT)
+                            for target in linksetdb.get("links", [])
+                        )
+    return links
+
+
+@pubmed_server.tool()
+async def expand_related(
+    pmids: List[str],
+    relations: Optional[List[Literal["similar", "cited_by", "references"]]] = None,
+    depth: int = 1,
+    fanout: int = 20,
+    max_results: int = 50,
+    include_summaries: bool = True,
+) -> Dict[str, Any]:
+    """Expand seed PMIDs into a ranked set of related articles via ELink.
+
+    Runs a breadth-first expansion: each level links every frontier PMID in
+    batched ELink requests (concurrently per relation), scores candidates by the
+    sum of their edge weights discounted by depth, and keeps only the top
+    ``fanout`` new PMIDs as the next frontier. Use this instead of looping over
+    get_article_details when gathering evidence around known papers.
+
+    Args:
+        pmids: Seed PubMed IDs
+        relations: Link types to follow: similar (PubMed neighbours, scored),
+            cited_by and references (default: similar)
+        depth: Expansion levels, 1-3 (default: 1)
+        fanout: PMIDs expanded further per level (default: 20)
+        max_results: Maximum related articles to return (default: 50)
+        include_summaries: Attach title/journal/date from ESummary (default: true)
+
+    Returns:
+        Ranked related articles with scores and the edges that connect them
+    """
+    seeds = list(dict.fromkeys(pmid.strip() for pmid in pmids if pmid.strip().isdigit()))
+    if not seeds:
+        return {"error": "Provide at least one numeric PMID."}
+    relations = list(dict.fromkeys(relations or ["similar"]))
+    depth = max(1, min(depth, 3))
+    fanout = max(1, min(fanout, 100))
+    max_results = max(1, min(max_results, 500))
+
+    scores: Dict[str, float] = {}
+    found_at: Dict[str, int] = {}
+    edges: List[Dict[str, Any]] = []
+    visited = set(seeds)
+    frontier = seeds
+    try:
+        async with aiohttp.ClientSession() as session:
+            for level in range(1, depth + 1):
+                results = await asyncio.gather(
+                    *(_elink(session, frontier, relation) for relation in relations)
+                )
+                discount = 0.5 ** (level - 1)
+                level_scores: Dict[str, float] = {}
+                for relation, links in zip(relations, results):
+                    for source, targets in links.items():
+                        for target, weight in targets:
+                            if target in seeds or target == source:
+                                continue
+                            edges.append({
+                                "source": source,
+                                "target": target,
+                                "relation": relation,
+                                "weight": round(weight, 4),
+                            })
+                            scores[target] = scores.get(target, 0.0) + weight * discount
+                            if target not in visited:
+                                level_scores[target] = scores[target]
+                                found_at.setdefault(target, level)
+                frontier = sorted(level_scores, key=level_scores.get, reverse=True)[:fanout]
+                visited.update(frontier)
+                if not frontier:
+                    break
+
+            ranked = sorted(scores, key=scores.get, reverse=True)[:max_results]
+            docsums = (
+                await _fetch_docsums(session, ranked) if include_summaries and ranked else {}
+            )
+    except UpstreamError as e:
+        return {"error": f"Error: {str(e)}"}
+    except Exception as e:
+        return {"error": f"Error expanding related PubMed articles: {str(e)}"}
+
+    if isinstance(docsums, str):
+        docsums = {}
+    kept = set(ranked) | set(seeds)
+    articles = []
+    for pmid in ranked:
+        article: Dict[str, Any] = {
+            "pmid": pmid, "score": round(scores[pmid], 4), "depth": found_at[pmid]
+        }
+        if pmid in docsums:
+            record = docsums[pmid]
+            article.update(
+                title=record["title"], journal=record["journal"], pub_date=record["pub_date"]
+            )
+        articles.append(article)
+    return {
+        "seeds": seeds,
+        "relations": relations,
+        "articles": articles,
+        "edges": [edge for edge in edges if edge["source"] in kept and edge["target"] in kept],
+        "candidates_seen": len(scores),
+    }
+
+
+async def _esearch_count(session: aiohttp.ClientSession, term: str) -> int:
+    search_params = {
+        "db": "pubmed",
+        "term": term,
+        "rettype": "count",
+        "retmode": "json",
+        "tool": "PubMedMCP",
+        "email": "research@example.com"
+    }
+    response = await NCBI_UPSTREAM.request(
+        session, "GET", ESEARCH_URL, params=_eutils_params(search_params), cacheable=True
+    )
+    if response.status != 200:
+        raise UpstreamError(f"ESearch count request failed with status {response.status}")
+    return int(response.json().get("esearchresult", {}).get("count", 0))
+
+
+@pubmed_server.tool()
+async def count_by_facet(
+    term: str,
+    facet: Literal["year", "publication_type", "journal"] = "year",
+    values: Optional[List[str]] = None,
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+    max_values: int = 10,
+) -> Dict[str, Any]:
+    """Count matching articles per year, publication type or journal without fetching them.
+
+    Issues concurrent count-only ESearches, so trend and triage questions cost
+    a few kilobytes. Counts are exact PubMed totals for each facet value.
+
+    Args:
+        term: PubMed search query
+        facet: Dimension to histogram by (default: year)
+        values: Facet values to count (years, publication types or journal
+            abbreviations). Defaults: the year range, common study designs, or
+            the most frequent journals among the top results.
+        start_year: First year for the year facet (default: end_year - 9)
+        end_year: Last year for the year facet (default: current year)
+        max_values: Maximum number of facet values to count (default: 10)
+
+    Returns:
+        Total count for the term and a count per facet value
+    """
+    max_values = max(1, min(max_values, 50))
+    try:
+        async with aiohttp.ClientSession() as session:
+            if values:
+                facet_values = values[:max_values]
+            elif facet == "year":
+                last = end_year or datetime.now().year
+                first = max(start_year or last - 9, last - max_values + 1)
+                facet_values = [str(year) for year in range(first, last + 1)]
+            elif facet == "publication_type":
+                facet_values = DEFAULT_PUBLICATION_TYPES[:max_values]
+            else:
+                id_list = await _esearch(
+                    session, SearchAbstractsRequest(term=term, retmax=JOURNAL_SAMPLE_SIZE)
+                )
+                if isinstance(id_list, str):
+                    return {"error": id_list}
+                docsums = await _fetch_docsums(session, id_list) if id_list else {}
+                if isinstance(docsums, str):
+                    return {"error": docsums}
+                journals = Counter(record["journal"] for record in docsums.values())
+                facet_values = [name for name, _ in journals.most_common(max_values) if name]
+
+            tag = {"year": "pdat", "publication_type": "pt", "journal": "ta"}[facet]
+            counts = await asyncio.gather(
+                _esearch_count(session, term),
+                *(
+                    _esearch_count(session, f'({term}) AND "{value}"[{tag}]')
+                    for value in facet_values
+                ),
+            )
+    except UpstreamError as e:
+        return {"error": f"Error: {str(e)}"}
+    except Exception as e:
+        return {"error": f"Error counting PubMed results: {str(e)}"}
+
+    return {
+        "term": term,
+        "facet": facet,
+        "total": counts[0],
+        "counts": dict(zip(facet_values, counts[1:])),
+    }
+
+
 @pubmed_server.prompt()
 def pubmed_research_prompt(topic: str = "medical research") -> str:
     """Generate a prompt for PubMed research assistance."""
@@ -284,6 +976,10 @@ Available PubMed Tools:
 - get_article_details: Get detailed information for specific articles by PMID
 - search_by_author: Find articles by specific authors
 - search_recent_articles: Find recent publications on a topic
+- count_by_facet: Article counts by year, publication type or journal (trends, triage)
+- expand_related: Ranked similar, citing and cited articles for a set of PMIDs
+- summarize_literature: Cited evidence summary over hundreds of search results
+- sync_local_index: Load NCBI update files into the local index (when enabled)
 
 Research Guidelines:
 1. Use specific medical terminology and MeSH terms when possible
@@ -307,11 +1003,21 @@ async def get_pubmed_capabilities() -> Dict[str, Any]:
             "Abstract search with advanced filtering",
             "Author-based article search",
             "Recent publications search",
+            "Lightweight summary-mode search (titles, journals, dates, authors)",
+            "Count histograms by year, publication type or journal",
+            "Related-article and citation graph expansion",
             "Detailed article retrieval",
+            "Map-reduce evidence summaries over large result sets",
+            "Optional local full-text index with incremental NCBI sync",
             "Date range filtering",
             "Field-specific searches"
         ],
         "supported_databases": ["PubMed"],
+        "local_store": (
+            {"mode": PUBMED_LOCAL_MODE, **_local_store().stats()} if _local_store() else None
+        ),
+        "json_backend": json_codec.JSON_BACKEND,
+        "upstream": NCBI_UPSTREAM.snapshot(),
         "search_fields": [
             "title", "abstract", "author", "journal",
             "mesh", "keyword", "doi", "pmid"
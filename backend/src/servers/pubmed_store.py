@@ -0,0 +1,332 @@
+"""
+Local PubMed article store - SQLite FTS5 index fed by EFetch and NCBI baseline/update files.
+"""
+from __future__ import annotations
+
+import gzip
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from io import BytesIO
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypedDict
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    pmid INTEGER PRIMARY KEY,
+    title TEXT,
+    abstract TEXT,
+    authors TEXT,
+    journal TEXT,
+    pub_date TEXT,
+    doi TEXT,
+    updated_at REAL NOT NULL
+);
+-- FTS rows share their rowid with articles.pmid.
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, abstract, authors, journal
+);
+CREATE TABLE IF NOT EXISTS sync_files (
+    name TEXT PRIMARY KEY,
+    articles INTEGER NOT NULL,
+    deleted INTEGER NOT NULL,
+    ingested_at REAL NOT NULL
+);
+"""
+
+UPSERT_BATCH_SIZE = 1000
+_FIELD_TAG = re.compile(r"\[(\w+)\]")
+_TOKEN = re.compile(r'"[^"]+"|[^\s()]+')
+
+
+class ArticleRecord(TypedDict):
+    pmid: str
+    title: str
+    abstract: str
+    authors: List[str]
+    journal: str
+    pub_date: str
+    doi: str
+
+
+def _text(element: Optional[ET.Element]) -> str:
+    return "".join(element.itertext()).strip() if element is not None else ""
+
+
+def _article_from_xml(article: ET.Element) -> Optional[ArticleRecord]:
+    citation = article.find("MedlineCitation")
+    if citation is None:
+        return None
+    pmid = _text(citation.find("PMID"))
+    body = citation.find("Article")
+    if not pmid or body is None:
+        return None
+
+    sections = []
+    for part in body.findall("Abstract/AbstractText"):
+        label = part.get("Label")
+        text = _text(part)
+        sections.append(f"{label}: {text}" if label else text)
+
+    authors = []
+    for author in body.findall("AuthorList/Author"):
+        collective = _text(author.find("CollectiveName"))
+        if collective:
+            authors.append(collective)
+            continue
+        parts = (_text(author.find("LastName")), _text(author.find("Initials")))
+        name = " ".join(part for part in parts if part)
+        if name:
+            authors.append(name)
+
+    pub_date = body.find("Journal/JournalIssue/PubDate")
+    date_text = _text(pub_date.find("MedlineDate")) if pub_date is not None else ""
+    if pub_date is not None and not date_text:
+        date_text = " ".join(
+            _text(part)
+            for part in (pub_date.find(tag) for tag in ("Year", "Month", "Day"))
+            if part is not None
+        )
+
+    doi = ""
+    for article_id in article.findall("PubmedData/ArticleIdList/ArticleId"):
+        if article_id.get("IdType") == "doi":
+            doi = _text(article_id)
+            break
+
+    return {
+        "pmid": pmid,
+        "title": _text(body.find("ArticleTitle")),
+        "abstract": "\n".join(sections),
+        "authors": authors,
+        "journal": _text(body.find("Journal/Title")),
+        "pub_date": date_text,
+        "doi": doi,
+    }
+
+
+def parse_pubmed_xml(source: IO[bytes] | bytes) -> Iterator[Tuple[str, Any]]:
+    """Stream ("article", ArticleRecord) and ("delete", [pmids]) events from PubMed XML.
+
+    Accepts EFetch responses and baseline/update files alike; elements are
+    cleared once consumed so multi-gigabyte files parse in bounded memory.
+    """
+
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    for _, element in ET.iterparse(source, events=("end",)):
+        if element.tag == "PubmedArticle":
+            record = _article_from_xml(element)
+            if record:
+                yield "article", record
+            element.clear()
+        elif element.tag == "DeleteCitation":
+            yield "delete", [_text(pmid) for pmid in element.findall("PMID")]
+            element.clear()
+
+
+def render_article(record: ArticleRecord, position: Optional[int] = None) -> str:
+    """Render a stored article in the same spirit as EFetch's abstract text."""
+
+    prefix = f"{position}. " if position is not None else ""
+    lines = [f"{prefix}{record['journal']}. {record['pub_date']}.".strip(), ""]
+    lines.append(record["title"])
+    if record["authors"]:
+        lines.extend(["", ", ".join(record["authors"])])
+    if record["abstract"]:
+        lines.extend(["", record["abstract"]])
+    lines.append("")
+    if record["doi"]:
+        lines.append(f"DOI: {record['doi']}")
+    lines.append(f"PMID: {record['pmid']}")
+    return "\n".join(lines)
+
+
+def _fts_query(term: str) -> str:
+    """Translate a simple PubMed term (with [title]/[author] tags) into FTS5 syntax."""
+
+    column_map = {
+        "title": "title",
+        "ti": "title",
+        "abstract": "abstract",
+        "tiab": None,
+        "author": "authors",
+        "au": "authors",
+        "journal": "journal",
+        "ta": "journal",
+    }
+    clauses = []
+    for token in _TOKEN.findall(term):
+        upper = token.upper()
+        if upper in ("AND", "OR", "NOT"):
+            clauses.append(upper)
+            continue
+        match = _FIELD_TAG.search(token)
+        column = column_map.get(match.group(1).lower()) if match else None
+        word = _FIELD_TAG.sub("", token).strip('"').replace('"', "")
+        if not word:
+            continue
+        phrase = f'"{word}"'
+        clauses.append(f"{column} : {phrase}" if column else phrase)
+    return " ".join(clauses)
+
+
+class PubMedStore:
+    """SQLite-backed mirror of PubMed article metadata and abstracts."""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _row_to_record(row: sqlite3.Row) -> ArticleRecord:
+        return {
+            "pmid": str(row["pmid"]),
+            "title": row["title"] or "",
+            "abstract": row["abstract"] or "",
+            "authors": [name for name in (row["authors"] or "").split("; ") if name],
+            "journal": row["journal"] or "",
+            "pub_date": row["pub_date"] or "",
+            "doi": row["doi"] or "",
+        }
+
+    def upsert(self, records: Iterable[ArticleRecord]) -> int:
+        count = 0
+        with self._lock, self._conn:
+            for record in records:
+                authors = "; ".join(record["authors"])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO articles"
+                    " (pmid, title, abstract, authors, journal, pub_date, doi, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        int(record["pmid"]),
+                        record["title"],
+                        record["abstract"],
+                        authors,
+                        record["journal"],
+                        record["pub_date"],
+                        record["doi"],
+                        time.time(),
+                    ),
+                )
+                self._conn.execute(
+                    "DELETE FROM articles_fts WHERE rowid = ?", (int(record["pmid"]),)
+                )
+                self._conn.execute(
+                    "INSERT INTO articles_fts (rowid, title, abstract, authors, journal)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (
+                        int(record["pmid"]),
+                        record["title"],
+                        record["abstract"],
+                        authors,
+                        record["journal"],
+                    ),
+                )
+                count += 1
+        return count
+
+    def delete(self, pmids: Sequence[str]) -> int:
+        with self._lock, self._conn:
+            for pmid in pmids:
+                self._conn.execute("DELETE FROM articles WHERE pmid = ?", (int(pmid),))
+                self._conn.execute("DELETE FROM articles_fts WHERE rowid = ?", (int(pmid),))
+        return len(pmids)
+
+    def get_many(self, pmids: Sequence[str]) -> Dict[str, ArticleRecord]:
+        ids = [int(pmid) for pmid in pmids if pmid.isdigit()]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" for _ in ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM articles WHERE pmid IN ({placeholders})", ids
+            ).fetchall()
+        return {str(row["pmid"]): self._row_to_record(row) for row in rows}
+
+    def search(
+        self, term: str, *, limit: int = 20, newest_first: bool = False
+    ) -> List[ArticleRecord]:
+        """Full-text search ranked by bm25 (or publication date).
+
+        Returns an empty list for terms the index cannot parse so callers fall
+        back to NCBI.
+        """
+
+        query = _fts_query(term)
+        if not query:
+            return []
+        order = "articles.pub_date DESC" if newest_first else "bm25(articles_fts)"
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    "SELECT articles.* FROM articles_fts"
+                    " JOIN articles ON articles.pmid = articles_fts.rowid"
+                    f" WHERE articles_fts MATCH ? ORDER BY {order} LIMIT ?",
+                    (query, limit),
+                ).fetchall()
+            except sqlite3.OperationalError:
+                return []
+        return [self._row_to_record(row) for row in rows]
+
+    def ingest(self, source: IO[bytes] | bytes) -> Tuple[int, int]:
+        """Ingest PubMed XML; returns (articles upserted, citations deleted)."""
+
+        upserted = deleted = 0
+        batch: List[ArticleRecord] = []
+        for kind, payload in parse_pubmed_xml(source):
+            if kind == "article":
+                batch.append(payload)
+                if len(batch) >= UPSERT_BATCH_SIZE:
+                    upserted += self.upsert(batch)
+                    batch = []
+            else:
+                deleted += self.delete(payload)
+        if batch:
+            upserted += self.upsert(batch)
+        return upserted, deleted
+
+    def ingest_file(self, path: Path | str, name: Optional[str] = None) -> Tuple[int, int]:
+        """Ingest a (gzipped) baseline or update file and record it as synced."""
+
+        path = Path(path)
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rb") as handle:
+            upserted, deleted = self.ingest(handle)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_files (name, articles, deleted, ingested_at)"
+                " VALUES (?, ?, ?, ?)",
+                (name or path.name, upserted, deleted, time.time()),
+            )
+        return upserted, deleted
+
+    def synced_files(self) -> set[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM sync_files").fetchall()
+        return {row["name"] for row in rows}
+
+    def last_sync(self) -> Optional[float]:
+        """When the most recent baseline or update file was ingested, if ever."""
+        with self._lock:
+            return self._conn.execute("SELECT MAX(ingested_at) FROM sync_files").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            articles = self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            files = self._conn.execute(
+                "SELECT COUNT(*), MAX(ingested_at) FROM sync_files"
+            ).fetchone()
+        return {
+            "path": str(self.path),
+            "articles": articles,
+            "synced_files": files[0],
+            "last_sync": files[1],
+        }
@@ -0,0 +1,232 @@
+"""
+Tool-result size governor: oversized results are split into pages served by a continuation handle.
+"""
+from __future__ import annotations
+
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import jsonschema
+import mcp.types as mt
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.tools.tool import ToolResult
+
+from ..common import json_codec
+from .upstream import request_tenant
+
+logger = logging.getLogger(__name__)
+
+# Rough token estimate; close enough for English text and compact JSON.
+CHARS_PER_TOKEN = 4
+# Room left in each page for the continuation notice.
+NOTICE_CHARS = 300
+
+Page = Tuple[str, Optional[Dict[str, Any]]]
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def split_text(text: str, limit: int) -> List[str]:
+    """Split ``text`` into chunks of at most ``limit`` characters.
+
+    Cuts fall on the last blank line (record boundary in text output), else the
+    last newline, else the last space before the limit.
+    """
+    chunks = []
+    while len(text) > limit:
+        cut = -1
+        for separator in ("\n\n", "\n", " "):
+            cut = text.rfind(separator, limit // 2, limit)
+            if cut != -1:
+                break
+        if cut == -1:
+            cut = limit
+        chunks.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+def split_records(payload: Dict[str, Any], limit: int) -> Optional[List[Dict[str, Any]]]:
+    """Split the largest list in a JSON payload so each page stays valid JSON.
+
+    Returns None when the payload has no list to split or one item alone is
+    over the limit.
+    """
+    lists = [key for key, value in payload.items() if isinstance(value, list) and value]
+    if not lists:
+        return None
+    key = max(lists, key=lambda name: len(json_codec.dumps(payload[name])))
+    base = len(json_codec.dumps({**payload, key: []}))
+    pages: List[Dict[str, Any]] = []
+    chunk: List[Any] = []
+    size = base
+    for item in payload[key]:
+        item_size = len(json_codec.dumps(item)) + 1
+        if base + item_size > limit:
+            return None
+        if chunk and size + item_size > limit:
+            pages.append({**payload, key: chunk})
+            chunk, size = [], base
+        chunk.append(item)
+        size += item_size
+    pages.append({**payload, key: chunk})
+    return pages
+
+
+@dataclass
+class _Continuation:
+    tool: str
+    tenant: Optional[str]
+    pages: List[Page]
+    served: int
+    expires_at: float
+
+
+class ResultGovernor(Middleware):
+    """Keeps every tool result within ``token_budget`` estimated tokens.
+
+    A larger result is split into pages (by record for JSON payloads with a
+    list of records, by paragraph or line otherwise). The first page is
+    returned with a notice naming an opaque handle; the rest stay in memory for
+    ``ttl`` seconds and are served one at a time by ``fetch_more``. Handles are
+    bound to the tenant that produced them, and at most ``max_handles`` are
+    kept (oldest dropped first). A budget of 0 disables the governor.
+    """
+
+    def __init__(self, token_budget: int, ttl: float = 600.0, max_handles: int = 256) -> None:
+        self.token_budget = token_budget
+        self.ttl = ttl
+        self.max_handles = max_handles
+        self._continuations: OrderedDict[str, _Continuation] = OrderedDict()
+        self.stats: Dict[str, int] = {
+            "results": 0,
+            "truncated": 0,
+            "unsplittable": 0,
+            "tokens_returned": 0,
+            "tokens_deferred": 0,
+            "fetches": 0,
+            "expired": 0,
+            "evicted": 0,
+        }
+
+    async def on_call_tool(
+        self,
+        context: MiddlewareContext[mt.CallToolRequestParams],
+        call_next: CallNext[mt.CallToolRequestParams, ToolResult],
+    ) -> ToolResult:
+        result = await call_next(context)
+        if self.token_budget <= 0:
+            return result
+        self.stats["results"] += 1
+        text = "\n".join(
+            block.text for block in result.content if isinstance(block, mt.TextContent)
+        )
+        tokens = estimate_tokens(text)
+        if tokens <= self.token_budget or len(result.content) != 1:
+            self.stats["tokens_returned"] += tokens
+            return result
+
+        name = context.message.name
+        schema = None
+        if context.fastmcp_context is not None:
+            tool = await context.fastmcp_context.fastmcp.get_tool(name)
+            schema = tool.output_schema
+        pages = self._paginate(text, result.structured_content, schema)
+        if pages is None:
+            self.stats["unsplittable"] += 1
+            self.stats["tokens_returned"] += tokens
+            logger.warning("Result of %s (~%d tokens) could not be paged", name, tokens)
+            return result
+
+        handle = self._store(name, pages)
+        first = pages[0]
+        self.stats["truncated"] += 1
+        self.stats["tokens_returned"] += estimate_tokens(first[0])
+        self.stats["tokens_deferred"] += sum(estimate_tokens(page[0]) for page in pages[1:])
+        return self._page_result(handle, first, 1, len(pages))
+
+    def _paginate(
+        self, text: str, structured: Optional[Dict[str, Any]], schema: Optional[Dict[str, Any]]
+    ) -> Optional[List[Page]]:
+        limit = self.token_budget * CHARS_PER_TOKEN - NOTICE_CHARS
+        wrapped = bool(schema and schema.get("x-fastmcp-wrap-result"))
+        if structured is not None and not wrapped:
+            records = split_records(structured, limit)
+            if records is None:
+                return None
+            pages: List[Page] = [(json_codec.dumps(page), page) for page in records]
+        else:
+            pages = [
+                (chunk, {"result": chunk} if wrapped else None)
+                for chunk in split_text(text, limit)
+            ]
+        if schema is not None:
+            try:
+                for _, page in pages:
+                    jsonschema.validate(page, schema)
+            except jsonschema.ValidationError:
+                return None
+        return pages
+
+    def _store(self, tool: str, pages: List[Page]) -> str:
+        self._expire(time.monotonic())
+        handle = secrets.token_urlsafe(12)
+        self._continuations[handle] = _Continuation(
+            tool, request_tenant(), pages, 1, time.monotonic() + self.ttl
+        )
+        while len(self._continuations) > self.max_handles:
+            self._continuations.popitem(last=False)
+            self.stats["evicted"] += 1
+        return handle
+
+    def _expire(self, now: float) -> None:
+        for handle in [key for key, item in self._continuations.items() if item.expires_at <= now]:
+            del self._continuations[handle]
+            self.stats["expired"] += 1
+
+    @staticmethod
+    def _page_result(handle: str, page: Page, number: int, total: int) -> ToolResult:
+        text, structured = page
+        content: List[mt.ContentBlock] = [mt.TextContent(type="text", text=text)]
+        if number < total:
+            content.append(
+                mt.TextContent(
+                    type="text",
+                    text=(
+                        f"[Result truncated: part {number} of {total}. Call fetch_more with "
+                        f'handle "{handle}" for the next part.]'
+                    ),
+                )
+            )
+        return ToolResult(content=content, structured_content=structured)
+
+    def fetch_more(self, handle: str) -> ToolResult | str:
+        """Next page for ``handle``, or an error message when it is unknown or used up."""
+        self._expire(time.monotonic())
+        continuation = self._continuations.get(handle)
+        if continuation is None or continuation.tenant != request_tenant():
+            return f"Error: Unknown or expired result handle '{handle}'."
+        self.stats["fetches"] += 1
+        number = continuation.served + 1
+        page = continuation.pages[continuation.served]
+        continuation.served = number
+        if number == len(continuation.pages):
+            del self._continuations[handle]
+        return self._page_result(handle, page, number, len(continuation.pages))
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._expire(time.monotonic())
+        return {
+            "token_budget": self.token_budget,
+            "ttl_seconds": self.ttl,
+            "open_handles": len(self._continuations),
+            **self.stats,
+        }
@@ -0,0 +1,243 @@
+"""
+Per-patient working sets for incremental FHIR sync, keyed by `_lastUpdated` watermarks.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..common import json_codec
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watermarks (
+    patient TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    last_updated TEXT,
+    synced_at REAL NOT NULL,
+    full_synced_at REAL NOT NULL,
+    PRIMARY KEY (patient, resource_type)
+);
+CREATE TABLE IF NOT EXISTS working_set (
+    patient TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    id TEXT NOT NULL,
+    status TEXT,
+    last_updated TEXT,
+    resource TEXT NOT NULL,
+    PRIMARY KEY (patient, resource_type, id)
+);
+CREATE TABLE IF NOT EXISTS included (
+    patient TEXT NOT NULL,
+    reference TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    PRIMARY KEY (patient, reference)
+);
+"""
+
+# Statuses that mean the resource should never have existed.
+REMOVED_STATUSES = frozenset({"entered-in-error"})
+
+
+def _last_updated(resource: Dict[str, Any]) -> Optional[str]:
+    return (resource.get("meta") or {}).get("lastUpdated")
+
+
+class WorkingSetStore:
+    """SQLite copy of each patient's resources plus the watermark they are current to.
+
+    Incremental syncs merge changed resources into the set; a full sync also
+    drops resources the server no longer returns, which is how hard deletions
+    (invisible to ``_lastUpdated`` searches) are eventually reconciled.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+
+    def watermark(self, patient: str, resource_type: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_updated, synced_at, full_synced_at FROM watermarks"
+                " WHERE patient = ? AND resource_type = ?",
+                (patient, resource_type),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def merge(
+        self,
+        patient: str,
+        resource_type: str,
+        resources: Iterable[Dict[str, Any]],
+        included: Dict[str, Dict[str, Any]],
+        *,
+        server_time: Optional[str],
+        full: bool,
+    ) -> Tuple[int, int]:
+        """Apply a sync result; returns (resources upserted, resources removed).
+
+        The new watermark is the server's bundle time when it sent one, else the
+        newest ``meta.lastUpdated`` seen, and never moves backwards.
+        """
+
+        now = time.time()
+        upserted = removed = 0
+        seen: List[str] = []
+        newest_seen: Optional[str] = None
+        with self._lock, self._conn:
+            for resource in resources:
+                resource_id = resource.get("id")
+                if not resource_id:
+                    continue
+                stamp = _last_updated(resource)
+                if stamp and (newest_seen is None or stamp > newest_seen):
+                    newest_seen = stamp
+                if resource.get("status") in REMOVED_STATUSES:
+                    removed += self._conn.execute(
+                        "DELETE FROM working_set WHERE patient = ? AND resource_type = ?"
+                        " AND id = ?",
+                        (patient, resource_type, resource_id),
+                    ).rowcount
+                    continue
+                seen.append(resource_id)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO working_set"
+                    " (patient, resource_type, id, status, last_updated, resource)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        patient,
+                        resource_type,
+                        resource_id,
+                        resource.get("status"),
+                        stamp,
+                        json_codec.dumps(resource),
+                    ),
+                )
+                upserted += 1
+            if full:
+                placeholders = ",".join("?" * len(seen))
+                removed += self._conn.execute(
+                    "DELETE FROM working_set WHERE patient = ? AND resource_type = ?"
+                    + (f" AND id NOT IN ({placeholders})" if seen else ""),
+                    (patient, resource_type, *seen),
+                ).rowcount
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO included (patient, reference, resource) VALUES (?, ?, ?)",
+                [
+                    (patient, reference, json_codec.dumps(resource))
+                    for reference, resource in included.items()
+                ],
+            )
+            previous = self._conn.execute(
+                "SELECT last_updated, full_synced_at FROM watermarks"
+                " WHERE patient = ? AND resource_type = ?",
+                (patient, resource_type),
+            ).fetchone()
+            newest = server_time or newest_seen
+            if previous and previous["last_updated"]:
+                newest = max(filter(None, [newest, previous["last_updated"]]))
+            full_synced_at = now if full or previous is None else previous["full_synced_at"]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO watermarks"
+                " (patient, resource_type, last_updated, synced_at, full_synced_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (patient, resource_type, newest, now, full_synced_at),
+            )
+        return upserted, removed
+
+    def resources(
+        self, patient: str, resource_type: str
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """Return the patient's working set and the referenced resources cached with it."""
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT resource FROM working_set WHERE patient = ? AND resource_type = ?",
+                (patient, resource_type),
+            ).fetchall()
+            included = self._conn.execute(
+                "SELECT reference, resource FROM included WHERE patient = ?", (patient,)
+            ).fetchall()
+        return (
+            [json_codec.loads(row["resource"]) for row in rows],
+            {row["reference"]: json_codec.loads(row["resource"]) for row in included},
+        )
+
+    def patch(self, patient: str, resource_type: str, resource: Dict[str, Any]) -> bool:
+        """Apply one pushed change to an existing working set, leaving its watermark.
+
+        The watermark stays put because changes between it and this one may not
+        have been seen yet; the next sync still asks for them. Returns False when
+        the patient has no working set for ``resource_type``.
+        """
+
+        resource_id = resource.get("id")
+        if not resource_id:
+            return False
+        with self._lock, self._conn:
+            known = self._conn.execute(
+                "SELECT 1 FROM watermarks WHERE patient = ? AND resource_type = ?",
+                (patient, resource_type),
+            ).fetchone()
+            if known is None:
+                return False
+            if resource.get("status") in REMOVED_STATUSES:
+                self._conn.execute(
+                    "DELETE FROM working_set WHERE patient = ? AND resource_type = ? AND id = ?",
+                    (patient, resource_type, resource_id),
+                )
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO working_set"
+                    " (patient, resource_type, id, status, last_updated, resource)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        patient,
+                        resource_type,
+                        resource_id,
+                        resource.get("status"),
+                        _last_updated(resource),
+                        json_codec.dumps(resource),
+                    ),
+                )
+        return True
+
+    def discard(self, resource_type: str, resource_id: str) -> List[str]:
+        """Remove a deleted resource from every working set; returns the patients affected."""
+
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT patient FROM working_set WHERE resource_type = ? AND id = ?",
+                (resource_type, resource_id),
+            ).fetchall()
+            self._conn.execute(
+                "DELETE FROM working_set WHERE resource_type = ? AND id = ?",
+                (resource_type, resource_id),
+            )
+        return [row["patient"] for row in rows]
+
+    def forget(self, patient: str) -> None:
+        with self._lock, self._conn:
+            for table in ("watermarks", "working_set", "included"):
+                self._conn.execute(f"DELETE FROM {table} WHERE patient = ?", (patient,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            patients = self._conn.execute(
+                "SELECT COUNT(DISTINCT patient) FROM watermarks"
+            ).fetchone()[0]
+            counts = self._conn.execute(
+                "SELECT resource_type, COUNT(*) AS resources FROM working_set"
+                " GROUP BY resource_type"
+            ).fetchall()
+        return {
+            "path": str(self.path),
+            "patients": patients,
+            "resources": {row["resource_type"]: row["resources"] for row in counts},
+        }
@@ -0,0 +1,758 @@
+"""
+Resilience layer for upstream HTTP APIs - timeouts, circuit breakers and hedged GETs.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, Mapping, Optional, Set
+from urllib.parse import urlsplit
+
+import aiohttp
+from fastmcp.server.dependencies import get_http_headers
+
+from ..common import json_codec
+from ..common.cassette import (
+    Cassette,
+    CassetteMiss,
+    decode_body,
+    http_key,
+    scrub_body,
+    scrub_request,
+)
+from ..common.timeseries import TimeSeriesStore
+
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+CACHE_MAX_ENTRIES = 512
+CACHE_MAX_BODY_BYTES = 2 << 20
+
+# Absolute request deadline (Unix epoch seconds) set by the chat API.
+DEADLINE_HEADER = "x-fuse-deadline"
+# Marks speculative tool calls issued while the chat API is still planning.
+PREFETCH_HEADER = "x-fuse-prefetch"
+# Organization whose Epic tenant serves the call (see epic_tenants.py).
+TENANT_HEADER = "x-fuse-tenant"
+_IGNORE_DEADLINE: ContextVar[bool] = ContextVar("ignore_request_deadline", default=False)
+
+# Per-upstream request throughput, errors and latency ("upstream:<name> <host>"),
+# served to the chat API's analytics endpoints by server.py.
+UPSTREAM_METRICS = TimeSeriesStore()
+
+# Opt-in capture of every buffered upstream exchange (CASSETTE_MODE=record) and
+# offline replay with recorded latencies (CASSETTE_MODE=replay); see cassette.py.
+UPSTREAM_CASSETTE = Cassette.from_env("upstream")
+
+
+class UpstreamError(Exception):
+    """Raised when an upstream request cannot be completed."""
+
+
+class UpstreamTimeout(UpstreamError):
+    pass
+
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+
+class DeadlineExceeded(UpstreamTimeout):
+    """The caller's budget ran out; says nothing about the upstream's health."""
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left before the current MCP request's deadline, if it carries one."""
+
+    if _IGNORE_DEADLINE.get():
+        return None
+    value = get_http_headers().get(DEADLINE_HEADER)
+    if not value:
+        return None
+    try:
+        return float(value) - time.time()
+    except ValueError:
+        return None
+
+
+def is_prefetch() -> bool:
+    """Whether the current MCP request is a speculative prefetch."""
+
+    return get_http_headers().get(PREFETCH_HEADER) == "1"
+
+
+def request_tenant() -> Optional[str]:
+    """Tenant key the chat API attached to the current MCP request, if any."""
+
+    return get_http_headers().get(TENANT_HEADER) or None
+
+
+def ignore_request_deadline() -> None:
+    """Detach the current task from the request deadline.
+
+    Background work spawned by a tool (e.g. bulk export downloads) inherits the
+    request context; call this at the top of such tasks.
+    """
+
+    _IGNORE_DEADLINE.set(True)
+
+
+@dataclass
+class UpstreamResponse:
+    """Fully buffered upstream response."""
+
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json_codec.loads(self.body)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open -> closed.
+
+    While open every call fails fast. After ``reset_timeout`` a single probe is
+    let through (half-open); its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half-open"
+        if self.state == "half-open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """A call ended without a verdict on the host (cancelled or out of budget)."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == "half-open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == "open":
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        return {"state": self.state, "failures": self.failures, "retry_in_seconds": retry_in}
+
+
+class LatencyTracker:
+    """Sliding window of successful request latencies."""
+
+    def __init__(self, size: int = LATENCY_WINDOW) -> None:
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ResponseCache:
+    """Short-lived LRU cache of successful GET responses.
+
+    Entries written by speculative prefetches are flagged so the cache can
+    report how many of them a real tool call went on to use. Callers may tag
+    an entry (e.g. with the patient it describes) and later drop every entry
+    carrying a tag; a tagged entry may also get its own TTL.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = CACHE_MAX_ENTRIES) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # key -> [started_at, response, prefetched, used, ttl, tags]
+        self._entries: "OrderedDict[str, list[Any]]" = OrderedDict()
+        self._tagged: Dict[str, Set[str]] = {}
+        # tag -> when it was last invalidated, so responses fetched before then
+        # but tagged afterwards are dropped instead of cached.
+        self._invalidated: Dict[str, float] = {}
+        self._max_ttl = ttl_seconds
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "prefetched": 0,
+            "prefetch_hits": 0,
+            "prefetch_unused": 0,
+            "invalidated": 0,
+        }
+
+    @staticmethod
+    def key(method: str, url: str, params: Any, headers: Optional[Mapping[str, str]]) -> str:
+        pairs = params.items() if isinstance(params, Mapping) else params or ()
+        # Sorted pairs rather than a dict so repeated keys (id=1&id=2) stay distinct.
+        items = sorted((str(k), str(v)) for k, v in pairs)
+        # Responses are only shared between callers holding the same credentials.
+        auth = (headers or {}).get("Authorization", "")
+        material = repr((method.upper(), url, items, auth))
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        if entry[2] and not entry[3]:
+            self.stats["prefetch_unused"] += 1
+        self._untag(key, entry[5])
+
+    def _untag(self, key: str, tags: Iterable[str]) -> None:
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def get(self, key: str, prefetch: bool) -> Optional[UpstreamResponse]:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] > entry[4]:
+            self._drop(key)
+            entry = None
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        if entry[2] and not entry[3] and not prefetch:
+            entry[3] = True
+            self.stats["prefetch_hits"] += 1
+        return entry[1]
+
+    def mark_used(self, key: str) -> None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[3] = True
+
+    def put(
+        self,
+        key: str,
+        response: UpstreamResponse,
+        prefetched: bool,
+        used: bool,
+        started_at: Optional[float] = None,
+    ) -> None:
+        """Store ``response``; its age counts from ``started_at`` (when it was requested)."""
+        if len(response.body) > CACHE_MAX_BODY_BYTES:
+            return
+        if key in self._entries:
+            self._drop(key)
+        stored_at = time.monotonic() if started_at is None else started_at
+        self._entries[key] = [stored_at, response, prefetched, used, self.ttl_seconds, ()]
+        if prefetched:
+            self.stats["prefetched"] += 1
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def tag(
+        self,
+        key: str,
+        tags: Iterable[str],
+        ttl: Optional[float] = None,
+        ttl_not_before: Optional[float] = None,
+    ) -> None:
+        """Attach ``tags`` to the entry for ``key``.
+
+        ``ttl`` replaces the entry's TTL, but only when it was requested at or
+        after ``ttl_not_before`` (a ``time.monotonic()`` value) if one is given.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        tags = tuple(tags)
+        if any(self._invalidated.get(tag, float("-inf")) >= entry[0] for tag in tags):
+            # Requested before a change to one of its subjects was reported.
+            self._drop(key)
+            self.stats["invalidated"] += 1
+            return
+        self._untag(key, entry[5])
+        entry[5] = tags
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        if ttl is not None and (ttl_not_before is None or entry[0] >= ttl_not_before):
+            entry[4] = ttl
+            self._max_ttl = max(self._max_ttl, ttl)
+
+    def invalidate(self, tag: str) -> int:
+        """Drop every entry tagged ``tag``; returns how many were dropped."""
+        now = time.monotonic()
+        self._invalidated[tag] = now
+        if len(self._invalidated) > self.max_entries:
+            horizon = now - self._max_ttl
+            for stale in [name for name, at in self._invalidated.items() if at < horizon]:
+                del self._invalidated[stale]
+        keys = list(self._tagged.get(tag, ()))
+        for key in keys:
+            self._drop(key)
+        self.stats["invalidated"] += len(keys)
+        return len(keys)
+
+    def clear(self) -> int:
+        dropped = len(self._entries)
+        for key in list(self._entries):
+            self._drop(key)
+        self.stats["invalidated"] += dropped
+        return dropped
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "entries": len(self._entries),
+            "tagged_entries": len(set().union(*self._tagged.values())) if self._tagged else 0,
+            **self.stats,
+        }
+
+
+class RateLimiter:
+    """Spaces request starts so at most ``rate`` begin per second."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self.waits = 0
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            self.waits += 1
+            await asyncio.sleep(slot - now)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+class Upstream:
+    """Timeouts, per-host circuit breakers and optional hedging for one upstream API.
+
+    Settings are read from ``<PREFIX>_CONNECT_TIMEOUT``, ``<PREFIX>_READ_TIMEOUT``,
+    ``<PREFIX>_BREAKER_FAILURES``, ``<PREFIX>_BREAKER_RESET``, ``<PREFIX>_HEDGE`` and
+    ``<PREFIX>_CACHE_TTL`` (0 disables the response cache) and ``<PREFIX>_RATE_LIMIT``
+    (requests per second, 0 for unlimited) so each deployment can tune them per
+    upstream.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        env_prefix: str,
+        *,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        hedge: bool = False,
+        hedge_min_delay: float = 0.25,
+        cache_ttl: float = 0.0,
+        rate_limit: float = 0.0,
+    ) -> None:
+        self.name = name
+        self.env_prefix = env_prefix
+        self.connect_timeout = _env_float(f"{env_prefix}_CONNECT_TIMEOUT", connect_timeout)
+        self.read_timeout = _env_float(f"{env_prefix}_READ_TIMEOUT", read_timeout)
+        self.failure_threshold = int(
+            _env_float(f"{env_prefix}_BREAKER_FAILURES", failure_threshold)
+        )
+        self.reset_timeout = _env_float(f"{env_prefix}_BREAKER_RESET", reset_timeout)
+        self.hedge = os.getenv(f"{env_prefix}_HEDGE", "true" if hedge else "false").lower() in (
+            "1",
+            "true",
+            "yes",
+        )
+        self.hedge_min_delay = hedge_min_delay
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        ttl = _env_float(f"{env_prefix}_CACHE_TTL", cache_ttl)
+        self.cache: Optional[ResponseCache] = ResponseCache(ttl) if ttl > 0 else None
+        # Single-flight: key -> [pending response, issued by a prefetch, joined by a real call]
+        self._inflight: Dict[str, list[Any]] = {}
+        rate = _env_float(f"{env_prefix}_RATE_LIMIT", rate_limit)
+        self.rate_limiter: Optional[RateLimiter] = RateLimiter(rate) if rate > 0 else None
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(
+                self.failure_threshold, self.reset_timeout
+            )
+        return breaker
+
+    def latency(self, host: str) -> LatencyTracker:
+        tracker = self._latency.get(host)
+        if tracker is None:
+            tracker = self._latency[host] = LatencyTracker()
+        return tracker
+
+    def timeout(self, read_timeout: Optional[float] = None) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            connect=self.connect_timeout, sock_read=read_timeout or self.read_timeout
+        )
+
+    def _hedge_delay(self, host: str) -> Optional[float]:
+        tracker = self.latency(host)
+        if len(tracker) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(self.hedge_min_delay, tracker.quantile(0.95) or 0.0)
+
+    def _check_breaker(self, host: str) -> CircuitBreaker:
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            raise CircuitOpenError(
+                f"{self.name} circuit for {host} is open after repeated failures; "
+                f"retrying in {breaker.snapshot()['retry_in_seconds']:.0f}s"
+            )
+        return breaker
+
+    def _record(self, host: str, breaker: CircuitBreaker, status: int, started: float) -> None:
+        if status >= 500 or status == 429:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+            self.latency(host).record(time.monotonic() - started)
+
+    async def _send(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        read_timeout: Optional[float],
+        **kwargs: Any,
+    ) -> UpstreamResponse:
+        if self.rate_limiter:
+            await self.rate_limiter.acquire()
+        try:
+            async with session.request(
+                method, url, timeout=self.timeout(read_timeout), **kwargs
+            ) as response:
+                body = await response.read()
+                return UpstreamResponse(response.status, response.headers, body)
+        except asyncio.TimeoutError as exc:
+            path = urlsplit(url).path
+            raise UpstreamTimeout(f"{self.name} request to {path} timed out") from exc
+        except aiohttp.ClientError as exc:
+            path = urlsplit(url).path
+            raise UpstreamError(f"{self.name} request to {path} failed: {exc}") from exc
+
+    async def request(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        *,
+        read_timeout: Optional[float] = None,
+        hedge: Optional[bool] = None,
+        cacheable: bool = False,
+        **kwargs: Any,
+    ) -> UpstreamResponse:
+        """Send a request through the host's breaker and return the buffered response.
+
+        Idempotent GETs are hedged when enabled: if the first attempt has not
+        answered after the host's observed p95 latency a duplicate is sent and
+        whichever finishes first wins. ``cacheable`` GETs are answered from the
+        response cache when possible and share a single in-flight request with
+        identical concurrent calls (typically a prefetch started earlier).
+        """
+
+        budget = remaining_budget()
+        if budget is not None and budget <= 0:
+            raise DeadlineExceeded(f"Request deadline passed before calling {self.name}")
+        if not cacheable or self.cache is None or method.upper() != "GET":
+            return await self._fetch(session, method, url, budget, read_timeout, hedge, **kwargs)
+
+        prefetch = is_prefetch()
+        key = self.cache.key(method, url, kwargs.get("params"), kwargs.get("headers"))
+        cached = self.cache.get(key, prefetch)
+        if cached is not None:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            future, by_prefetch = inflight[0], inflight[1]
+            try:
+                async with asyncio.timeout(budget):
+                    response = await asyncio.shield(future)
+            except TimeoutError as exc:
+                raise DeadlineExceeded(
+                    f"Request deadline exceeded waiting for {self.name} {urlsplit(url).path}"
+                ) from exc
+            except (UpstreamError, asyncio.CancelledError):
+                if not future.cancelled():
+                    raise
+                # The originating call was cancelled; fall through and fetch ourselves.
+            else:
+                if by_prefetch and not prefetch and not inflight[2]:
+                    inflight[2] = True
+                    self.cache.mark_used(key)
+                    self.cache.stats["prefetch_hits"] += 1
+                return response
+
+        future: asyncio.Future[UpstreamResponse] = asyncio.get_running_loop().create_future()
+        # Mark exceptions as retrieved when nobody joined the flight.
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        flight = self._inflight[key] = [future, prefetch, False]
+        requested_at = time.monotonic()
+        try:
+            response = await self._fetch(
+                session, method, url, budget, read_timeout, hedge, **kwargs
+            )
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(exc)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(response)
+        if response.status == 200:
+            self.cache.put(
+                key, response, prefetched=prefetch, used=flight[2], started_at=requested_at
+            )
+        return response
+
+    def tag_cached(
+        self,
+        method: str,
+        url: str,
+        *,
+        tags: Iterable[str],
+        ttl: Optional[float] = None,
+        ttl_not_before: Optional[float] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Tag the cached response of a ``cacheable`` request made with the same arguments."""
+
+        if self.cache is not None:
+            key = self.cache.key(method, url, kwargs.get("params"), kwargs.get("headers"))
+            self.cache.tag(key, tags, ttl, ttl_not_before)
+
+    def invalidate(self, tag: str) -> int:
+        """Drop cached responses tagged ``tag`` (see ``tag_cached``)."""
+
+        return self.cache.invalidate(tag) if self.cache is not None else 0
+
+    def clear_cache(self) -> int:
+        return self.cache.clear() if self.cache is not None else 0
+
+    async def _fetch(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        budget: Optional[float],
+        read_timeout: Optional[float],
+        hedge: Optional[bool],
+        **kwargs: Any,
+    ) -> UpstreamResponse:
+        url_parts = urlsplit(url)
+        host = url_parts.netloc
+        breaker = self._check_breaker(host)
+        started = time.monotonic()
+        hedge_delay = None
+        if method.upper() == "GET" and (self.hedge if hedge is None else hedge):
+            hedge_delay = self._hedge_delay(host)
+
+        try:
+            async with asyncio.timeout(budget):
+                if UPSTREAM_CASSETTE.replaying:
+                    response = await self._replay(method, url, **kwargs)
+                elif hedge_delay is None:
+                    response = await self._send(session, method, url, read_timeout, **kwargs)
+                else:
+                    response = await self._hedged(
+                        session, method, url, read_timeout, hedge_delay, **kwargs
+                    )
+        except TimeoutError as exc:
+            # Only the budget's own timeout escapes _send as a bare TimeoutError.
+            breaker.release_probe()
+            self._observe(host, started, ok=False)
+            raise DeadlineExceeded(
+                f"Request deadline exceeded waiting for {self.name} {url_parts.path}"
+            ) from exc
+        except UpstreamError:
+            breaker.record_failure()
+            self._observe(host, started, ok=False)
+            raise
+        except asyncio.CancelledError:
+            # Cancelled by the caller; release a half-open probe without judging the host.
+            breaker.release_probe()
+            raise
+        self._record(host, breaker, response.status, started)
+        self._observe(host, started, ok=response.status < 500 and response.status != 429)
+        if UPSTREAM_CASSETTE.recording:
+            # Scrubbing decodes the whole body, so it runs with the write in a thread.
+            await asyncio.to_thread(
+                self._record_exchange, method, url, response, time.monotonic() - started, **kwargs
+            )
+        return response
+
+    def _record_exchange(
+        self, method: str, url: str, response: UpstreamResponse, elapsed: float, **kwargs: Any
+    ) -> None:
+        params, data = kwargs.get("params"), kwargs.get("data")
+        content_type = response.headers.get("Content-Type", "")
+        UPSTREAM_CASSETTE.append(
+            "http",
+            http_key(method, url, params, data),
+            {"upstream": self.name, **scrub_request(method, url, params, data)},
+            {
+                "status": response.status,
+                "content_type": content_type,
+                **scrub_body(response.body, content_type),
+            },
+            elapsed,
+        )
+
+    async def _replay(self, method: str, url: str, **kwargs: Any) -> UpstreamResponse:
+        try:
+            recorded = await UPSTREAM_CASSETTE.replay(
+                "http", http_key(method, url, kwargs.get("params"), kwargs.get("data"))
+            )
+        except CassetteMiss as exc:
+            raise UpstreamError(f"{self.name} request to {urlsplit(url).path}: {exc}") from exc
+        headers = {"Content-Type": recorded["content_type"]} if recorded["content_type"] else {}
+        return UpstreamResponse(recorded["status"], headers, decode_body(recorded))
+
+    def _observe(self, host: str, started: float, ok: bool) -> None:
+        UPSTREAM_METRICS.record(f"upstream:{self.name} {host}", time.monotonic() - started, ok)
+
+    async def _hedged(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        read_timeout: Optional[float],
+        delay: float,
+        **kwargs: Any,
+    ) -> UpstreamResponse:
+        primary = asyncio.create_task(self._send(session, method, url, read_timeout, **kwargs))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            self.hedges_sent += 1
+            backup = asyncio.create_task(
+                self._send(session, method, url, read_timeout, **kwargs)
+            )
+            pending.add(backup)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+            raise error  # type: ignore[misc]
+        finally:
+            # Also runs when the caller is cancelled or its budget expires, so no
+            # attempt outlives the call holding a connection.
+            for task in pending:
+                task.cancel()
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        *,
+        read_timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Open a streaming response guarded by the breaker and connect/read timeouts.
+
+        Used for large downloads; the read timeout applies per socket read, so
+        long transfers are fine as long as data keeps arriving.
+        """
+
+        url_parts = urlsplit(url)
+        breaker = self._check_breaker(url_parts.netloc)
+        try:
+            async with session.request(
+                method, url, timeout=self.timeout(read_timeout), **kwargs
+            ) as response:
+                yield response
+        except asyncio.TimeoutError as exc:
+            breaker.record_failure()
+            raise UpstreamTimeout(f"{self.name} request to {url_parts.path} timed out") from exc
+        except aiohttp.ClientError as exc:
+            breaker.record_failure()
+            raise UpstreamError(f"{self.name} request to {url_parts.path} failed: {exc}") from exc
+        except BaseException:
+            breaker.release_probe()
+            raise
+        if response.status >= 500 or response.status == 429:
+            breaker.record_failure()
+        else:
+            # Stream durations track payload size, so they are not latency samples.
+            breaker.record_success()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Breaker state, latency and hedging counters per host."""
+
+        hosts: Dict[str, Any] = {}
+        for host in sorted(set(self._breakers) | set(self._latency)):
+            p95 = self.latency(host).quantile(0.95)
+            hosts[host] = {
+                **self.breaker(host).snapshot(),
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "samples": len(self.latency(host)),
+            }
+        return {
+            "connect_timeout_seconds": self.connect_timeout,
+            "read_timeout_seconds": self.read_timeout,
+            "breaker_failure_threshold": self.failure_threshold,
+            "breaker_reset_seconds": self.reset_timeout,
+            "hedging": self.hedge,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "cache": self.cache.snapshot() if self.cache else None,
+            "rate_limit_per_second": (
+                round(1.0 / self.rate_limiter.interval, 2) if self.rate_limiter else None
+            ),
+            "rate_limit_waits": self.rate_limiter.waits if self.rate_limiter else 0,
+            "cassette": UPSTREAM_CASSETTE.snapshot() if UPSTREAM_CASSETTE.mode != "off" else None,
+            "hosts": hosts,
+        }
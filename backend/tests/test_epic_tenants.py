@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from src.servers.epic_tenants import load_tenants
+
+
+@pytest.fixture
+def defaults(tmp_path):
+    return {
+        "base_url": "https://default.example/fhir",
+        "auth_url": "https://default.example/token",
+        "client_id": "default-client",
+        "client_secret": "default-secret",
+        "scope": "system/Patient.read",
+        "sync_store": str(tmp_path / "sync.db"),
+        "bulk_export_dir": str(tmp_path / "bulk"),
+        "subscription_endpoint": "https://fuse.example/fhir/notify",
+        "subscription_secret": "default-notify-secret",
+    }
+
+
+def configure(monkeypatch, tenants):
+    monkeypatch.delenv("EPIC_TENANTS_FILE", raising=False)
+    monkeypatch.setenv("EPIC_TENANTS", json.dumps(tenants))
+
+
+def test_tenant_does_not_inherit_subscription_secret(monkeypatch, defaults):
+    configure(monkeypatch, {"orgb": {"base_url": "https://orgb.example/fhir"}})
+
+    tenants = load_tenants(defaults)
+
+    assert tenants["default"].subscriptions is not None
+    assert tenants["orgb"].subscriptions is None
+
+
+def test_tenants_never_cross_verify_notifications(monkeypatch, defaults):
+    monkeypatch.setenv("ORGB_NOTIFY_SECRET", "orgb-notify-secret")
+    configure(
+        monkeypatch,
+        {
+            "orgb": {
+                "base_url": "https://orgb.example/fhir",
+                "subscription_endpoint": "https://fuse.example/fhir/notify",
+                "subscription_secret_env": "ORGB_NOTIFY_SECRET",
+            }
+        },
+    )
+
+    tenants = load_tenants(defaults)
+    default, orgb = tenants["default"].subscriptions, tenants["orgb"].subscriptions
+
+    assert default.secret != orgb.secret
+    for sender, receiver in ((default, orgb), (orgb, default)):
+        header = sender.subscription("t", "p1", "Patient")["channel"]["header"][0]
+        assert not receiver.verify(header.removeprefix("Authorization: "))
+        assert sender.verify(header.removeprefix("Authorization: "))
+
+
+def test_shared_subscription_secret_is_rejected(monkeypatch, defaults):
+    configure(
+        monkeypatch,
+        {
+            "orgb": {
+                "base_url": "https://orgb.example/fhir",
+                "subscription_endpoint": "https://fuse.example/fhir/notify",
+                "subscription_secret": "default-notify-secret",
+            }
+        },
+    )
+
+    with pytest.raises(ValueError, match="share a subscription secret"):
+        load_tenants(defaults)
+
+
+def test_subscription_endpoint_without_secret_is_rejected(monkeypatch, defaults):
+    configure(
+        monkeypatch,
+        {
+            "orgb": {
+                "base_url": "https://orgb.example/fhir",
+                "subscription_endpoint": "https://fuse.example/fhir/notify",
+            }
+        },
+    )
+
+    with pytest.raises(ValueError, match="no subscription secret"):
+        load_tenants(defaults)
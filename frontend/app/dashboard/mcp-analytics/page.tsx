@@ -34,6 +34,7 @@ import {
   Layers3,
   TrendingUp,
 } from "lucide-react";
+import { useAnalyticsSeriesQuery, useAnalyticsSummaryQuery } from "@/lib/api";
 type ChartTooltipItem = {
   dataKey?: string | number;
   name?: string;
@@ -47,25 +48,6 @@ interface ChartTooltipProps {
   label?: string | number;
 }
 
-const volumeData = [
-  { day: "Mon", messages: 3180, completions: 1740 },
-  { day: "Tue", messages: 4120, completions: 2050 },
-  { day: "Wed", messages: 3890, completions: 1980 },
-  { day: "Thu", messages: 4410, completions: 2210 },
-  { day: "Fri", messages: 4730, completions: 2380 },
-  { day: "Sat", messages: 3020, completions: 1590 },
-  { day: "Sun", messages: 2840, completions: 1460 },
-];
-
-const latencyData = [
-  { hour: "09:00", latency: 812 },
-  { hour: "12:00", latency: 755 },
-  { hour: "15:00", latency: 702 },
-  { hour: "18:00", latency: 688 },
-  { hour: "21:00", latency: 731 },
-  { hour: "24:00", latency: 694 },
-];
-
 const sentimentData = [
   { week: "Aug 4", positive: 64, neutral: 28, negative: 8 },
   { week: "Aug 11", positive: 61, neutral: 30, negative: 9 },
@@ -73,14 +55,6 @@ const sentimentData = [
   { week: "Aug 25", positive: 70, neutral: 23, negative: 7 },
 ];
 
-const channelMix = [
-  { channel: "FHIR", value: 38 },
-  { channel: "HL7", value: 22 },
-  { channel: "Claims", value: 19 },
-  { channel: "Eligibility", value: 13 },
-  { channel: "Custom", value: 8 },
-];
-
 const sentimentColors = {
   positive: "#34d399",
   neutral: "#93c5fd",
@@ -133,49 +107,98 @@ function AnalyticsTooltip(props: ChartTooltipProps) {
   );
 }
 
-const metrics = [
-  {
-    label: "Total MCP traffic",
-    value: "28.4k",
-    delta: "+12.6%",
-    icon: Activity,
-    direction: "up" as const,
-  },
-  {
-    label: "Clinical accuracy",
-    value: "98.4%",
-    delta: "+1.8%",
-    icon: Gauge,
-    direction: "up" as const,
-  },
-  {
-    label: "Escalations",
-    value: "126",
-    delta: "-4.2%",
-    icon: AlertTriangle,
-    direction: "down" as const,
-  },
-  {
-    label: "Avg. latency",
-    value: "721 ms",
-    delta: "-8.5%",
-    icon: TrendingUp,
-    direction: "down" as const,
-  },
-];
+const WINDOW_MINUTES = 60;
+
+function formatMinute(ts: number) {
+  return new Date(ts * 1000).toLocaleTimeString([], { hour: "2-digit", minute: "2-digit" });
+}
+
+function formatMs(value: number | null | undefined) {
+  if (value === null || value === undefined) {
+    return "–";
+  }
+  return value >= 1000 ? `${(value / 1000).toFixed(1)} s` : `${Math.round(value)} ms`;
+}
+
+function formatRate(value: number | null | undefined) {
+  if (value === null || value === undefined) {
+    return "–";
+  }
+  return `${(value * 100).toFixed(1)}%`;
+}
 
 export default function MCPAnalyticsPage() {
+  const { data: summary } = useAnalyticsSummaryQuery(WINDOW_MINUTES);
+  const { data: toolSeries } = useAnalyticsSeriesQuery("tool", "minute", WINDOW_MINUTES);
+  const { data: geminiSeries } = useAnalyticsSeriesQuery("gemini", "minute", WINDOW_MINUTES);
+  const { data: hourlyTools } = useAnalyticsSeriesQuery("tool", "hour", 12);
+
+  const tools = summary?.kinds.tool;
+  const gemini = summary?.kinds.gemini;
+  const metrics = [
+    {
+      label: "Tool calls",
+      value: (tools?.count ?? 0).toLocaleString(),
+      detail: `${tools?.per_minute ?? 0} per minute`,
+      icon: Activity,
+      direction: "up" as const,
+    },
+    {
+      label: "Tool error rate",
+      value: formatRate(tools?.error_rate),
+      detail: `${tools?.errors ?? 0} failed calls`,
+      icon: AlertTriangle,
+      direction: "down" as const,
+    },
+    {
+      label: "Tool p95 latency",
+      value: formatMs(tools?.p95_ms),
+      detail: `p50 ${formatMs(tools?.p50_ms)}`,
+      icon: Gauge,
+      direction: "up" as const,
+    },
+    {
+      label: "Gemini p95 latency",
+      value: formatMs(gemini?.p95_ms),
+      detail: `${(gemini?.count ?? 0).toLocaleString()} model calls`,
+      icon: TrendingUp,
+      direction: "up" as const,
+    },
+  ];
+
+  const volumeData = (toolSeries?.points ?? []).map((point, index) => ({
+    minute: formatMinute(point.ts),
+    tools: point.count,
+    gemini: geminiSeries?.points[index]?.count ?? 0,
+  }));
+
+  const latencyData = (hourlyTools?.points ?? []).map((point) => ({
+    hour: formatMinute(point.ts),
+    latency: point.p95_ms ?? 0,
+  }));
+
+  const channelTotals = new Map<string, number>();
+  for (const metric of summary?.metrics ?? []) {
+    if (metric.kind === "tool") {
+      const server = metric.name.split("_")[0] || metric.name;
+      channelTotals.set(server, (channelTotals.get(server) ?? 0) + metric.count);
+    }
+  }
+  const channelMix = Array.from(channelTotals, ([channel, value]) => ({ channel, value }));
+
+  const connectors = (summary?.metrics ?? []).filter((metric) => metric.kind === "upstream");
+
   return (
     <div className="flex flex-col gap-10 py-6 px-8">
       <section className="flex flex-col gap-6 md:flex-row md:items-end md:justify-between">
         <div className="space-y-8">
           <div className="flex items-center gap-3 text-xs text-white/50">
             <Badge className="border-white/20 bg-white/5 px-4 py-1 text-white/60">
-              Weekly snapshot
+              Live
             </Badge>
             <span className="flex items-center gap-2 text-white/40">
               <CalendarRange className="h-4 w-4" strokeWidth={1.4} />
-              Aug 18 – Aug 24
+              Last {WINDOW_MINUTES} minutes
             </span>
           </div>
           <h1 className="text-3xl font-semibold text-white md:text-4xl">
@@ -217,7 +240,7 @@ export default function MCPAnalyticsPage() {
                 </div>
                 <div>
                   <p className="text-2xl font-semibold text-white">{metric.value}</p>
-                  <p className={`text-xs ${deltaColor}`}>{metric.delta} week over week</p>
+                  <p className={`text-xs ${deltaColor}`}>{metric.detail}</p>
                 </div>
               </CardContent>
             </Card>
@@ -228,30 +251,30 @@ export default function MCPAnalyticsPage() {
       <section className="grid gap-6 lg:grid-cols-[2fr,1fr]">
         <Card className="">
           <CardHeader>
-            <CardTitle>Message throughput</CardTitle>
+            <CardTitle>Call throughput</CardTitle>
             <CardDescription>
-              Daily message ingestion vs successful completions across all MCPs.
+              MCP tool calls vs Gemini calls per minute over the last hour.
             </CardDescription>
           </CardHeader>
           <CardContent className="h-full pb-20">
             <ResponsiveContainer width="100%" height="100%">
               <AreaChart data={volumeData} margin={{ left: 0, right: 0, top: 10 }}>
                 <defs>
-                  <linearGradient id="colorMessages" x1="0" x2="0" y1="0" y2="1">
+                  <linearGradient id="colorTools" x1="0" x2="0" y1="0" y2="1">
                     <stop offset="5%" stopColor="#60a5fa" stopOpacity={0.6} />
                     <stop offset="95%" stopColor="#60a5fa" stopOpacity={0.05} />
                   </linearGradient>
-                  <linearGradient id="colorCompletions" x1="0" x2="0" y1="0" y2="1">
+                  <linearGradient id="colorGemini" x1="0" x2="0" y1="0" y2="1">
                     <stop offset="5%" stopColor="#a855f7" stopOpacity={0.6} />
                     <stop offset="95%" stopColor="#a855f7" stopOpacity={0.05} />
                   </linearGradient>
                 </defs>
                 <CartesianGrid stroke="rgba(255,255,255,0.08)" vertical={false} />
-                <XAxis dataKey="day" tickLine={false} axisLine={false} stroke="rgba(255,255,255,0.35)" />
+                <XAxis dataKey="minute" tickLine={false} axisLine={false} stroke="rgba(255,255,255,0.35)" />
                 <YAxis tickLine={false} axisLine={false} stroke="rgba(255,255,255,0.35)" />
                 <Tooltip content={<AnalyticsTooltip />} cursor={{ stroke: "rgba(255,255,255,0.2)" }} />
-                <Area type="monotone" dataKey="messages" name="Messages" stroke="#60a5fa" fill="url(#colorMessages)" strokeWidth={2} />
-                <Area type="monotone" dataKey="completions" name="Completions" stroke="#a855f7" fill="url(#colorCompletions)" strokeWidth={2} />
+                <Area type="monotone" dataKey="tools" name="Tool calls" stroke="#60a5fa" fill="url(#colorTools)" strokeWidth={2} />
+                <Area type="monotone" dataKey="gemini" name="Gemini calls" stroke="#a855f7" fill="url(#colorGemini)" strokeWidth={2} />
               </AreaChart>
             </ResponsiveContainer>
           </CardContent>
@@ -261,7 +284,7 @@ export default function MCPAnalyticsPage() {
           <Card className="">
             <CardHeader>
               <CardTitle>Latency trend</CardTitle>
-              <CardDescription>95th percentile response latency by time of day.</CardDescription>
+              <CardDescription>95th percentile tool call latency (ms) per hour.</CardDescription>
             </CardHeader>
             <CardContent className="h-[150px]">
               <ResponsiveContainer width="100%" height="100%">
@@ -279,7 +302,7 @@ export default function MCPAnalyticsPage() {
           <Card className="">
             <CardHeader>
               <CardTitle>Channel mix</CardTitle>
-              <CardDescription>Share of MCP messages routed by connector.</CardDescription>
+              <CardDescription>Share of tool calls routed to each MCP server.</CardDescription>
             </CardHeader>
             <CardContent className="h-[150px]">
               <ResponsiveContainer width="100%" height="100%">
@@ -322,38 +345,20 @@ export default function MCPAnalyticsPage() {
           <CardHeader>
             <CardTitle>Connector health</CardTitle>
             <CardDescription>
-              Pulse of the top connectors across availability, error budget, and retrain cadence.
+              Upstream API availability, errors and latency over the last hour.
             </CardDescription>
           </CardHeader>
           <CardContent className="space-y-4">
-            {[
-              {
-                name: "Athena",
-                availability: "99.98%",
-                breaches: 1,
-                retrain: "In 3 days",
-              },
-              {
-                name: "Epic",
-                availability: "99.92%",
-                breaches: 3,
-                retrain: "In 5 days",
-              },
-              {
-                name: "Cerner",
-                availability: "99.88%",
-                breaches: 4,
-                retrain: "In 8 days",
-              },
-              {
-                name: "Custom HL7",
-                availability: "99.76%",
-                breaches: 6,
-                retrain: "In 2 days",
-              },
-            ].map((connector) => (
+            {connectors.length === 0 && (
+              <p className="text-sm text-white/55">
+                {summary?.upstream_available === false
+                  ? "Upstream metrics are unavailable; is the MCP server running?"
+                  : "No upstream requests in the last hour."}
+              </p>
+            )}
+            {connectors.map((connector) => (
               <div
-                key={connector.name}
+                key={connector.metric}
                 className="flex flex-wrap items-center justify-between gap-4 rounded-2xl px-4 py-3"
               >
                 <div>
@@ -362,14 +367,14 @@ export default function MCPAnalyticsPage() {
                     {connector.name}
                   </p>
                   <p className="text-xs text-white/55">
-                    Next retrain: {connector.retrain}
+                    p95 {formatMs(connector.p95_ms)} · {connector.count.toLocaleString()} requests
                   </p>
                 </div>
                 <div className="text-right text-xs text-white/55">
                   <p className="text-sm font-semibold text-white">
-                    {connector.availability}
+                    {formatRate(1 - (connector.error_rate ?? 0))}
                   </p>
-                  <p>{connector.breaches} SLO breaches</p>
+                  <p>{connector.errors} errors</p>
                 </div>
               </div>
             ))}
@@ -1,5 +1,9 @@
 import { getBackendBaseUrl } from "../config";
 import type {
+  AnalyticsMetricsResponse,
+  AnalyticsResolution,
+  AnalyticsSeriesResponse,
+  AnalyticsSummaryResponse,
   ChatRequestPayload,
   ChatResponsePayload,
   CreateTaskResponse,
@@ -129,3 +133,25 @@ export function postExecute(payload: ChatRequestPayload, options?: RequestOption
 export function fetchHealth(options?: RequestOptions) {
   return request<HealthResponse>("/health", undefined, options);
 }
+
+export function fetchAnalyticsSummary(windowMinutes = 60, options?: RequestOptions) {
+  return request<AnalyticsSummaryResponse>(
+    `/analytics/summary?window_minutes=${windowMinutes}`,
+    undefined,
+    options,
+  );
+}
+
+export function fetchAnalyticsSeries(
+  metric: string,
+  resolution: AnalyticsResolution = "minute",
+  points = 60,
+  options?: RequestOptions,
+) {
+  const search = new URLSearchParams({ metric, resolution, points: String(points) });
+  return request<AnalyticsSeriesResponse>(`/analytics/series?${search.toString()}`, undefined, options);
+}
+
+export function fetchAnalyticsMetrics(options?: RequestOptions) {
+  return request<AnalyticsMetricsResponse>("/analytics/metrics", undefined, options);
+}
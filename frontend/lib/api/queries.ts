@@ -3,6 +3,8 @@
 import { useMutation, useQuery, UseMutationOptions, UseQueryOptions } from "@tanstack/react-query";
 import {
   createTask,
+  fetchAnalyticsSeries,
+  fetchAnalyticsSummary,
   fetchServerOverview,
   fetchTasks,
   postChat,
@@ -10,6 +12,9 @@ import {
   updateTaskStatus,
 } from "./endpoints";
 import type {
+  AnalyticsResolution,
+  AnalyticsSeriesResponse,
+  AnalyticsSummaryResponse,
   ChatRequestPayload,
   ChatResponsePayload,
   CreateTaskResponse,
@@ -23,8 +28,13 @@ import type {
 export const queryKeys = {
   serverOverview: ["api", "server-overview"] as const,
   tasks: (status?: TaskStatus) => ["api", "tasks", status ?? "all"] as const,
+  analyticsSummary: (windowMinutes: number) => ["api", "analytics", "summary", windowMinutes] as const,
+  analyticsSeries: (metric: string, resolution: AnalyticsResolution, points: number) =>
+    ["api", "analytics", "series", metric, resolution, points] as const,
 };
 
+const ANALYTICS_REFRESH_MS = 15_000;
+
 export function useServerOverviewQuery(
   options?: Omit<
     UseQueryOptions<ServerOverviewResponse, Error, ServerOverviewResponse, typeof queryKeys.serverOverview>,
@@ -53,6 +63,48 @@ export function useTasksQuery(
   });
 }
 
+export function useAnalyticsSummaryQuery(
+  windowMinutes = 60,
+  options?: Omit<
+    UseQueryOptions<
+      AnalyticsSummaryResponse,
+      Error,
+      AnalyticsSummaryResponse,
+      ReturnType<typeof queryKeys.analyticsSummary>
+    >,
+    "queryKey" | "queryFn"
+  >,
+) {
+  return useQuery({
+    queryKey: queryKeys.analyticsSummary(windowMinutes),
+    queryFn: () => fetchAnalyticsSummary(windowMinutes),
+    refetchInterval: ANALYTICS_REFRESH_MS,
+    ...options,
+  });
+}
+
+export function useAnalyticsSeriesQuery(
+  metric: string,
+  resolution: AnalyticsResolution = "minute",
+  points = 60,
+  options?: Omit<
+    UseQueryOptions<
+      AnalyticsSeriesResponse,
+      Error,
+      AnalyticsSeriesResponse,
+      ReturnType<typeof queryKeys.analyticsSeries>
+    >,
+    "queryKey" | "queryFn"
+  >,
+) {
+  return useQuery({
+    queryKey: queryKeys.analyticsSeries(metric, resolution, points),
+    queryFn: () => fetchAnalyticsSeries(metric, resolution, points),
+    refetchInterval: ANALYTICS_REFRESH_MS,
+    ...options,
+  });
+}
+
 export function useCreateTaskMutation(
   options?: UseMutationOptions<
     CreateTaskResponse,
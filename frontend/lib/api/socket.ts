@@ -0,0 +1,29 @@
+import { getBackendBaseUrl } from "../config";
+import type { ChatSocketClientFrame, ChatSocketServerFrame } from "./types";
+
+export interface ChatSocket {
+  send: (frame: ChatSocketClientFrame) => void;
+  close: () => void;
+  socket: WebSocket;
+}
+
+/**
+ * Open the multiplexed `/ws/chat` connection; frames for every conversation arrive on `onFrame`.
+ * The dashboard chat still uses the HTTP `/chat` and `/execute` endpoints; this client is for
+ * callers that want streamed tokens and several conversations on one connection.
+ */
+export function openChatSocket(
+  onFrame: (frame: ChatSocketServerFrame) => void,
+  options?: { baseUrl?: string },
+): ChatSocket {
+  const baseUrl = (options?.baseUrl ?? getBackendBaseUrl()).replace(/\/$/, "").replace(/^http/, "ws");
+  const socket = new WebSocket(`${baseUrl}/ws/chat`);
+  socket.addEventListener("message", (event) => {
+    onFrame(JSON.parse(String(event.data)) as ChatSocketServerFrame);
+  });
+  return {
+    socket,
+    send: (frame) => socket.send(JSON.stringify(frame)),
+    close: () => socket.close(),
+  };
+}
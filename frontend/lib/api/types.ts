@@ -56,6 +56,8 @@ export interface ChatMessage {
 export interface ChatRequestPayload {
   message: string;
   history?: ChatMessage[];
+  /** Epic organization key; the MCP server's default tenant when omitted. */
+  tenant?: string;
 }
 
 export interface ChatResponsePayload {
@@ -94,3 +96,75 @@ export interface PubMedCapabilitiesResponse {
   tools: string[];
   description: string;
 }
+
+export type AnalyticsResolution = "minute" | "hour";
+
+export interface AnalyticsStats {
+  count: number;
+  errors: number;
+  error_rate: number | null;
+  avg_ms: number | null;
+  max_ms: number | null;
+  p50_ms: number | null;
+  p95_ms: number | null;
+  p99_ms: number | null;
+}
+
+export interface AnalyticsWindowStats extends AnalyticsStats {
+  per_minute: number;
+}
+
+export interface AnalyticsMetricStats extends AnalyticsWindowStats {
+  metric: string;
+  kind: string;
+  name: string;
+}
+
+export interface AnalyticsSummaryResponse {
+  window_minutes: number;
+  resolution: AnalyticsResolution;
+  kinds: Record<string, AnalyticsWindowStats>;
+  metrics: AnalyticsMetricStats[];
+  upstream_available: boolean;
+}
+
+export interface AnalyticsSeriesPoint extends AnalyticsStats {
+  ts: number;
+}
+
+export interface AnalyticsSeriesResponse {
+  metric: string;
+  resolution: AnalyticsResolution;
+  points: AnalyticsSeriesPoint[];
+}
+
+export interface AnalyticsMetricsResponse {
+  metrics: string[];
+}
+
+export type ChatSocketClientFrame =
+  | {
+      type: "chat";
+      conversation_id: string;
+      turn_id?: string;
+      message: string;
+      /** Seeds a new conversation's server-side history, e.g. after reconnecting. */
+      history?: ChatMessage[];
+      tenant?: string;
+    }
+  | { type: "execute" | "cancel" | "end"; conversation_id: string; turn_id?: string }
+  | { type: "ping" };
+
+interface ChatSocketTurnFrame {
+  conversation_id: string;
+  turn_id: string | null;
+}
+
+export type ChatSocketServerFrame =
+  | (ChatSocketTurnFrame & { type: "started"; kind: "chat" | "execute" })
+  | (ChatSocketTurnFrame & { type: "token"; text: string })
+  | (ChatSocketTurnFrame & { type: "tool"; step: Record<string, unknown> })
+  | (ChatSocketTurnFrame & { type: "result" } & ChatResponsePayload)
+  | (ChatSocketTurnFrame & { type: "cancelled" })
+  | (Partial<ChatSocketTurnFrame> & { type: "error"; status: number; detail: string; reason?: string })
+  | { type: "pong" };